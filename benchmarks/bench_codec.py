@@ -0,0 +1,50 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.MotionCodec import MotionCodec
+
+def synthetic_trial(n_frames: int, n_markers: int, n_bodies: int, rate: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_frames)[:, None, None] / rate
+    markers = rng.uniform(-1, 1, (1, n_markers, 3)) + 0.3 * np.sin(2 * np.pi * rng.uniform(0.5, 3, (1, n_markers, 3)) * t)
+    markers += rng.normal(scale=5e-5, size=markers.shape)
+    rotvecs = (t * rng.normal(scale=2.0, size=(1, n_bodies, 3))).reshape(-1, 3)
+    quaternions = R.from_rotvec(rotvecs).as_quat().reshape(n_frames, n_bodies, 4)
+    return markers, quaternions
+
+def timed(function, repeats: int = 3) -> float:
+    best = np.inf
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    rate = 200.0
+    markers, quaternions = synthetic_trial(20000, 50, 15, rate)
+    duration = markers.shape[0] / rate
+    print(f"{'stream':>12}{'bound':>10}{'ratio':>8}{'enc [x rt]':>12}{'dec [x rt]':>12}{'max err':>10}")
+    for max_error in (None, 1e-5, 1e-4):
+        codec = MotionCodec(max_error=max_error)
+        encoded = codec.encode_positions(markers)
+        encode_time = timed(lambda: codec.encode_positions(markers))
+        decode_time = timed(encoded.decode)
+        error = np.max(np.abs(encoded.decode() - markers))
+        print(f"{'markers':>12}{str(max_error):>10}{encoded.compression_ratio():>8.1f}"
+              f"{duration / encode_time:>12.0f}{duration / decode_time:>12.0f}{error:>10.1e}")
+    for bits in (10, 14):
+        codec = MotionCodec(quaternion_bits=bits)
+        encoded = codec.encode_quaternions(quaternions)
+        encode_time = timed(lambda: codec.encode_quaternions(quaternions))
+        decode_time = timed(encoded.decode)
+        decoded = encoded.decode()
+        error = np.max(np.abs(decoded * np.sign(np.sum(decoded * quaternions, axis=2, keepdims=True)) - quaternions))
+        print(f"{'quaternions':>12}{bits:>10}{encoded.compression_ratio():>8.1f}"
+              f"{duration / encode_time:>12.0f}{duration / decode_time:>12.0f}{error:>10.1e}")
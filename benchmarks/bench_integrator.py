@@ -0,0 +1,36 @@
+import os
+import sys
+import time
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.RigidBodyState import RigidBodyState
+from src.Integrator import semi_implicit_euler_step, rk4_step
+
+def make_state(n_bodies: int, seed: int = 0) -> RigidBodyState:
+    rng = np.random.default_rng(seed)
+    return RigidBodyState(rng.normal(size=(n_bodies, 3)),
+                          rng.normal(size=(n_bodies, 4)),
+                          linear_velocities=rng.normal(size=(n_bodies, 3)),
+                          angular_velocities=rng.normal(size=(n_bodies, 3)),
+                          masses=rng.uniform(0.5, 2.0, n_bodies),
+                          inertia=rng.uniform(0.1, 1.0, (n_bodies, 3)))
+
+def body_steps_per_second(step, n_bodies: int, n_steps: int, dt: float = 1e-3) -> float:
+    state = make_state(n_bodies)
+    step(state, dt)  # warm up
+    start = time.perf_counter()
+    for i in range(n_steps):
+        step(state, dt, i * dt)
+    elapsed = time.perf_counter() - start
+    return n_bodies * n_steps / elapsed
+
+if __name__ == "__main__":
+    print(f"{'integrator':<26}{'bodies':>10}{'body-steps/s':>16}")
+    for step in (semi_implicit_euler_step, rk4_step):
+        for n_bodies in (10, 100, 1000, 10000, 100000):
+            n_steps = max(10, 200000 // n_bodies)
+            rate = body_steps_per_second(step, n_bodies, n_steps)
+            print(f"{step.__name__:<26}{n_bodies:>10}{rate:>16.3e}")
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.SkeletonSnapshot import SkeletonSnapshot
+from src.BatchEvaluator import BatchEvaluator
+
+def make_snapshot(n_markers: int, seed: int = 0) -> SkeletonSnapshot:
+    rng = np.random.default_rng(seed)
+    return SkeletonSnapshot(rng.normal(size=(n_markers, 3)), np.arange(n_markers - 1), np.arange(1, n_markers))
+
+def frames_per_second(evaluator: BatchEvaluator, matrices: np.ndarray, repeats: int = 5) -> float:
+    evaluator.transform(matrices)  # warm up the pool
+    start = time.perf_counter()
+    for _ in range(repeats):
+        evaluator.transform(matrices)
+    return repeats * matrices.shape[0] / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    n_frames, n_markers = 200000, 40
+    snapshot = make_snapshot(n_markers)
+    matrices = np.tile(np.eye(4), (n_frames, 1, 1))
+    matrices[:, :3, :3] = R.random(n_frames, random_state=0).as_matrix()
+
+    print(f"{n_frames} frames x {n_markers} markers, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'frames/s':>14}{'speedup':>10}")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        with BatchEvaluator(snapshot, max_workers=workers) as evaluator:
+            rate = frames_per_second(evaluator, matrices)
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>14.3e}{rate / baseline:>10.2f}")
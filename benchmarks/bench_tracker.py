@@ -0,0 +1,31 @@
+import os
+import sys
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.RigidBodyTracker import RigidBodyTracker
+
+def synthetic_capture(n_bodies: int, n_markers: int, n_frames: int, dt: float, occlusion: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    templates = rng.normal(scale=0.05, size=(n_bodies, n_markers, 3))
+    t = np.arange(n_frames) * dt
+    positions = rng.normal(size=(n_bodies, 3)) + t[:, None, None] * rng.normal(size=(n_bodies, 3))
+    rotations = R.from_rotvec((t[:, None, None] * rng.normal(size=(n_bodies, 3))).reshape(-1, 3)).as_matrix().reshape(n_frames, n_bodies, 3, 3)
+    markers = np.einsum('tbij,bnj->tbni', rotations, templates) + positions[:, :, None]
+    markers += rng.normal(scale=2e-4, size=markers.shape)
+    markers[rng.random(markers.shape[:3]) < occlusion] = np.nan
+    return {f"body{i}": templates[i] for i in range(n_bodies)}, markers
+
+if __name__ == "__main__":
+    dt = 0.001
+    print(f"{'bodies':>8}{'mean [us]':>12}{'max [us]':>12}{'rate [Hz]':>12}{'low conf.':>11}")
+    for n_bodies in (8, 24, 48, 96):
+        templates, markers = synthetic_capture(n_bodies, 5, 2000, dt, occlusion=0.1)
+        tracker = RigidBodyTracker(templates, dt)
+        frames = tracker.track(markers)
+        timing = tracker.timing()
+        low = np.mean([frame.low_confidence.mean() for frame in frames])
+        print(f"{n_bodies:>8}{timing['mean'] * 1e6:>12.1f}{timing['max'] * 1e6:>12.1f}{timing['rate']:>12.0f}{low:>11.3f}")
@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from SkeletonSnapshot import SkeletonSnapshot
+from Profiler import instrumented
+
+class BatchEvaluator:
+    def __init__(self, topology, max_workers: Optional[int] = None, min_chunk_frames: int = 256) -> None:
+        """Initialize a thread-pool evaluator for batches of skeleton poses.
+
+        The work is split into chunks of frames, each processed with a few large NumPy operations
+        that release the GIL, so the chunks run in parallel on several cores. Inputs are never
+        modified and every chunk writes to its own slice of the output.
+
+        :param topology: A Skeleton or SkeletonSnapshot providing the link indices.
+        :param max_workers: Number of worker threads. Defaults to the number of CPUs.
+        :param min_chunk_frames: Smallest number of frames given to a worker, so per-chunk overhead stays negligible.
+        """
+        # Skeletons are captured once; snapshots are already immutable
+        self.snapshot: SkeletonSnapshot = topology.snapshot() if hasattr(topology, "snapshot") else topology
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_chunk_frames = max(1, int(min_chunk_frames))
+        # Calls made from a worker thread, e.g. by a function given to `map_subjects`, process
+        # their chunks inline: waiting on chunks queued behind the busy workers would deadlock
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, initializer=self._mark_worker)
+
+    def _mark_worker(self) -> None:
+        """Flag the current thread as one of the pool workers."""
+        self._local.worker = True
+
+    def _in_worker(self) -> bool:
+        """Return True if the caller runs on one of the pool workers."""
+        return getattr(self._local, "worker", False)
+
+    def _chunks(self, n_frames: int) -> List[slice]:
+        """Split a number of frames into at most one contiguous chunk per worker."""
+        n_chunks = max(1, min(self.max_workers, n_frames // self.min_chunk_frames))
+        bounds = np.linspace(0, n_frames, n_chunks + 1).astype(int)
+        return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    def _run(self, function: Callable[[slice], None], n_frames: int) -> None:
+        """Run a function over all chunks of frames and wait for completion."""
+        chunks = self._chunks(n_frames)
+        if len(chunks) == 1 or self._in_worker():
+            for chunk in chunks:
+                function(chunk)
+            return
+        for future in [self._executor.submit(function, chunk) for chunk in chunks]:
+            future.result()
+
+    def _check_trajectory(self, trajectory: np.ndarray) -> np.ndarray:
+        trajectory = np.asarray(trajectory, dtype=float)
+        if trajectory.ndim != 3 or trajectory.shape[1:] != self.snapshot.positions.shape:
+            raise ValueError(f"Trajectory must have shape (T, {self.snapshot.positions.shape[0]}, 3).")
+        return trajectory
+
+    @instrumented
+    def transform(self, transformation_matrices: np.ndarray, trajectory: Optional[np.ndarray] = None) -> np.ndarray:
+        """Apply one 4x4 transformation per frame to the marker positions.
+
+        :param transformation_matrices: Transformations of shape (T, 4, 4).
+        :param trajectory: Marker positions of shape (T, N, 3). Defaults to the snapshot pose for every frame.
+        :return: Transformed positions of shape (T, N, 3).
+        :raises ValueError: If the shapes do not match.
+        """
+        matrices = np.asarray(transformation_matrices, dtype=float)
+        if matrices.ndim != 3 or matrices.shape[1:] != (4, 4):
+            raise ValueError("Transformation matrices must have shape (T, 4, 4).")
+        n_frames = matrices.shape[0]
+        if trajectory is None:
+            trajectory = np.broadcast_to(self.snapshot.positions, (n_frames,) + self.snapshot.positions.shape)
+        trajectory = self._check_trajectory(trajectory)
+        if trajectory.shape[0] != n_frames:
+            raise ValueError("There must be one transformation per frame.")
+        output = np.empty(trajectory.shape)
+
+        def work(chunk: slice) -> None:
+            rotations = np.transpose(matrices[chunk, :3, :3], (0, 2, 1))
+            np.matmul(trajectory[chunk], rotations, out=output[chunk])
+            output[chunk] += matrices[chunk, np.newaxis, :3, 3]
+
+        self._run(work, n_frames)
+        return output
+
+    @instrumented
+    def link_lengths(self, trajectory: np.ndarray) -> np.ndarray:
+        """Compute the length of every link for every frame.
+
+        :param trajectory: Marker positions of shape (T, N, 3).
+        :return: Link lengths of shape (T, L).
+        """
+        trajectory = self._check_trajectory(trajectory)
+        output = np.empty((trajectory.shape[0], self.snapshot.proximal.shape[0]))
+
+        def work(chunk: slice) -> None:
+            vectors = trajectory[chunk][:, self.snapshot.distal] - trajectory[chunk][:, self.snapshot.proximal]
+            output[chunk] = np.sqrt(np.einsum('tli,tli->tl', vectors, vectors))
+
+        self._run(work, trajectory.shape[0])
+        return output
+
+    def map(self, function: Callable[[np.ndarray], np.ndarray], trajectory: np.ndarray) -> np.ndarray:
+        """Apply a vectorized function to chunks of frames in parallel and concatenate the results.
+
+        The function must accept an array of shape (t, N, 3) and return an array whose first axis has length t.
+        It only scales across cores if it spends its time in NumPy operations that release the GIL.
+
+        :param function: Function evaluated on every chunk.
+        :param trajectory: Marker positions of shape (T, N, 3).
+        :return: The concatenated results.
+        """
+        trajectory = self._check_trajectory(trajectory)
+        chunks = self._chunks(trajectory.shape[0])
+        if self._in_worker():
+            results = [function(trajectory[chunk]) for chunk in chunks]
+        else:
+            results = list(self._executor.map(lambda chunk: function(trajectory[chunk]), chunks))
+        return np.concatenate(results, axis=0)
+
+    def map_subjects(self, function: Callable, trajectories: Sequence[np.ndarray]) -> List:
+        """Run a function on the trajectories of several subjects concurrently.
+
+        The function may call the other methods of this evaluator; their chunks then run on the
+        worker thread of the subject.
+
+        :param function: Function taking one trajectory.
+        :param trajectories: One trajectory per subject.
+        :return: The results, in the order of the trajectories.
+        """
+        return list(self._executor.map(function, trajectories))
+
+    def close(self) -> None:
+        """Shut down the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "BatchEvaluator":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        """String representation of the BatchEvaluator, showing its workers and topology size."""
+        return f"BatchEvaluator(Workers: {self.max_workers}, Markers: {len(self.snapshot.positions)}, Links: {len(self.snapshot.proximal)})"
@@ -0,0 +1,224 @@
+import os
+import sys
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Marker import Marker
+from Link import Link
+from RigidBody import RigidBody
+from Skeleton import Skeleton
+from Registration import fit_rigid_transforms
+
+class CalibrationResult:
+    def __init__(self, skeleton: Skeleton, joint_centers: Dict[str, np.ndarray], joint_residuals: Dict[str, float],
+                 joint_axes: Dict[str, np.ndarray], link_lengths: Dict[str, float],
+                 marker_offsets: Dict[str, Dict[str, np.ndarray]], segment_bodies: Dict[str, RigidBody],
+                 segment_poses: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> None:
+        """Initialize the outcome of a skeleton calibration.
+
+        :param skeleton: Skeleton whose markers are the joint centers (and segment ends) in the reference frame.
+        :param joint_centers: Global joint center positions in the reference frame, keyed by joint label.
+        :param joint_residuals: RMS disagreement between the parent and child estimates of every joint center.
+        :param joint_axes: Global unit axes of the hinge joints in the reference frame.
+        :param link_lengths: Length of every link of the skeleton, keyed by link label.
+        :param marker_offsets: Position of every cluster marker relative to its segment origin, in the segment frame.
+        :param segment_bodies: Pose of every segment in the reference frame, with its origin at the proximal joint center.
+        :param segment_poses: Per-frame rotation matrices (T, 3, 3) and translations (T, 3) of every segment cluster.
+        """
+        self.skeleton = skeleton
+        self.joint_centers = joint_centers
+        self.joint_residuals = joint_residuals
+        self.joint_axes = joint_axes
+        self.link_lengths = link_lengths
+        self.marker_offsets = marker_offsets
+        self.segment_bodies = segment_bodies
+        self.segment_poses = segment_poses
+
+    def __repr__(self) -> str:
+        """String representation of the CalibrationResult, showing its joints and links."""
+        return f"CalibrationResult(Joints: {len(self.joint_centers)}, Links: {len(self.link_lengths)})"
+
+def _joint_label(parent: str, child: str) -> str:
+    return f"{parent}-{child}"
+
+def _fit_joint(parent_pose: Tuple[np.ndarray, np.ndarray], child_pose: Tuple[np.ndarray, np.ndarray],
+               valid: np.ndarray, hinge: bool, label: str,
+               min_excitation: float) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray], float]:
+    """Fit the joint center fixed in both segment frames with batched linear least squares.
+
+    Solves R_p c_p + t_p = R_c c_c + t_c over all valid frames through its 6x6 normal equations.
+    For hinges the best-fitting axis is the null direction of the system, and the center is
+    moved along it to the point closest to the child segment origin. The eigenvalues of the
+    per-frame normal matrix measure how much the joint moved; a ball joint needs all of them
+    above `min_excitation`, a hinge all but the one along its axis.
+    """
+    parent_rotations, parent_translations = parent_pose[0][valid], parent_pose[1][valid]
+    child_rotations, child_translations = child_pose[0][valid], child_pose[1][valid]
+    n_frames = parent_rotations.shape[0]
+    if n_frames < 2:
+        raise ValueError("Not enough frames with both segments visible to fit the joint.")
+
+    cross = np.einsum('tji,tjk->ik', parent_rotations, child_rotations)
+    normal = np.block([[n_frames * np.eye(3), -cross], [-cross.T, n_frames * np.eye(3)]])
+    gap = child_translations - parent_translations
+    rhs = np.concatenate([np.einsum('tji,tj->i', parent_rotations, gap), -np.einsum('tji,tj->i', child_rotations, gap)])
+
+    eigenvalues, eigenvectors = np.linalg.eigh(normal)
+    excitation = eigenvalues / n_frames
+    if hinge and excitation[1] < min_excitation:
+        raise ValueError(f"Joint '{label}' did not move enough to fit a hinge; use a trial with more motion.")
+    if not hinge and excitation[0] < min_excitation:
+        if excitation[1] >= min_excitation:
+            raise ValueError(f"Joint '{label}' only rotated about one axis; fit it as a hinge.")
+        raise ValueError(f"Joint '{label}' did not move enough to fit its center; use a trial with more motion.")
+
+    axis = None
+    if hinge:
+        null = eigenvectors[:, 0]
+        child_axis = null[3:]
+        solution = np.linalg.lstsq(normal, rhs, rcond=None)[0]
+        child_axis_unit = child_axis / np.linalg.norm(child_axis)
+        shift = np.dot(solution[3:], child_axis_unit)
+        scale = shift / np.linalg.norm(child_axis)
+        solution = solution - scale * null
+        axis = child_axis_unit
+    else:
+        solution = np.linalg.solve(normal, rhs)
+    parent_center, child_center = solution[:3], solution[3:]
+
+    from_parent = np.einsum('tij,j->ti', parent_rotations, parent_center) + parent_translations
+    from_child = np.einsum('tij,j->ti', child_rotations, child_center) + child_translations
+    residual = float(np.sqrt(np.mean(np.sum((from_parent - from_child) ** 2, axis=1))))
+    return parent_center, child_center, axis, residual
+
+def calibrate(trajectory: np.ndarray, marker_labels: Sequence[str], segments: Dict[str, Sequence[str]],
+              joints: Sequence[Tuple[str, str]], hinges: Sequence[Tuple[str, str]] = (),
+              segment_ends: Optional[Dict[str, str]] = None, reference_frame: Optional[int] = None,
+              min_excitation: float = 1e-6) -> CalibrationResult:
+    """Fit joint centers, link lengths and marker offsets of a subject from a range-of-motion trial.
+
+    Segment poses are solved for all frames at once with a batched Kabsch fit of each marker cluster;
+    joint centers are then found with a functional fit over all frames (SCoRE), and hinge axes with
+    the corresponding axis fit (SARA).
+
+    :param trajectory: Marker positions of shape (T, N, 3). Occluded markers are NaN.
+    :param marker_labels: Labels of the N markers.
+    :param segments: Labels of the cluster markers (at least three) of every segment, keyed by segment name.
+    :param joints: (parent segment, child segment) pairs, forming a tree.
+    :param hinges: Joints among `joints` that are fitted as hinges, yielding an axis.
+    :param segment_ends: Optional marker label closing every terminal segment, keyed by segment name. For a root
+                         segment with several children it is the leaf the skeleton hangs from.
+    :param reference_frame: Frame used to define the segment frames and the output pose. Defaults to the
+                            first frame where every cluster marker is visible.
+    :param min_excitation: Smallest eigenvalue of the per-frame joint fit system accepted as enough motion,
+                           which grows with the square of the relative rotation range.
+    :return: A CalibrationResult with the fitted Skeleton.
+    :raises ValueError: If the segment or joint definitions are inconsistent with the trajectory, or a joint
+                        did not move enough to be fitted.
+    """
+    trajectory = np.asarray(trajectory, dtype=float)
+    marker_labels = list(marker_labels)
+    if trajectory.ndim != 3 or trajectory.shape[1:] != (len(marker_labels), 3):
+        raise ValueError(f"Trajectory must have shape (T, {len(marker_labels)}, 3).")
+    segment_ends = segment_ends or {}
+    hinges = {tuple(joint) for joint in hinges}
+    index = {label: i for i, label in enumerate(marker_labels)}
+    for name, cluster in segments.items():
+        if len(cluster) < 3:
+            raise ValueError(f"Segment '{name}' needs at least three cluster markers.")
+        missing = [label for label in cluster if label not in index]
+        if missing:
+            raise ValueError(f"Unknown markers {missing} in segment '{name}'.")
+    children: Dict[str, List[str]] = {name: [] for name in segments}
+    parents: Dict[str, str] = {}
+    for parent, child in joints:
+        if parent not in segments or child not in segments:
+            raise ValueError(f"Joint ({parent}, {child}) refers to an unknown segment.")
+        if child in parents:
+            raise ValueError(f"Segment '{child}' has more than one parent.")
+        parents[child] = parent
+        children[parent].append(child)
+    roots = [name for name in segments if name not in parents]
+    if len(roots) != 1:
+        raise ValueError("Joints must connect all segments into a single tree.")
+
+    cluster_indices = {name: np.array([index[label] for label in cluster]) for name, cluster in segments.items()}
+    all_cluster = np.concatenate(list(cluster_indices.values()))
+    if reference_frame is None:
+        complete = np.flatnonzero(np.all(np.isfinite(trajectory[:, all_cluster]), axis=(1, 2)))
+        if complete.size == 0:
+            raise ValueError("No frame has all cluster markers visible; pass reference_frame explicitly.")
+        reference_frame = int(complete[0])
+
+    # Segment frames are aligned with the global axes at the reference frame, centered on the cluster
+    templates, poses, solved = {}, {}, {}
+    for name, cluster in cluster_indices.items():
+        reference = trajectory[reference_frame, cluster]
+        templates[name] = reference - reference.mean(axis=0)
+        observed = trajectory[:, cluster]
+        visible = np.all(np.isfinite(observed), axis=-1)
+        rotations, translations = fit_rigid_transforms(np.broadcast_to(templates[name], observed.shape), observed, visible.astype(float))
+        poses[name] = (rotations, translations)
+        solved[name] = visible.sum(axis=1) >= 3
+
+    # Joint centers in the local frames of both segments
+    local_centers: Dict[str, Dict[str, np.ndarray]] = {name: {} for name in segments}
+    joint_residuals, joint_axes, joint_centers = {}, {}, {}
+    for parent, child in joints:
+        label = _joint_label(parent, child)
+        valid = solved[parent] & solved[child]
+        parent_center, child_center, axis, residual = _fit_joint(poses[parent], poses[child], valid,
+                                                                 (parent, child) in hinges, label, min_excitation)
+        local_centers[parent][label] = parent_center
+        local_centers[child][label] = child_center
+        joint_residuals[label] = residual
+        rotation, translation = poses[child][0][reference_frame], poses[child][1][reference_frame]
+        joint_centers[label] = rotation @ child_center + translation
+        if axis is not None:
+            joint_axes[label] = rotation @ axis
+
+    # Build the skeleton from the root outwards so every link connects to an existing one
+    skeleton = Skeleton(label="Calibrated Skeleton")
+    link_lengths: Dict[str, float] = {}
+    marker_offsets: Dict[str, Dict[str, np.ndarray]] = {}
+    segment_bodies: Dict[str, RigidBody] = {}
+    nodes: Dict[str, Marker] = {}
+    queue = list(roots)
+    while queue:
+        name = queue.pop(0)
+        rotation, translation = poses[name][0][reference_frame], poses[name][1][reference_frame]
+        if name in parents:
+            origin_label = _joint_label(parents[name], name)
+            origin_local = local_centers[name][origin_label]
+        else:
+            origin_label = name
+            origin_local = np.zeros(3)
+            nodes[origin_label] = Marker(*map(float, translation), label=origin_label)
+            if len(children[name]) > 1:
+                # Skeleton links only branch at their second marker, so hang the root from a leaf marker
+                anchor_label = segment_ends.get(name, segments[name][0])
+                anchor = Marker(*map(float, trajectory[reference_frame, index[anchor_label]]), label=anchor_label)
+                skeleton.add_link(Link(anchor, nodes[origin_label], label=f"{name}:{anchor_label}"))
+                link_lengths[f"{name}:{anchor_label}"] = float(np.linalg.norm(anchor.get_position() - translation))
+        origin = nodes[origin_label]
+
+        marker_offsets[name] = {label: templates[name][i] - origin_local for i, label in enumerate(segments[name])}
+        body_position = rotation @ origin_local + translation
+        segment_bodies[name] = RigidBody(*map(float, body_position), orientation=[0.0, 0.0, 0.0], label=name)
+
+        distal = [(_joint_label(name, child), local_centers[name][_joint_label(name, child)]) for child in children[name]]
+        if not children[name] and name in segment_ends and name in parents:
+            end_global = trajectory[reference_frame, index[segment_ends[name]]]
+            distal.append((segment_ends[name], rotation.T @ (end_global - translation)))
+        for end_label, end_local in distal:
+            nodes[end_label] = Marker(*map(float, rotation @ end_local + translation), label=end_label)
+            link_label = name if len(distal) == 1 else f"{name}:{end_label}"
+            skeleton.add_link(Link(origin, nodes[end_label], label=link_label))
+            link_lengths[link_label] = float(np.linalg.norm(end_local - origin_local))
+        queue.extend(children[name])
+
+    return CalibrationResult(skeleton, joint_centers, joint_residuals, joint_axes, link_lengths,
+                             marker_offsets, segment_bodies, poses)
@@ -0,0 +1,419 @@
+import os
+import sys
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from typing import Iterable, Optional, Sequence, Tuple
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from RigidBody import RigidBody
+from Profiler import instrumented
+
+SPHERE = 0
+CAPSULE = 1
+BOX = 2
+
+_EPSILON = 1e-12
+
+class Sphere:
+    def __init__(self, radius: float) -> None:
+        """Initialize a sphere centered on the origin of its rigid body.
+
+        :param radius: Radius of the sphere.
+        :raises ValueError: If the radius is negative.
+        """
+        if radius < 0:
+            raise ValueError("Radius must be non-negative.")
+        self.radius = float(radius)
+
+    def __repr__(self) -> str:
+        """String representation of the Sphere, showing its radius."""
+        return f"Sphere(Radius: {self.radius:.2f})"
+
+class Capsule:
+    def __init__(self, radius: float, start, end) -> None:
+        """Initialize a capsule, the set of points within a radius of a segment in the rigid body frame.
+
+        :param radius: Radius of the capsule.
+        :param start: First endpoint of the core segment in the body frame.
+        :param end: Second endpoint of the core segment in the body frame.
+        :raises ValueError: If the radius is negative.
+        """
+        if radius < 0:
+            raise ValueError("Radius must be non-negative.")
+        self.radius = float(radius)
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+
+    @classmethod
+    def from_link(cls, link, radius: float, rigid_body: Optional[RigidBody] = None) -> "Capsule":
+        """Create a capsule around a Link, expressed in the frame of the rigid body it is attached to.
+
+        :param link: The Link whose markers give the endpoints of the capsule.
+        :param radius: Radius of the capsule.
+        :param rigid_body: Optional RigidBody the capsule is attached to. If None, the global frame is used.
+        :return: A new Capsule instance.
+        """
+        start = link.marker1.get_position()
+        end = link.marker2.get_position()
+        if rigid_body is not None:
+            inverse = rigid_body.get_inverse_transformation_matrix()
+            start = inverse[:3, :3] @ start + inverse[:3, 3]
+            end = inverse[:3, :3] @ end + inverse[:3, 3]
+        return cls(radius, start, end)
+
+    def __repr__(self) -> str:
+        """String representation of the Capsule, showing its radius and length."""
+        return f"Capsule(Radius: {self.radius:.2f}, Length: {np.linalg.norm(self.end - self.start):.2f})"
+
+class Box:
+    def __init__(self, half_extents) -> None:
+        """Initialize a box centered on the origin of its rigid body and aligned with its axes.
+
+        :param half_extents: Half of the box size along the body X, Y and Z axes.
+        :raises ValueError: If a half extent is negative.
+        """
+        self.half_extents = np.asarray(half_extents, dtype=float)
+        if self.half_extents.shape != (3,) or np.any(self.half_extents < 0):
+            raise ValueError("half_extents must be three non-negative values.")
+
+    def __repr__(self) -> str:
+        """String representation of the Box, showing its half extents."""
+        return f"Box(Half extents: {self.half_extents})"
+
+class Contacts:
+    def __init__(self, pairs: np.ndarray, points: np.ndarray, normals: np.ndarray, depths: np.ndarray) -> None:
+        """Initialize a set of contacts between pairs of shapes.
+
+        :param pairs: Indices (a, b) of the shapes in contact, shape (P, 2), with a < b.
+        :param points: Contact points halfway between the two surfaces, shape (P, 3).
+        :param normals: Unit contact normals pointing from shape a to shape b, shape (P, 3).
+        :param depths: Penetration depths, shape (P,).
+        """
+        self.pairs = pairs
+        self.points = points
+        self.normals = normals
+        self.depths = depths
+
+    @classmethod
+    def empty(cls) -> "Contacts":
+        """Return a set without any contact."""
+        return cls(np.zeros((0, 2), dtype=int), np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0))
+
+    @classmethod
+    def concatenate(cls, contacts: Sequence["Contacts"]) -> "Contacts":
+        """Merge several sets of contacts, sorted by pair."""
+        contacts = [c for c in contacts if len(c)]
+        if not contacts:
+            return cls.empty()
+        pairs = np.concatenate([c.pairs for c in contacts])
+        order = np.lexsort((pairs[:, 1], pairs[:, 0]))
+        return cls(pairs[order],
+                   np.concatenate([c.points for c in contacts])[order],
+                   np.concatenate([c.normals for c in contacts])[order],
+                   np.concatenate([c.depths for c in contacts])[order])
+
+    def __len__(self) -> int:
+        """Return the number of contacts."""
+        return self.pairs.shape[0]
+
+    def __repr__(self) -> str:
+        """String representation of the Contacts, showing their count."""
+        return f"Contacts(Count: {len(self)})"
+
+def closest_points_between_segments(p1: np.ndarray, q1: np.ndarray, p2: np.ndarray, q2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the closest points between pairs of segments [p1, q1] and [p2, q2].
+
+    Degenerate segments (points) are supported, so spheres and capsules share this test.
+
+    :param p1: First endpoints of the first segments, shape (P, 3).
+    :param q1: Second endpoints of the first segments, shape (P, 3).
+    :param p2: First endpoints of the second segments, shape (P, 3).
+    :param q2: Second endpoints of the second segments, shape (P, 3).
+    :return: The closest points on the first and on the second segments, both of shape (P, 3).
+    """
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = np.einsum('pi,pi->p', d1, d1)
+    e = np.einsum('pi,pi->p', d2, d2)
+    f = np.einsum('pi,pi->p', d2, r)
+    c = np.einsum('pi,pi->p', d1, r)
+    b = np.einsum('pi,pi->p', d1, d2)
+    first_point = a <= _EPSILON
+    second_point = e <= _EPSILON
+    safe_a = np.where(first_point, 1.0, a)
+    safe_e = np.where(second_point, 1.0, e)
+    denominator = a * e - b * b
+
+    # General case, falling back to s = 0 for parallel segments
+    s = np.where(denominator > _EPSILON, np.clip((b * f - c * e) / np.where(denominator > _EPSILON, denominator, 1.0), 0.0, 1.0), 0.0)
+    t = (b * s + f) / safe_e
+    s = np.where(t < 0.0, np.clip(-c / safe_a, 0.0, 1.0), np.where(t > 1.0, np.clip((b - c) / safe_a, 0.0, 1.0), s))
+    t = np.clip(t, 0.0, 1.0)
+
+    # Degenerate segments
+    s = np.where(first_point, 0.0, np.where(second_point, np.clip(-c / safe_a, 0.0, 1.0), s))
+    t = np.where(first_point, np.where(second_point, 0.0, np.clip(f / safe_e, 0.0, 1.0)), np.where(second_point, 0.0, t))
+    return p1 + s[:, np.newaxis] * d1, p2 + t[:, np.newaxis] * d2
+
+class CollisionWorld:
+    def __init__(self, shapes: Sequence, exclude: Iterable[Tuple[int, int]] = ()) -> None:
+        """Initialize a collision world with one shape attached to each of K rigid bodies.
+
+        Broad phase uses sweep-and-prune along one axis. The sorted order is kept between updates,
+        so coherent motion re-sorts in nearly linear time and no O(K^2) pair tests are made.
+
+        :param shapes: One Sphere, Capsule or Box per body.
+        :param exclude: Pairs of body indices that never collide, e.g. adjacent links sharing a joint.
+        :raises TypeError: If a shape is not a Sphere, Capsule or Box.
+        """
+        n_shapes = len(shapes)
+        self.shapes = list(shapes)
+        self.kinds = np.empty(n_shapes, dtype=int)
+        self.radii = np.zeros(n_shapes)
+        self.local_segments = np.zeros((n_shapes, 2, 3))
+        self.half_extents = np.zeros((n_shapes, 3))
+        for index, shape in enumerate(self.shapes):
+            if isinstance(shape, Sphere):
+                self.kinds[index] = SPHERE
+                self.radii[index] = shape.radius
+            elif isinstance(shape, Capsule):
+                self.kinds[index] = CAPSULE
+                self.radii[index] = shape.radius
+                self.local_segments[index] = (shape.start, shape.end)
+            elif isinstance(shape, Box):
+                self.kinds[index] = BOX
+                self.half_extents[index] = shape.half_extents
+            else:
+                raise TypeError("Shapes must be Sphere, Capsule or Box instances.")
+        exclude = np.array([sorted(pair) for pair in exclude], dtype=int).reshape(-1, 2)
+        self._excluded_keys = np.sort(exclude[:, 0] * n_shapes + exclude[:, 1])
+
+        self.positions = np.zeros((n_shapes, 3))
+        self.rotation_matrices = np.tile(np.eye(3), (n_shapes, 1, 1))
+        self.segments = self.local_segments.copy()
+        self.aabb_min = np.zeros((n_shapes, 3))
+        self.aabb_max = np.zeros((n_shapes, 3))
+        self.axis: Optional[int] = None
+        self._order = np.arange(n_shapes)
+
+    def __len__(self) -> int:
+        """Return the number of shapes in the world."""
+        return self.kinds.shape[0]
+
+    @instrumented
+    def update(self, positions: np.ndarray, orientations: Optional[np.ndarray] = None) -> None:
+        """Move every shape to the pose of its rigid body and refresh the bounding boxes.
+
+        :param positions: Body positions, shape (K, 3).
+        :param orientations: Body orientations as quaternions (x, y, z, w), shape (K, 4). Defaults to identity.
+        """
+        self.positions = np.asarray(positions, dtype=float).reshape(len(self), 3)
+        if orientations is None:
+            self.rotation_matrices = np.tile(np.eye(3), (len(self), 1, 1))
+        else:
+            self.rotation_matrices = R.from_quat(np.asarray(orientations, dtype=float).reshape(len(self), 4)).as_matrix()
+        self.segments = np.einsum('kij,ksj->ksi', self.rotation_matrices, self.local_segments) + self.positions[:, np.newaxis]
+
+        radii = self.radii[:, np.newaxis]
+        self.aabb_min = self.segments.min(axis=1) - radii
+        self.aabb_max = self.segments.max(axis=1) + radii
+        boxes = self.kinds == BOX
+        if np.any(boxes):
+            extent = np.einsum('kij,kj->ki', np.abs(self.rotation_matrices[boxes]), self.half_extents[boxes])
+            self.aabb_min[boxes] = self.positions[boxes] - extent
+            self.aabb_max[boxes] = self.positions[boxes] + extent
+
+        if self.axis is None and len(self):
+            # Sweep along the axis on which the shapes are spread the most
+            self.axis = int(np.argmax(np.var(self.aabb_min + self.aabb_max, axis=0)))
+
+    def update_from_state(self, state) -> None:
+        """Move every shape to the pose of the corresponding body of a RigidBodyState.
+
+        :param state: RigidBodyState with one body per shape.
+        """
+        self.update(state.positions, state.orientations)
+
+    def update_from_rigid_bodies(self, bodies: Sequence[RigidBody]) -> None:
+        """Move every shape to the pose of the corresponding RigidBody.
+
+        :param bodies: One RigidBody per shape.
+        """
+        self.update(np.array([body.position for body in bodies], dtype=float),
+                    np.array([body.as_quaternion() for body in bodies], dtype=float))
+
+    @instrumented
+    def candidate_pairs(self) -> np.ndarray:
+        """Run the broad phase and return the pairs whose bounding boxes overlap.
+
+        :return: Pairs of shape indices (a, b) with a < b, shape (P, 2), sorted.
+        """
+        if len(self) < 2 or self.axis is None:
+            return np.zeros((0, 2), dtype=int)
+        # Stable sort of the previous order is nearly linear when the poses changed little
+        mins = self.aabb_min[:, self.axis]
+        self._order = self._order[np.argsort(mins[self._order], kind='stable')]
+        sorted_min = mins[self._order]
+        sorted_max = self.aabb_max[self._order, self.axis]
+
+        # Every interval overlaps the intervals that start before it ends
+        ends = np.searchsorted(sorted_min, sorted_max, side='right')
+        counts = np.maximum(ends - np.arange(len(self)) - 1, 0)
+        first = np.repeat(np.arange(len(self)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + offsets
+        a = self._order[first]
+        b = self._order[second]
+
+        overlap = np.all((self.aabb_min[a] <= self.aabb_max[b]) & (self.aabb_min[b] <= self.aabb_max[a]), axis=1)
+        pairs = np.sort(np.stack([a[overlap], b[overlap]], axis=1), axis=1)
+        if self._excluded_keys.size:
+            keys = pairs[:, 0] * len(self) + pairs[:, 1]
+            pairs = pairs[~np.isin(keys, self._excluded_keys)]
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    @instrumented
+    def contacts(self, pairs: Optional[np.ndarray] = None) -> Contacts:
+        """Run the narrow phase on candidate pairs and return the contacts.
+
+        :param pairs: Pairs to test, shape (P, 2). Defaults to the broad-phase candidate pairs.
+        :return: The Contacts between penetrating shapes.
+        """
+        if pairs is None:
+            pairs = self.candidate_pairs()
+        pairs = np.sort(np.asarray(pairs, dtype=int).reshape(-1, 2), axis=1)
+        is_box = self.kinds[pairs] == BOX
+        round_pairs = pairs[~is_box.any(axis=1)]
+        box_pairs = pairs[is_box.all(axis=1)]
+        mixed = is_box.any(axis=1) & ~is_box.all(axis=1)
+        return Contacts.concatenate([self._round_round(round_pairs),
+                                     self._round_box(pairs[mixed]),
+                                     self._box_box(box_pairs)])
+
+    def _round_round(self, pairs: np.ndarray) -> Contacts:
+        """Contacts between spheres and capsules, which are all swept spheres around a segment."""
+        a, b = pairs[:, 0], pairs[:, 1]
+        closest_a, closest_b = closest_points_between_segments(self.segments[a, 0], self.segments[a, 1],
+                                                               self.segments[b, 0], self.segments[b, 1])
+        offset = closest_b - closest_a
+        distance = np.linalg.norm(offset, axis=1)
+        depth = self.radii[a] + self.radii[b] - distance
+        hit = depth > 0
+        normals = np.where(distance[:, np.newaxis] > _EPSILON, offset / np.where(distance > _EPSILON, distance, 1.0)[:, np.newaxis],
+                           [0.0, 0.0, 1.0])
+        surface_a = closest_a + normals * self.radii[a][:, np.newaxis]
+        surface_b = closest_b - normals * self.radii[b][:, np.newaxis]
+        return Contacts(pairs[hit], (0.5 * (surface_a + surface_b))[hit], normals[hit], depth[hit])
+
+    def _round_box(self, pairs: np.ndarray) -> Contacts:
+        """Contacts between a sphere or capsule and a box, from the exact closest point of the segment core."""
+        box_first = self.kinds[pairs[:, 0]] == BOX
+        round_index = np.where(box_first, pairs[:, 1], pairs[:, 0])
+        box_index = np.where(box_first, pairs[:, 0], pairs[:, 1])
+        start = self.segments[round_index, 0]
+        direction = self.segments[round_index, 1] - start
+        length_squared = np.einsum('pi,pi->p', direction, direction)
+        safe_length_squared = np.where(length_squared > _EPSILON, length_squared, 1.0)
+        center = self.positions[box_index]
+        rotation = self.rotation_matrices[box_index]
+        half = self.half_extents[box_index]
+        radius = self.radii[round_index]
+
+        def to_box(point):
+            return np.einsum('pji,pj->pi', rotation, point - center)
+
+        # The squared distance to the box is a convex piecewise quadratic of the segment parameter,
+        # with knots where a local coordinate crosses a face plane. Minimize it on every piece.
+        local_start = to_box(start)
+        local_direction = np.einsum('pji,pj->pi', rotation, direction)
+        moving = np.abs(local_direction) > _EPSILON
+        safe_direction = np.where(moving, local_direction, 1.0)
+        crossings = np.concatenate([(half - local_start) / safe_direction, (-half - local_start) / safe_direction], axis=1)
+        crossings = np.where(np.tile(moving, 2), np.clip(crossings, 0.0, 1.0), 0.0)
+        knots = np.sort(np.concatenate([np.zeros((len(pairs), 1)), np.ones((len(pairs), 1)), crossings], axis=1), axis=1)
+        low, high = knots[:, :-1], knots[:, 1:]
+
+        middle = local_start[:, np.newaxis] + 0.5 * (low + high)[..., np.newaxis] * local_direction[:, np.newaxis]
+        bound = np.clip(middle, -half[:, np.newaxis], half[:, np.newaxis])
+        active = middle != bound
+        weights = np.where(active, local_direction[:, np.newaxis], 0.0)
+        numerator = np.einsum('pki,pki->pk', weights, bound - local_start[:, np.newaxis])
+        denominator = np.einsum('pki,pki->pk', weights, weights)
+        stationary = np.where(denominator > _EPSILON, numerator / np.where(denominator > _EPSILON, denominator, 1.0), low)
+
+        # The projection of the center comes first so that, for a core inside the box, it wins the tie
+        projection = np.clip(np.einsum('pi,pi->p', center - start, direction) / safe_length_squared, 0.0, 1.0)
+        candidates = np.concatenate([projection[:, np.newaxis], np.clip(stationary, low, high)], axis=1)
+        points = local_start[:, np.newaxis] + candidates[..., np.newaxis] * local_direction[:, np.newaxis]
+        gaps = points - np.clip(points, -half[:, np.newaxis], half[:, np.newaxis])
+        t = candidates[np.arange(len(pairs)), np.argmin(np.einsum('pki,pki->pk', gaps, gaps), axis=1)]
+        segment_point = start + t[:, np.newaxis] * direction
+        local = to_box(segment_point)
+        box_point = center + np.einsum('pij,pj->pi', rotation, np.clip(local, -half, half))
+
+        offset = box_point - segment_point
+        distance = np.linalg.norm(offset, axis=1)
+        outside = distance > _EPSILON
+        normals = offset / np.where(outside, distance, 1.0)[:, np.newaxis]
+        depth = radius - distance
+        points = 0.5 * (segment_point + normals * radius[:, np.newaxis] + box_point)
+
+        # Segment core inside the box: push out through the face of least penetration
+        if np.any(~outside):
+            inside = ~outside
+            penetration = half[inside] - np.abs(local[inside])
+            face = np.argmin(penetration, axis=1)
+            rows = np.arange(face.size)
+            local_normal = np.zeros((face.size, 3))
+            local_normal[rows, face] = -np.sign(local[inside][rows, face]) - (local[inside][rows, face] == 0)
+            normals[inside] = np.einsum('pij,pj->pi', rotation[inside], local_normal)
+            depth[inside] = radius[inside] + penetration[rows, face]
+            points[inside] = segment_point[inside]
+
+        # Normals point from the round shape to the box; flip them where the box is shape a
+        normals = np.where(box_first[:, np.newaxis], -normals, normals)
+        hit = depth > 0
+        return Contacts(pairs[hit], points[hit], normals[hit], depth[hit])
+
+    def _box_box(self, pairs: np.ndarray) -> Contacts:
+        """Contacts between boxes using the separating axis test over the 15 candidate axes."""
+        a, b = pairs[:, 0], pairs[:, 1]
+        axes_a = np.transpose(self.rotation_matrices[a], (0, 2, 1))  # rows are the box axes
+        axes_b = np.transpose(self.rotation_matrices[b], (0, 2, 1))
+        edge_axes = np.cross(axes_a[:, :, np.newaxis, :], axes_b[:, np.newaxis, :, :]).reshape(-1, 9, 3)
+        axes = np.concatenate([axes_a, axes_b, edge_axes], axis=1)
+        norms = np.linalg.norm(axes, axis=2)
+        valid = norms > 1e-9
+        axes = axes / np.where(valid, norms, 1.0)[..., np.newaxis]
+
+        offset = self.positions[b] - self.positions[a]
+        radius_a = np.einsum('pj,pkj->pk', self.half_extents[a], np.abs(np.einsum('pji,pki->pkj', axes_a, axes)))
+        radius_b = np.einsum('pj,pkj->pk', self.half_extents[b], np.abs(np.einsum('pji,pki->pkj', axes_b, axes)))
+        separation = np.einsum('pi,pki->pk', offset, axes)
+        overlap = np.where(valid, radius_a + radius_b - np.abs(separation), np.inf)
+
+        best = np.argmin(overlap, axis=1)
+        rows = np.arange(best.size)
+        depth = overlap[rows, best]
+        normals = axes[rows, best] * np.where(separation[rows, best] < 0, -1.0, 1.0)[:, np.newaxis]
+
+        # Single approximate contact point: the deepest corner of b, moved halfway out of a
+        signs = -np.sign(np.einsum('pji,pi->pj', axes_b, normals))
+        deepest_b = self.positions[b] + np.einsum('pji,pj->pi', axes_b, signs * self.half_extents[b])
+        points = deepest_b + 0.5 * depth[:, np.newaxis] * normals
+        hit = depth > 0
+        return Contacts(pairs[hit], points[hit], normals[hit], depth[hit])
+
+    def query(self) -> Contacts:
+        """Run the broad and narrow phases on the current poses.
+
+        :return: The Contacts between penetrating shapes.
+        """
+        return self.contacts(self.candidate_pairs())
+
+    def __repr__(self) -> str:
+        """String representation of the CollisionWorld, showing its number of shapes."""
+        return f"CollisionWorld(Shapes: {len(self)})"
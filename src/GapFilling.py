@@ -0,0 +1,192 @@
+import os
+import sys
+import numpy as np
+from typing import Dict, Optional, Sequence
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Trajectory import Trajectory
+from Registration import fit_rigid_transforms
+from Profiler import instrumented
+
+MISSING = -1
+OBSERVED = 0
+SPLINE = 1
+RIGID = 2
+PCA = 3
+
+class GapFiller:
+    def __init__(self, trajectory: Trajectory, clusters: Optional[Dict[str, Sequence[str]]] = None) -> None:
+        """Initialize a gap-filling engine working on a copy of a trajectory.
+
+        Every filled sample is tagged with the method that produced it in `source`
+        (OBSERVED, SPLINE, RIGID, PCA, or MISSING while it is still unfilled).
+
+        :param trajectory: The Trajectory with gaps.
+        :param clusters: Labels of the markers attached to the same rigid segment, keyed by segment name.
+        :raises ValueError: If a cluster refers to an unknown marker or has fewer than three markers.
+        """
+        self.trajectory = trajectory.copy()
+        self.source = np.where(trajectory.mask, OBSERVED, MISSING).astype(np.int8)
+        self.clusters: Dict[str, np.ndarray] = {}
+        for name, labels in (clusters or {}).items():
+            if len(labels) < 3:
+                raise ValueError(f"Cluster '{name}' needs at least three markers.")
+            try:
+                self.clusters[name] = np.array([trajectory.index(label) for label in labels], dtype=int)
+            except ValueError as error:
+                raise ValueError(f"Cluster '{name}' refers to an unknown marker.") from error
+
+    def _write(self, frames: np.ndarray, markers: np.ndarray, values: np.ndarray, method: int) -> int:
+        """Store estimates for missing samples only, returning how many were filled."""
+        keep = (self.source[frames, markers] == MISSING) & np.all(np.isfinite(values), axis=1)
+        self.trajectory.positions[frames[keep], markers[keep]] = values[keep]
+        self.source[frames[keep], markers[keep]] = method
+        return int(np.count_nonzero(keep))
+
+    @instrumented
+    def fill_spline(self, max_gap: int = 10) -> int:
+        """Fill short gaps with cubic Hermite splines through the samples bordering every gap.
+
+        The tangents at both ends come from the neighbouring samples, falling back to the chord
+        of the gap when they are not available. All gaps are interpolated together.
+
+        :param max_gap: Longest gap, in frames, filled with a spline.
+        :return: Number of filled samples.
+        """
+        positions = self.trajectory.positions
+        n_frames = self.trajectory.n_frames
+        gaps = self.trajectory.gaps(max_length=max_gap)
+        gaps = gaps.select((gaps.starts > 0) & (gaps.stops < n_frames))
+        if not len(gaps):
+            return 0
+        before, after = gaps.starts - 1, gaps.stops
+        p0, p1 = positions[before, gaps.markers], positions[after, gaps.markers]
+        span = (gaps.lengths + 1)[:, np.newaxis]
+        chord = (p1 - p0) / span
+        previous = positions[np.maximum(before - 1, 0), gaps.markers]
+        following = positions[np.minimum(after + 1, n_frames - 1), gaps.markers]
+        v0 = np.where((before > 0)[:, np.newaxis] & np.isfinite(previous), p0 - previous, chord)
+        v1 = np.where((after < n_frames - 1)[:, np.newaxis] & np.isfinite(following), following - p1, chord)
+
+        gap, markers, frames = gaps.frames()
+        u = ((frames - before[gap]) / span[gap, 0])[:, np.newaxis]
+        h00, h10 = 2 * u ** 3 - 3 * u ** 2 + 1, u ** 3 - 2 * u ** 2 + u
+        h01, h11 = -2 * u ** 3 + 3 * u ** 2, u ** 3 - u ** 2
+        values = h00 * p0[gap] + h10 * span[gap] * v0[gap] + h01 * p1[gap] + h11 * span[gap] * v1[gap]
+        return self._write(frames, markers, values, SPLINE)
+
+    @instrumented
+    def fill_rigid(self, min_visible: int = 3) -> int:
+        """Fill markers of rigid clusters from the pose of their visible neighbours.
+
+        The cluster shape is taken from the first frame where all its markers are visible. For
+        every frame and cluster with missing markers, the pose is solved from the visible markers
+        with one batched weighted Kabsch fit over all frames and clusters, and the missing markers
+        are placed with that rigid transformation.
+
+        :param min_visible: Number of visible cluster markers needed to solve the pose (at least 3).
+        :return: Number of filled samples.
+        """
+        if not self.clusters:
+            return 0
+        min_visible = max(3, min_visible)
+        mask = self.trajectory.mask
+        width = max(len(indices) for indices in self.clusters.values())
+        names = [name for name in self.clusters if np.any(np.all(mask[:, self.clusters[name]], axis=1))]
+        if not names:
+            return 0
+
+        # Pad the clusters to a common width, like the marker templates of RigidBodyTracker
+        indices = np.zeros((len(names), width), dtype=int)
+        valid = np.zeros((len(names), width), dtype=bool)
+        templates = np.zeros((len(names), width, 3))
+        for row, name in enumerate(names):
+            cluster = self.clusters[name]
+            reference = np.flatnonzero(np.all(mask[:, cluster], axis=1))[0]
+            indices[row, :len(cluster)] = cluster
+            valid[row, :len(cluster)] = True
+            templates[row, :len(cluster)] = self.trajectory.positions[reference, cluster]
+
+        visible = mask[:, indices] & valid  # (T, C, M)
+        counts = visible.sum(axis=2)
+        needed = (counts >= min_visible) & np.any(valid & ~visible, axis=2)
+        frames, rows = np.nonzero(needed)
+        if not frames.size:
+            return 0
+        observed = self.trajectory.positions[frames[:, np.newaxis], indices[rows]]
+        rotations, translations = fit_rigid_transforms(templates[rows], observed, visible[frames, rows].astype(float))
+        estimates = np.einsum('bij,bnj->bni', rotations, templates[rows]) + translations[:, np.newaxis]
+
+        fill = valid[rows] & ~visible[frames, rows]
+        batch, slot = np.nonzero(fill)
+        return self._write(frames[batch], indices[rows[batch], slot], estimates[batch, slot], RIGID)
+
+    @instrumented
+    def fill_pca(self, variance: float = 0.99, max_components: Optional[int] = None) -> int:
+        """Fill gaps from correlated markers with a principal component model of the whole marker set.
+
+        The model is learned from the complete frames. Every incomplete frame is projected onto the
+        components using its visible coordinates only, and the missing coordinates are read back
+        from that projection. Frames sharing the same missing markers are solved together.
+
+        :param variance: Fraction of the variance of the complete frames kept by the model.
+        :param max_components: Optional upper bound on the number of components.
+        :return: Number of filled samples.
+        """
+        mask = self.trajectory.mask
+        n_frames, n_markers = mask.shape
+        complete = np.all(mask, axis=1)
+        if complete.sum() < 2:
+            return 0
+        data = self.trajectory.positions.reshape(n_frames, 3 * n_markers)
+        mean = data[complete].mean(axis=0)
+        _, singular, components = np.linalg.svd(data[complete] - mean, full_matrices=False)
+        energy = np.cumsum(singular ** 2) / max(np.sum(singular ** 2), 1e-300)
+        n_components = int(np.searchsorted(energy, variance) + 1)
+        if max_components is not None:
+            n_components = min(n_components, max_components)
+        components = components[:n_components]
+
+        incomplete = np.flatnonzero(~complete & np.any(mask, axis=1))
+        patterns, inverse = np.unique(mask[incomplete], axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        filled = 0
+        for group, pattern in enumerate(patterns):
+            coordinates = np.repeat(pattern, 3)
+            if coordinates.sum() < n_components:
+                continue
+            frames = incomplete[inverse == group]
+            basis = components[:, coordinates].T
+            coefficients = np.linalg.lstsq(basis, (data[frames][:, coordinates] - mean[coordinates]).T, rcond=None)[0]
+            estimates = mean[~coordinates] + (components[:, ~coordinates].T @ coefficients).T
+            missing = np.flatnonzero(~pattern)
+            values = estimates.reshape(len(frames), len(missing), 3)
+            filled += self._write(np.repeat(frames, len(missing)), np.tile(missing, len(frames)), values.reshape(-1, 3), PCA)
+        return filled
+
+    def fill(self, max_spline_gap: int = 10, variance: float = 0.99) -> Trajectory:
+        """Run all methods: splines for short gaps, then rigid clusters, then the PCA model.
+
+        :param max_spline_gap: Longest gap, in frames, filled with a spline.
+        :param variance: Fraction of the variance kept by the PCA model.
+        :return: The filled Trajectory. Samples no method could fill remain NaN.
+        """
+        self.fill_spline(max_spline_gap)
+        self.fill_rigid()
+        self.fill_pca(variance)
+        return self.trajectory
+
+    def report(self) -> Dict[str, int]:
+        """Count the samples by origin.
+
+        :return: Dictionary with the number of observed, spline, rigid, PCA and still missing samples.
+        """
+        counts = np.bincount(self.source.ravel() + 1, minlength=5)
+        return {"missing": int(counts[0]), "observed": int(counts[1]), "spline": int(counts[2]),
+                "rigid": int(counts[3]), "pca": int(counts[4])}
+
+    def __repr__(self) -> str:
+        """String representation of the GapFiller, showing its clusters and missing samples."""
+        return f"GapFiller(Markers: {self.trajectory.n_markers}, Clusters: {len(self.clusters)}, Missing: {self.report()['missing']})"
@@ -0,0 +1,149 @@
+import os
+import sys
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from typing import Callable, Optional, Tuple
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from RigidBodyState import RigidBodyState
+from Profiler import instrumented
+
+GRAVITY = np.array([0.0, 0.0, -9.81])
+
+# A force function maps (state, time) to the global-frame forces and torques, each of shape (K, 3).
+ForceFunction = Callable[[RigidBodyState, float], Tuple[np.ndarray, np.ndarray]]
+
+def _loads(state: RigidBodyState, t: float, force_fn: Optional[ForceFunction]) -> Tuple[np.ndarray, np.ndarray]:
+    """Evaluate the external loads on all bodies, zero if there is no force function."""
+    if force_fn is None:
+        return np.zeros_like(state.positions), np.zeros_like(state.positions)
+    return force_fn(state, t)
+
+def _angular_acceleration(state: RigidBodyState, torques: np.ndarray) -> np.ndarray:
+    """Solve Euler's equations, including the gyroscopic term, and return the global angular acceleration."""
+    rotation_matrices = state.rotations().as_matrix()
+    omega_body = np.einsum('kji,kj->ki', rotation_matrices, state.angular_velocities)
+    torque_body = np.einsum('kji,kj->ki', rotation_matrices, torques)
+    angular_momentum = np.einsum('kij,kj->ki', state.inertia, omega_body)
+    alpha_body = np.einsum('kij,kj->ki', state.inverse_inertia, torque_body - np.cross(omega_body, angular_momentum))
+    return np.einsum('kij,kj->ki', rotation_matrices, alpha_body)
+
+def _quaternion_rate(orientations: np.ndarray, omega: np.ndarray) -> np.ndarray:
+    """Time derivative of (x, y, z, w) quaternions rotating with global-frame angular velocity omega."""
+    vector = orientations[:, :3]
+    scalar = orientations[:, 3:]
+    rate = np.empty_like(orientations)
+    rate[:, :3] = 0.5 * (scalar * omega + np.cross(omega, vector))
+    rate[:, 3] = -0.5 * np.einsum('ki,ki->k', omega, vector)
+    return rate
+
+def semi_implicit_euler_step(state: RigidBodyState, dt: float, t: float = 0.0,
+                             force_fn: Optional[ForceFunction] = None, gravity: np.ndarray = GRAVITY) -> None:
+    """Advance all bodies by one semi-implicit (symplectic) Euler step, in place.
+
+    Velocities are updated first and then used to move the poses. Orientations are advanced with
+    the exponential map, so the quaternions stay exactly normalized.
+
+    :param state: The RigidBodyState to advance.
+    :param dt: Time step in seconds.
+    :param t: Current simulation time passed to the force function.
+    :param force_fn: Optional function returning the global forces and torques on the bodies.
+    :param gravity: Gravitational acceleration vector. Default is -9.81 along Z.
+    """
+    forces, torques = _loads(state, t, force_fn)
+    state.linear_velocities += dt * (forces / state.masses[:, np.newaxis] + gravity)
+    state.angular_velocities += dt * _angular_acceleration(state, torques)
+    state.positions += dt * state.linear_velocities
+    state.orientations = (R.from_rotvec(dt * state.angular_velocities) * state.rotations()).as_quat()
+
+def rk4_step(state: RigidBodyState, dt: float, t: float = 0.0,
+             force_fn: Optional[ForceFunction] = None, gravity: np.ndarray = GRAVITY) -> None:
+    """Advance all bodies by one classical fourth-order Runge-Kutta step, in place.
+
+    The quaternions are integrated through their time derivative and renormalized at the end of the step.
+
+    :param state: The RigidBodyState to advance.
+    :param dt: Time step in seconds.
+    :param t: Current simulation time passed to the force function.
+    :param force_fn: Optional function returning the global forces and torques on the bodies.
+    :param gravity: Gravitational acceleration vector. Default is -9.81 along Z.
+    """
+    def derivative(stage: RigidBodyState, stage_time: float):
+        forces, torques = _loads(stage, stage_time, force_fn)
+        return (stage.linear_velocities.copy(),
+                _quaternion_rate(stage.orientations, stage.angular_velocities),
+                forces / stage.masses[:, np.newaxis] + gravity,
+                _angular_acceleration(stage, torques))
+
+    def offset(fraction: float, rates) -> RigidBodyState:
+        stage = state.copy()
+        stage.positions += fraction * rates[0]
+        stage.orientations += fraction * rates[1]
+        stage.orientations /= np.linalg.norm(stage.orientations, axis=1, keepdims=True)
+        stage.linear_velocities += fraction * rates[2]
+        stage.angular_velocities += fraction * rates[3]
+        return stage
+
+    k1 = derivative(state, t)
+    k2 = derivative(offset(0.5 * dt, k1), t + 0.5 * dt)
+    k3 = derivative(offset(0.5 * dt, k2), t + 0.5 * dt)
+    k4 = derivative(offset(dt, k3), t + dt)
+    increments = [dt / 6.0 * (a + 2.0 * b + 2.0 * c + d) for a, b, c, d in zip(k1, k2, k3, k4)]
+
+    state.positions += increments[0]
+    state.orientations += increments[1]
+    state.orientations /= np.linalg.norm(state.orientations, axis=1, keepdims=True)
+    state.linear_velocities += increments[2]
+    state.angular_velocities += increments[3]
+
+class FixedTimestepScheduler:
+    def __init__(self, dt: float, step: Callable = semi_implicit_euler_step,
+                 force_fn: Optional[ForceFunction] = None, max_substeps: int = 100) -> None:
+        """Initialize a scheduler that advances a simulation with a fixed time step.
+
+        Elapsed wall or frame time is accumulated and consumed in whole steps, so the
+        simulation stays deterministic regardless of how the time is fed in.
+
+        :param dt: Fixed time step in seconds.
+        :param step: Integrator step function, e.g. `semi_implicit_euler_step` or `rk4_step`.
+        :param force_fn: Optional function returning the global forces and torques on the bodies.
+        :param max_substeps: Maximum number of steps taken per call to `advance`; the rest of the time is dropped.
+        :raises ValueError: If dt or max_substeps is not positive.
+        """
+        if not dt > 0:
+            raise ValueError("dt must be positive.")
+        if max_substeps < 1:
+            raise ValueError("max_substeps must be at least 1.")
+        self.dt = float(dt)
+        self.step = step
+        self.force_fn = force_fn
+        self.max_substeps = max_substeps
+        self.time = 0.0
+        self.steps = 0
+        self.accumulator = 0.0
+
+    @instrumented
+    def advance(self, state: RigidBodyState, elapsed: float) -> int:
+        """Consume elapsed time by advancing the state in fixed steps.
+
+        :param state: The RigidBodyState to advance in place.
+        :param elapsed: Time elapsed since the previous call, in seconds.
+        :return: The number of steps taken.
+        """
+        self.accumulator += elapsed
+        n_steps = min(int(self.accumulator // self.dt), self.max_substeps)
+        for _ in range(n_steps):
+            self.step(state, self.dt, self.time, force_fn=self.force_fn)
+            self.time += self.dt
+        self.accumulator -= n_steps * self.dt
+        if self.accumulator >= self.dt:
+            # Fell behind by more than max_substeps; drop the backlog instead of spiralling
+            self.accumulator = 0.0
+        self.steps += n_steps
+        return n_steps
+
+    def alpha(self) -> float:
+        """Return the fraction of a step left in the accumulator, for interpolating poses between steps."""
+        return self.accumulator / self.dt
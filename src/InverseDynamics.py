@@ -0,0 +1,130 @@
+import os
+import sys
+import numpy as np
+from typing import List, Optional, Sequence, Tuple
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from MassModel import MassModel, time_derivative
+from Profiler import instrumented
+
+GRAVITY = np.array([0.0, 0.0, -9.81])
+
+class ExternalForce:
+    def __init__(self, link_label: str, force: np.ndarray, point: np.ndarray, moment: Optional[np.ndarray] = None) -> None:
+        """Initialize an external load, e.g. a force plate reading, acting on one link.
+
+        :param link_label: Label of the link the load acts on.
+        :param force: Force for every frame, shape (T, 3) or (3,).
+        :param point: Point of application for every frame, shape (T, 3) or (3,).
+        :param moment: Optional free moment for every frame, shape (T, 3) or (3,).
+        """
+        self.link_label = link_label
+        self.force = np.asarray(force, dtype=float)
+        self.point = np.asarray(point, dtype=float)
+        self.moment = np.zeros(3) if moment is None else np.asarray(moment, dtype=float)
+
+class InverseDynamics:
+    def __init__(self, mass_model: MassModel, parents: Sequence[int]) -> None:
+        """Initialize a recursive Newton-Euler inverse dynamics solver over a skeleton tree.
+
+        Joint loads are resolved at the first marker (proximal joint) of every link, from the
+        leaves of the tree towards the roots.
+
+        :param mass_model: MassModel of the skeleton, with a trajectory set.
+        :param parents: Parent link index of every link, -1 for roots, as returned by `Skeleton.get_parent_indices`.
+        :raises ValueError: If the parent indices do not describe a tree over the links.
+        """
+        self.mass_model = mass_model
+        self.parents = np.asarray(parents, dtype=int)
+        if self.parents.shape != (len(mass_model.link_labels),):
+            raise ValueError("There must be exactly one parent index per link.")
+        self.order = self._topological_order()
+
+    @classmethod
+    def from_skeleton(cls, skeleton, mass_model: MassModel) -> "InverseDynamics":
+        """Create a solver using the link tree of a skeleton.
+
+        :param skeleton: The Skeleton the mass model was built from.
+        :param mass_model: MassModel of the skeleton.
+        :return: A new InverseDynamics instance.
+        """
+        return cls(mass_model, skeleton.get_parent_indices())
+
+    def _topological_order(self) -> np.ndarray:
+        """Order the links so that every parent precedes its children."""
+        children: List[List[int]] = [[] for _ in self.parents]
+        roots = []
+        for index, parent in enumerate(self.parents):
+            if parent < 0:
+                roots.append(index)
+            else:
+                children[parent].append(index)
+        order = []
+        stack = list(reversed(roots))
+        while stack:
+            index = stack.pop()
+            order.append(index)
+            stack.extend(reversed(children[index]))
+        if len(order) != len(self.parents):
+            raise ValueError("Parent indices contain a cycle.")
+        return np.array(order, dtype=int)
+
+    def _accumulate_external(self, external_forces: Sequence[ExternalForce], n_frames: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Sum the external forces and their moments about the origin per link."""
+        n_links = len(self.parents)
+        forces = np.zeros((n_frames, n_links, 3))
+        moments = np.zeros((n_frames, n_links, 3))
+        for external in external_forces:
+            if external.link_label not in self.mass_model.link_labels:
+                raise ValueError(f"No link labelled '{external.link_label}' in the skeleton.")
+            index = self.mass_model.link_labels.index(external.link_label)
+            force = np.broadcast_to(external.force, (n_frames, 3))
+            point = np.broadcast_to(external.point, (n_frames, 3))
+            forces[:, index] += force
+            moments[:, index] += np.cross(point, force) + external.moment
+        return forces, moments
+
+    @instrumented
+    def solve(self, external_forces: Sequence[ExternalForce] = (), gravity: np.ndarray = GRAVITY) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute the force and moment every link receives at its proximal joint, for all frames.
+
+        The cost is linear in the number of links; every step is vectorized across frames.
+
+        :param external_forces: External loads acting on the links.
+        :param gravity: Gravitational acceleration vector. Default is -9.81 along Z.
+        :return: Joint forces and joint moments, both of shape (T, L, 3), in the global frame.
+        """
+        model = self.mass_model
+        com = model.segment_com()
+        acceleration = time_derivative(model.segment_com_velocity(), model.dt)
+        angular_momentum_rate = time_derivative(model.segment_angular_momentum(), model.dt)
+        proximal = model.proximal_positions()
+        masses = model.link_masses()
+        n_frames, n_links = com.shape[:2]
+
+        # Newton and Euler equations without the joint loads of the link itself
+        inertial_force = masses[:, np.newaxis] * (acceleration - np.asarray(gravity, dtype=float))
+        external_force, external_moment = self._accumulate_external(external_forces, n_frames)
+
+        # Loads transmitted by the children, with moments taken about the origin
+        child_force = np.zeros((n_frames, n_links, 3))
+        child_moment = np.zeros((n_frames, n_links, 3))
+
+        forces = np.empty((n_frames, n_links, 3))
+        moments = np.empty((n_frames, n_links, 3))
+        for index in self.order[::-1]:
+            force = inertial_force[:, index] - external_force[:, index] + child_force[:, index]
+            arm = proximal[:, index] - com[:, index]
+            moment = (angular_momentum_rate[:, index] - np.cross(arm, force)
+                      + child_moment[:, index] - np.cross(com[:, index], child_force[:, index])
+                      - external_moment[:, index] + np.cross(com[:, index], external_force[:, index]))
+            forces[:, index] = force
+            moments[:, index] = moment
+
+            parent = self.parents[index]
+            if parent >= 0:
+                child_force[:, parent] += force
+                child_moment[:, parent] += moment + np.cross(proximal[:, index], force)
+        return forces, moments
@@ -8,6 +8,7 @@ FILE_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(FILE_DIR)
 
 from Marker import Marker
+from Profiler import instrumented
 
 class Link:
     def __init__(self, marker1: Marker, marker2: Marker, label: Optional[str] = None) -> None:
@@ -27,6 +28,7 @@ class Link:
         # To be used for the skeleton class
         self.next_link: Optional['Link'] = None  # Reference to the next Link
 
+    @instrumented
     def length(self) -> float:
         """Calculate the Euclidean distance (length) between the two markers.
         
@@ -41,6 +43,14 @@ class Link:
         """
         return (self.marker1.get_position() + self.marker2.get_position()) / 2
 
+    def point_along(self, fraction: float) -> np.ndarray:
+        """Calculate the point located a given fraction of the way from marker1 to marker2.
+        
+        :param fraction: Fraction of the link length measured from marker1 (0.5 gives the midpoint).
+        :return: Numpy array representing the interpolated position.
+        """
+        return self.marker1.get_position() + fraction * self.vector()
+
     def vector(self) -> np.ndarray:
         """Calculate the vector from marker1 to marker2.
         
@@ -60,6 +70,7 @@ class Link:
         cross_product = np.cross(v1, v2)
         return np.linalg.norm(cross_product) < tolerance
 
+    @instrumented
     def angle_with(self, other: "Link") -> float:
         """Calculate the angle (in radians) between this link and another link.
         
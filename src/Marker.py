@@ -6,6 +6,11 @@ from scipy.spatial.transform import Rotation as R
 from typing import Optional
 import matplotlib.pyplot as plt
 
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Profiler import instrumented
+
 class Marker:
     def __init__(self, x: float, y: float, z: float, label: Optional[str] = None) -> None:
         """Initialize a Marker with position (x, y, z) and an optional label.
@@ -32,6 +37,7 @@ class Marker:
         """
         return self.position
 
+    @instrumented
     def set_position(self, x: float, y: float, z: float) -> None:
         """Set a new position for the marker.
         
@@ -41,6 +47,7 @@ class Marker:
         """
         self.position = np.array([x, y, z])
 
+    @instrumented
     def distance_to(self, other: "Marker") -> float:
         """Compute the Euclidean distance between this marker and another marker.
         
@@ -55,6 +62,7 @@ class Marker:
         
         return np.linalg.norm(self.position - other.position)
 
+    @instrumented
     def move_by(self, dx: float, dy: float, dz: float) -> None:
         """Move the marker by a given amount in the x, y, and z directions.
         
@@ -64,6 +72,7 @@ class Marker:
         """
         self.position += np.array([dx, dy, dz])
 
+    @instrumented
     def apply_transformation(self, transformation_matrix: np.ndarray) -> None:
         """Apply a 4x4 transformation matrix to the marker's position.
         
@@ -0,0 +1,255 @@
+import os
+import sys
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from SegmentInertia import SegmentInertia
+from Profiler import instrumented
+
+def time_derivative(values: np.ndarray, dt: float) -> np.ndarray:
+    """Differentiate an array along its first (time) axis with second-order finite differences.
+
+    :param values: Array whose first axis is time.
+    :param dt: Sampling interval in seconds.
+    :return: Array of the same shape holding the time derivative.
+    """
+    if values.shape[0] < 2:
+        return np.zeros_like(values)
+    return np.gradient(values, dt, axis=0, edge_order=2 if values.shape[0] > 2 else 1)
+
+class MassModel:
+    def __init__(self, skeleton, body_mass: float, segments: Optional[Dict[str, Union[str, SegmentInertia]]] = None) -> None:
+        """Initialize the mass properties of a skeleton.
+
+        Every link is treated as an axisymmetric segment whose longitudinal axis runs from
+        marker1 to marker2. Links without segment parameters are massless connectors.
+
+        :param skeleton: The Skeleton whose links are the body segments.
+        :param body_mass: Total body mass of the subject in kilograms.
+        :param segments: Mapping from link label to a SegmentInertia or a name in the anthropometric table.
+        :raises ValueError: If the body mass is not positive.
+        """
+        markers, proximal, distal = skeleton.get_link_indices()
+        self.marker_labels: List[Optional[str]] = [marker.label for marker in markers]
+        self.link_labels: List[Optional[str]] = [link.label for link in skeleton.links]
+        self.proximal = proximal
+        self.distal = distal
+
+        n_links = len(self.link_labels)
+        self.segments: List[Optional[SegmentInertia]] = [None] * n_links
+        self._mass_fraction = np.zeros(n_links)
+        self._com_fraction = np.full(n_links, 0.5)
+        self._radii = np.zeros((n_links, 2))  # transverse, longitudinal
+        self.body_mass = 0.0
+        self.set_body_mass(body_mass)
+
+        # Trajectory-dependent caches, filled by set_trajectory
+        self.dt = 1.0
+        self._proximal_positions: Optional[np.ndarray] = None
+        self._axis: Optional[np.ndarray] = None
+        self._lengths: Optional[np.ndarray] = None
+        self._angular_velocity: Optional[np.ndarray] = None
+        self._com: Optional[np.ndarray] = None
+        self._com_velocity: Optional[np.ndarray] = None
+        self._weighted_com: Optional[np.ndarray] = None
+        self._cached_mass_fraction = self._mass_fraction.copy()
+        self._dirty = set()
+
+        for label, segment in (segments or {}).items():
+            self.set_segment(label, segment)
+
+    def set_body_mass(self, body_mass: float) -> None:
+        """Set the total body mass of the subject.
+
+        Segment masses scale with the body mass, so positions of the centers of mass are not recomputed.
+
+        :param body_mass: Total body mass in kilograms.
+        :raises ValueError: If the body mass is not positive.
+        """
+        if not body_mass > 0:
+            raise ValueError("Body mass must be positive.")
+        self.body_mass = float(body_mass)
+
+    def set_segment(self, link_label: str, segment: Union[str, SegmentInertia]) -> None:
+        """Assign inertial parameters to the link with the given label.
+
+        Only the centers of mass of the affected link are recomputed on the next query.
+
+        :param link_label: Label of the link to update.
+        :param segment: A SegmentInertia or a name in the anthropometric table.
+        :raises ValueError: If no link has the given label.
+        """
+        if isinstance(segment, str):
+            segment = SegmentInertia.from_table(segment)
+        if link_label not in self.link_labels:
+            raise ValueError(f"No link labelled '{link_label}' in the skeleton.")
+        index = self.link_labels.index(link_label)
+        self.segments[index] = segment
+        self._mass_fraction[index] = segment.mass_fraction
+        self._com_fraction[index] = segment.com_fraction
+        self._radii[index] = (segment.transverse_radius(), segment.longitudinal_radius())
+        self._dirty.add(index)
+
+    @instrumented
+    def set_trajectory(self, positions: np.ndarray, dt: float = 1.0) -> None:
+        """Set the marker trajectory the mass properties are evaluated on.
+
+        :param positions: Marker positions of shape (T, N, 3), ordered as in `Skeleton.get_link_indices`.
+        :param dt: Sampling interval of the trajectory in seconds.
+        :raises ValueError: If the trajectory shape does not match the skeleton markers.
+        """
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim == 2:
+            positions = positions[np.newaxis]
+        if positions.ndim != 3 or positions.shape[1:] != (len(self.marker_labels), 3):
+            raise ValueError(f"Trajectory must have shape (T, {len(self.marker_labels)}, 3).")
+        if not dt > 0:
+            raise ValueError("dt must be positive.")
+        self.dt = float(dt)
+
+        self._proximal_positions = positions[:, self.proximal]
+        self._axis = positions[:, self.distal] - self._proximal_positions
+        self._lengths = np.linalg.norm(self._axis, axis=-1)
+
+        # The spin about the longitudinal axis is not observable from two markers,
+        # so the segment angular velocity is the rotation rate of its axis.
+        unit_axis = self._axis / np.where(self._lengths > 0, self._lengths, 1.0)[..., np.newaxis]
+        unit_axis_rate = time_derivative(unit_axis, self.dt)
+        self._angular_velocity = np.cross(unit_axis, unit_axis_rate)
+
+        self._com = None
+        self._com_velocity = None
+        self._weighted_com = None
+        self._dirty = set()
+
+    def _require_trajectory(self) -> None:
+        if self._axis is None:
+            raise RuntimeError("No trajectory set. Call set_trajectory first.")
+
+    def _update(self) -> None:
+        """Bring the cached centers of mass up to date, recomputing only links that changed."""
+        self._require_trajectory()
+        if self._com is None:
+            self._com = self._proximal_positions + self._com_fraction[:, np.newaxis] * self._axis
+            self._com_velocity = time_derivative(self._com, self.dt)
+            self._weighted_com = np.einsum('l,tlc->tc', self._mass_fraction, self._com)
+        elif self._dirty:
+            index = np.array(sorted(self._dirty), dtype=int)
+            self._weighted_com -= np.einsum('l,tlc->tc', self._cached_mass_fraction[index], self._com[:, index])
+            self._com[:, index] = self._proximal_positions[:, index] + self._com_fraction[index, np.newaxis] * self._axis[:, index]
+            self._com_velocity[:, index] = time_derivative(self._com[:, index], self.dt)
+            self._weighted_com += np.einsum('l,tlc->tc', self._mass_fraction[index], self._com[:, index])
+        self._cached_mass_fraction = self._mass_fraction.copy()
+        self._dirty = set()
+
+    def link_masses(self) -> np.ndarray:
+        """Return the mass of every link in kilograms.
+
+        :return: Numpy array of shape (L,).
+        """
+        return self._mass_fraction * self.body_mass
+
+    def total_mass(self) -> float:
+        """Return the sum of the segment masses in kilograms."""
+        return float(np.sum(self.link_masses()))
+
+    def segment_com(self) -> np.ndarray:
+        """Return the center of mass of every link for every frame.
+
+        :return: Numpy array of shape (T, L, 3).
+        """
+        self._update()
+        return self._com
+
+    def segment_com_velocity(self) -> np.ndarray:
+        """Return the linear velocity of the center of mass of every link for every frame.
+
+        :return: Numpy array of shape (T, L, 3).
+        """
+        self._update()
+        return self._com_velocity
+
+    def segment_angular_velocity(self) -> np.ndarray:
+        """Return the angular velocity of every link for every frame.
+
+        :return: Numpy array of shape (T, L, 3).
+        """
+        self._require_trajectory()
+        return self._angular_velocity
+
+    def proximal_positions(self) -> np.ndarray:
+        """Return the position of the first marker of every link for every frame.
+
+        :return: Numpy array of shape (T, L, 3).
+        """
+        self._require_trajectory()
+        return self._proximal_positions
+
+    def segment_lengths(self) -> np.ndarray:
+        """Return the length of every link for every frame.
+
+        :return: Numpy array of shape (T, L).
+        """
+        self._require_trajectory()
+        return self._lengths
+
+    @instrumented
+    def whole_body_com(self) -> np.ndarray:
+        """Return the whole-body center of mass for every frame.
+
+        :return: Numpy array of shape (T, 3).
+        :raises ValueError: If no link has mass.
+        """
+        self._update()
+        total_fraction = np.sum(self._mass_fraction)
+        if total_fraction <= 0:
+            raise ValueError("No segment parameters assigned; the skeleton has no mass.")
+        return self._weighted_com / total_fraction
+
+    @instrumented
+    def inertia_tensors(self) -> np.ndarray:
+        """Return the inertia tensor of every link about its center of mass, in the global frame.
+
+        :return: Numpy array of shape (T, L, 3, 3).
+        """
+        self._require_trajectory()
+        lengths = np.where(self._lengths > 0, self._lengths, 1.0)
+        unit_axis = self._axis / lengths[..., np.newaxis]
+        scale = self.link_masses() * lengths ** 2
+        transverse = (scale * self._radii[:, 0] ** 2)[..., np.newaxis, np.newaxis]
+        longitudinal = (scale * self._radii[:, 1] ** 2)[..., np.newaxis, np.newaxis]
+        axis_outer = unit_axis[..., :, np.newaxis] * unit_axis[..., np.newaxis, :]
+        return transverse * (np.eye(3) - axis_outer) + longitudinal * axis_outer
+
+    def segment_angular_momentum(self) -> np.ndarray:
+        """Return the angular momentum of every link about its own center of mass.
+
+        :return: Numpy array of shape (T, L, 3).
+        """
+        self._require_trajectory()
+        # The angular velocity is perpendicular to the segment axis, so only the transverse
+        # moment of inertia contributes.
+        transverse = self.link_masses() * (self._lengths * self._radii[:, 0]) ** 2
+        return transverse[..., np.newaxis] * self._angular_velocity
+
+    @instrumented
+    def angular_momentum(self) -> np.ndarray:
+        """Return the total angular momentum of the body about the whole-body center of mass.
+
+        :return: Numpy array of shape (T, 3).
+        """
+        com = self.whole_body_com()
+        masses = self.link_masses()
+        relative = self._com - com[:, np.newaxis, :]
+        transfer = np.einsum('l,tlc->tc', masses, np.cross(relative, self._com_velocity))
+        return transfer + np.sum(self.segment_angular_momentum(), axis=1)
+
+    def __repr__(self) -> str:
+        """String representation of the MassModel.
+
+        :return: String representation of the MassModel.
+        """
+        return f"MassModel(Body mass: {self.body_mass:.2f}, Segment mass: {self.total_mass():.2f}, Links: {len(self.link_labels)})"
@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import struct
+import zlib
+import numpy as np
+from typing import List, Optional
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Profiler import instrumented
+
+POSITIONS = "positions"
+QUATERNIONS = "quaternions"
+
+_MAGIC = b"PRBM"
+_VERSION = 1
+_WIDTHS = (np.uint8, np.uint16, np.uint32, np.uint64)
+_SQRT_HALF = np.sqrt(0.5)
+# Positions of the three stored components for every index of the largest one
+_SMALLEST_THREE = np.array([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]])
+
+def _forward_fill(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Replace missing samples of shape (t, K) by the last valid one along time, or zero before the first."""
+    index = np.where(mask, np.arange(mask.shape[0])[:, np.newaxis], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = np.take_along_axis(values, index, axis=0)
+    return np.where(mask[index, np.arange(mask.shape[1])], filled, 0.0)
+
+def _pack_integers(values: np.ndarray, order: int) -> bytes:
+    """Delta code integers of shape (t, K) along time, zigzag them and store them in the narrowest width."""
+    residuals = values.astype(np.int64)
+    for _ in range(order):
+        residuals = np.concatenate([residuals[:1], np.diff(residuals, axis=0)])
+    zigzag = ((residuals << 1) ^ (residuals >> 63)).view(np.uint64)
+    largest = int(zigzag.max(initial=0))
+    width = next(code for code, dtype in enumerate(_WIDTHS) if largest <= np.iinfo(dtype).max)
+    # Channel-major layout keeps every time series contiguous, which compresses much better
+    return bytes([width]) + np.ascontiguousarray(zigzag.T).astype(_WIDTHS[width]).tobytes()
+
+def _unpack_integers(buffer: bytes, n_frames: int, order: int) -> np.ndarray:
+    """Invert `_pack_integers`, returning integers of shape (t, K)."""
+    zigzag = np.frombuffer(buffer, dtype=_WIDTHS[buffer[0]], offset=1).astype(np.uint64)
+    zigzag = zigzag.reshape(-1, n_frames).T
+    values = ((zigzag >> np.uint64(1)) ^ (np.uint64(0) - (zigzag & np.uint64(1)))).view(np.int64)
+    for _ in range(order):
+        values = np.cumsum(values, axis=0)
+    return values
+
+def _pack_floats(values: np.ndarray) -> bytes:
+    """Store floats of shape (t, K) losslessly: XOR with the previous sample, then split into byte planes."""
+    bits = np.ascontiguousarray(values.T).view(np.uint64)
+    bits = np.concatenate([bits[:, :1], bits[:, 1:] ^ bits[:, :-1]], axis=1)
+    return np.ascontiguousarray(bits.view(np.uint8).reshape(-1, 8).T).tobytes()
+
+def _unpack_floats(buffer: bytes, n_frames: int) -> np.ndarray:
+    """Invert `_pack_floats`, returning floats of shape (t, K)."""
+    planes = np.frombuffer(buffer, dtype=np.uint8).reshape(8, -1)
+    bits = np.ascontiguousarray(planes.T).view(np.uint64).reshape(-1, n_frames)
+    bits = np.bitwise_xor.accumulate(bits, axis=1)
+    return bits.view(np.float64).T
+
+class EncodedMotion:
+    def __init__(self, kind: str, shape: tuple, parameters: dict, chunks: List[bytes]) -> None:
+        """Initialize a compressed trajectory made of independently decodable chunks of frames.
+
+        :param kind: Either POSITIONS for (T, N, 3) marker data or QUATERNIONS for (T, B, 4) orientation data.
+        :param shape: Shape of the original array.
+        :param parameters: Codec parameters needed for decoding.
+        :param chunks: Compressed chunks, each holding `chunk_frames` frames (the last one may hold fewer).
+        """
+        self.kind = kind
+        self.shape = tuple(int(size) for size in shape)
+        self.parameters = dict(parameters)
+        self.chunks = list(chunks)
+
+    @property
+    def n_frames(self) -> int:
+        """Return the number of frames."""
+        return self.shape[0]
+
+    @property
+    def chunk_frames(self) -> int:
+        """Return the number of frames per chunk."""
+        return self.parameters["chunk_frames"]
+
+    @property
+    def error_bound(self) -> float:
+        """Return the largest absolute error of a decoded value.
+
+        For quaternions this bounds the three stored components; the reconstructed largest
+        component stays within three times this value.
+        """
+        return self.parameters["error_bound"]
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the compressed chunks in bytes."""
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def compression_ratio(self) -> float:
+        """Return the size of the original float64 array divided by the compressed size."""
+        return 8 * int(np.prod(self.shape)) / max(self.nbytes, 1)
+
+    def _decode_chunk(self, chunk: bytes, n_frames: int) -> np.ndarray:
+        """Decode one chunk into an array of n_frames frames."""
+        buffer = zlib.decompress(chunk)
+        has_mask = buffer[0]
+        offset = 1
+        mask = None
+        if has_mask:
+            n_mask = (n_frames * self.shape[1] + 7) // 8
+            mask = np.unpackbits(np.frombuffer(buffer, dtype=np.uint8, count=n_mask, offset=offset))
+            mask = mask[:n_frames * self.shape[1]].reshape(n_frames, self.shape[1]).astype(bool)
+            offset += n_mask
+        payload = buffer[offset:]
+
+        if self.kind == POSITIONS:
+            step = self.parameters["step"]
+            if step:
+                values = _unpack_integers(payload, n_frames, self.parameters["order"]) * step
+            else:
+                values = _unpack_floats(payload, n_frames)
+            values = values.reshape(n_frames, self.shape[1], 3)
+        else:
+            n_index = n_frames * self.shape[1]
+            largest = np.frombuffer(payload, dtype=np.uint8, count=n_index).reshape(n_frames, self.shape[1]).astype(int)
+            levels = (1 << self.parameters["bits"]) - 1
+            stored = _unpack_integers(payload[n_index:], n_frames, self.parameters["order"]).reshape(n_frames, self.shape[1], 3)
+            stored = stored * (2.0 * _SQRT_HALF / levels) - _SQRT_HALF
+            values = np.empty((n_frames, self.shape[1], 4))
+            np.put_along_axis(values, _SMALLEST_THREE[largest], stored, axis=2)
+            remainder = np.sqrt(np.clip(1.0 - np.sum(stored ** 2, axis=2), 0.0, 1.0))
+            np.put_along_axis(values, largest[..., np.newaxis], remainder[..., np.newaxis], axis=2)
+        if mask is not None:
+            values[~mask] = np.nan
+        return values
+
+    @instrumented
+    def decode(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Decode a range of frames, decompressing only the chunks that overlap it.
+
+        :param start: First frame to decode.
+        :param stop: Frame after the last one to decode. Defaults to the end of the trajectory.
+        :return: The decoded frames, of shape (stop - start,) + shape[1:]. Missing samples are NaN.
+        """
+        start, stop, _ = slice(start, stop).indices(self.n_frames)
+        stop = max(start, stop)
+        output = np.empty((stop - start,) + self.shape[1:])
+        size = self.chunk_frames
+        for index in range(start // size, (stop + size - 1) // size):
+            first = index * size
+            n_frames = min(size, self.n_frames - first)
+            values = self._decode_chunk(self.chunks[index], n_frames)
+            low, high = max(start, first), min(stop, first + n_frames)
+            output[low - start:high - start] = values[low - first:high - first]
+        return output
+
+    def to_bytes(self) -> bytes:
+        """Serialize the encoded trajectory, keeping the chunk table for random access.
+
+        :return: The serialized bytes.
+        """
+        header = json.dumps({"kind": self.kind, "shape": self.shape, "parameters": self.parameters}).encode("utf-8")
+        table = np.array([len(chunk) for chunk in self.chunks], dtype="<u4").tobytes()
+        return b"".join([_MAGIC, struct.pack("<BII", _VERSION, len(header), len(self.chunks)), header, table] + self.chunks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EncodedMotion":
+        """Deserialize an encoded trajectory created with `to_bytes`.
+
+        :param data: The serialized bytes.
+        :return: A new EncodedMotion instance.
+        :raises ValueError: If the data is not an encoded trajectory of a supported version.
+        """
+        if data[:4] != _MAGIC:
+            raise ValueError("Data is not an encoded motion trajectory.")
+        version, header_length, n_chunks = struct.unpack_from("<BII", data, 4)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported motion codec version {version}.")
+        offset = 4 + struct.calcsize("<BII")
+        header = json.loads(data[offset:offset + header_length].decode("utf-8"))
+        offset += header_length
+        lengths = np.frombuffer(data, dtype="<u4", count=n_chunks, offset=offset)
+        offset += 4 * n_chunks
+        bounds = offset + np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+        chunks = [data[low:high] for low, high in zip(bounds[:-1], bounds[1:])]
+        return cls(header["kind"], tuple(header["shape"]), header["parameters"], chunks)
+
+    def __len__(self) -> int:
+        """Return the number of frames."""
+        return self.n_frames
+
+    def __repr__(self) -> str:
+        """String representation of the EncodedMotion, showing its shape and compression ratio."""
+        return f"EncodedMotion(Kind: {self.kind}, Shape: {self.shape}, Chunks: {len(self.chunks)}, Ratio: {self.compression_ratio():.1f})"
+
+class MotionCodec:
+    def __init__(self, max_error: Optional[float] = 0.0001, quaternion_bits: int = 14, order: int = 2,
+                 chunk_frames: int = 256, level: int = 6) -> None:
+        """Initialize a codec for marker trajectories and quaternion streams.
+
+        Positions are quantized on a uniform grid whose spacing is twice the error bound; quaternions
+        are packed as their three smallest components, quantized with a fixed number of bits. The
+        integers are then predicted from the previous frames (first or second order differences along
+        time), zigzag coded in the narrowest integer width and compressed with zlib. Every chunk of
+        frames starts from its own first frame, so any frame range can be decoded on its own.
+
+        :param max_error: Largest absolute position error. None or 0 stores positions losslessly.
+        :param quaternion_bits: Bits per stored quaternion component, between 2 and 30.
+        :param order: Order of the temporal prediction, 0 (none), 1 (delta) or 2 (constant velocity).
+        :param chunk_frames: Number of frames per independently decodable chunk.
+        :param level: zlib compression level.
+        :raises ValueError: If a parameter is out of range.
+        """
+        if max_error is not None and max_error < 0:
+            raise ValueError("The error bound must be non-negative.")
+        if not 2 <= quaternion_bits <= 30:
+            raise ValueError("Quaternion components need between 2 and 30 bits.")
+        if order not in (0, 1, 2):
+            raise ValueError("The prediction order must be 0, 1 or 2.")
+        if chunk_frames < 1:
+            raise ValueError("Chunks must hold at least one frame.")
+        self.max_error = max_error or 0.0
+        self.quaternion_bits = quaternion_bits
+        self.order = order
+        self.chunk_frames = chunk_frames
+        self.level = level
+
+    def _chunk(self, mask: np.ndarray, payload: bytes) -> bytes:
+        """Compress the validity mask and payload of one chunk."""
+        if mask.all():
+            return zlib.compress(b"\x00" + payload, self.level)
+        return zlib.compress(b"\x01" + np.packbits(mask).tobytes() + payload, self.level)
+
+    @instrumented
+    def encode_positions(self, trajectory: np.ndarray) -> EncodedMotion:
+        """Compress marker positions.
+
+        :param trajectory: Positions of shape (T, N, 3). Occluded markers are NaN and are restored as NaN.
+        :return: The EncodedMotion.
+        :raises ValueError: If the shape is wrong or a coordinate is too large for the error bound.
+        """
+        trajectory = np.asarray(trajectory, dtype=float)
+        if trajectory.ndim != 3 or trajectory.shape[2] != 3:
+            raise ValueError("Trajectory must have shape (T, N, 3).")
+        n_frames, n_markers = trajectory.shape[:2]
+        mask = np.all(np.isfinite(trajectory), axis=2)
+        step = 2.0 * self.max_error
+        chunks = []
+        for first in range(0, n_frames, self.chunk_frames):
+            values = trajectory[first:first + self.chunk_frames]
+            valid = mask[first:first + self.chunk_frames]
+            if step:
+                filled = _forward_fill(values.reshape(len(values), -1), np.repeat(valid, 3, axis=1))
+                scaled = np.rint(filled / step)
+                if np.any(np.abs(scaled) > 2.0 ** 52):
+                    raise ValueError("Coordinates are too large for the requested error bound.")
+                payload = _pack_integers(scaled.astype(np.int64), self.order)
+            else:
+                payload = _pack_floats(values.reshape(len(values), -1))
+            chunks.append(self._chunk(valid, payload))
+        parameters = {"chunk_frames": self.chunk_frames, "step": step, "order": self.order, "error_bound": self.max_error}
+        return EncodedMotion(POSITIONS, (n_frames, n_markers, 3), parameters, chunks)
+
+    @instrumented
+    def encode_quaternions(self, quaternions: np.ndarray) -> EncodedMotion:
+        """Compress orientations with smallest-three packing.
+
+        Quaternions are normalized and their sign is chosen so the largest component is positive,
+        so the decoded quaternions represent the same rotations but may have the opposite sign.
+
+        :param quaternions: Quaternions (x, y, z, w) of shape (T, B, 4). Non-finite entries are restored as NaN.
+        :return: The EncodedMotion.
+        :raises ValueError: If the shape is wrong.
+        """
+        quaternions = np.asarray(quaternions, dtype=float)
+        if quaternions.ndim != 3 or quaternions.shape[2] != 4:
+            raise ValueError("Quaternions must have shape (T, B, 4).")
+        n_frames, n_bodies = quaternions.shape[:2]
+        mask = np.all(np.isfinite(quaternions), axis=2)
+        norms = np.linalg.norm(np.where(mask[..., np.newaxis], quaternions, 0.0), axis=2)
+        mask &= norms > 0
+        unit = np.where(mask[..., np.newaxis], quaternions, [0.0, 0.0, 0.0, 1.0]) / np.where(mask, norms, 1.0)[..., np.newaxis]
+        levels = (1 << self.quaternion_bits) - 1
+        chunks = []
+        for first in range(0, n_frames, self.chunk_frames):
+            values = unit[first:first + self.chunk_frames]
+            largest = np.argmax(np.abs(values), axis=2)
+            sign = np.sign(np.take_along_axis(values, largest[..., np.newaxis], axis=2))
+            stored = np.take_along_axis(values * sign, _SMALLEST_THREE[largest], axis=2)
+            quantized = np.rint((np.clip(stored, -_SQRT_HALF, _SQRT_HALF) + _SQRT_HALF) * (levels / (2.0 * _SQRT_HALF)))
+            payload = largest.astype(np.uint8).tobytes() + _pack_integers(quantized.reshape(len(values), -1).astype(np.int64), self.order)
+            chunks.append(self._chunk(mask[first:first + self.chunk_frames], payload))
+        parameters = {"chunk_frames": self.chunk_frames, "bits": self.quaternion_bits, "order": self.order,
+                      "error_bound": _SQRT_HALF / levels}
+        return EncodedMotion(QUATERNIONS, (n_frames, n_bodies, 4), parameters, chunks)
+
+    def __repr__(self) -> str:
+        """String representation of the MotionCodec, showing its parameters."""
+        return f"MotionCodec(Max error: {self.max_error}, Quaternion bits: {self.quaternion_bits}, Order: {self.order})"
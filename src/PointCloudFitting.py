@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.spatial.transform import Rotation as R
+from typing import Dict, List, Optional, Sequence, Union
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from RigidBody import RigidBody
+from Skeleton import Skeleton
+from Registration import fit_rigid_transforms
+from Profiler import instrumented
+
+_EPSILON = 1e-12
+
+class FitIteration:
+    def __init__(self, index: int, elapsed: float, rms: float, correspondences: int, update: float) -> None:
+        """Initialize the record of one fitting iteration.
+
+        :param index: Iteration number, starting at zero.
+        :param elapsed: Time spent in the iteration, in seconds.
+        :param rms: Weighted RMS distance between the matched points and the capsule surfaces before the update,
+                    NaN when no point was matched.
+        :param correspondences: Number of accepted point-to-segment correspondences.
+        :param update: Largest displacement of a link endpoint caused by the update.
+        """
+        self.index = index
+        self.elapsed = elapsed
+        self.rms = rms
+        self.correspondences = correspondences
+        self.update = update
+
+    def __repr__(self) -> str:
+        """String representation of the FitIteration, showing its error and time."""
+        return f"FitIteration(Index: {self.index}, RMS: {self.rms:.4f}, Points: {self.correspondences}, Time: {self.elapsed * 1e3:.2f}ms)"
+
+class PointCloudFit:
+    def __init__(self, rotations: np.ndarray, translations: np.ndarray, endpoints: np.ndarray,
+                 marker_positions: np.ndarray, link_labels: Sequence[Optional[str]],
+                 iterations: List[FitIteration], converged: bool, n_points: int) -> None:
+        """Initialize the outcome of fitting a skeleton to a point cloud.
+
+        :param rotations: Rotation of every segment relative to its initial pose, shape (L, 3, 3).
+        :param translations: Translation of every segment relative to its initial pose, shape (L, 3).
+        :param endpoints: Fitted endpoints of every link, shape (L, 2, 3).
+        :param marker_positions: Fitted marker positions, averaged over the links sharing them, shape (N, 3).
+        :param link_labels: Labels of the links.
+        :param iterations: Record of every iteration.
+        :param converged: True if the endpoint updates fell below the tolerance while at least one segment was solved.
+        :param n_points: Number of cloud points used after subsampling.
+        """
+        self.rotations = rotations
+        self.translations = translations
+        self.endpoints = endpoints
+        self.marker_positions = marker_positions
+        self.link_labels = list(link_labels)
+        self.iterations = iterations
+        self.converged = converged
+        self.n_points = n_points
+
+    @property
+    def rms(self) -> float:
+        """Return the RMS distance of the last iteration, NaN if nothing was matched."""
+        return self.iterations[-1].rms if self.iterations else float("nan")
+
+    def rigid_bodies(self) -> Dict[Optional[str], RigidBody]:
+        """Return the pose of every segment as a RigidBody at its first endpoint.
+
+        The orientation is the rotation of the segment relative to its initial pose.
+
+        :return: Dictionary mapping link labels to RigidBody instances.
+        """
+        quaternions = R.from_matrix(self.rotations).as_quat().tolist()
+        return {label: RigidBody(*map(float, ends[0]), orientation=quaternion, is_quaternion=True, label=label)
+                for label, ends, quaternion in zip(self.link_labels, self.endpoints, quaternions)}
+
+    def apply_to(self, skeleton: Skeleton) -> None:
+        """Move the markers of the fitted skeleton to their fitted positions.
+
+        :param skeleton: The Skeleton the fit was computed for.
+        """
+        with skeleton.lock:
+            markers, _, _ = skeleton.get_link_indices()
+            for marker, position in zip(markers, self.marker_positions):
+                marker.set_position(*map(float, position))
+
+    def timing(self) -> Dict[str, float]:
+        """Report the cost of the fit.
+
+        :return: Dictionary with the number of iterations, the total, mean and maximum iteration time in seconds.
+        """
+        times = np.array([iteration.elapsed for iteration in self.iterations])
+        if not times.size:
+            return {"iterations": 0, "total": 0.0, "mean": 0.0, "max": 0.0}
+        return {"iterations": len(times), "total": float(times.sum()), "mean": float(times.mean()), "max": float(times.max())}
+
+    def __repr__(self) -> str:
+        """String representation of the PointCloudFit, showing its error and convergence."""
+        return f"PointCloudFit(Links: {len(self.link_labels)}, Iterations: {len(self.iterations)}, RMS: {self.rms:.4f}, Converged: {self.converged})"
+
+class PointCloudFitter:
+    def __init__(self, skeleton: Skeleton, radii: Union[float, Sequence[float], Dict[str, float]],
+                 max_iterations: int = 30, tolerance: float = 1e-4, max_distance: float = 0.05,
+                 huber_delta: float = 0.01, joint_weight: float = 0.5, min_correspondences: int = 6,
+                 voxel_size: Optional[float] = None, max_points: Optional[int] = None, seed: int = 0) -> None:
+        """Initialize an ICP fitter aligning the segments of a skeleton to point clouds.
+
+        Every link is modelled as a capsule. Each iteration matches the cloud points to the nearest
+        capsule surface, using a k-d tree over the cloud built once per fit to gather the candidates
+        of every segment, weights the matches with a Huber kernel, and updates all segment poses with
+        one batched weighted Kabsch fit. Shared markers are pulled back together through extra
+        correspondences towards their average position.
+
+        :param skeleton: Skeleton giving the initial pose of the links.
+        :param radii: Capsule radius, either one value, one per link, or a dict keyed by link label.
+        :param max_iterations: Maximum number of iterations.
+        :param tolerance: Endpoint displacement below which the fit is considered converged.
+        :param max_distance: Points farther than this from every capsule surface are ignored.
+        :param huber_delta: Distance above which the weight of a match decreases as delta / distance.
+        :param joint_weight: Weight of the joint constraints, relative to the data weight of the segment.
+        :param min_correspondences: Number of matches a segment needs to be updated.
+        :param voxel_size: If given, the cloud is first reduced to the mean point of every occupied voxel.
+        :param max_points: If given, at most this many cloud points are used, chosen at random.
+        :param seed: Seed of the random subsampling.
+        :raises ValueError: If the skeleton has no links or the radii do not match them.
+        """
+        markers, proximal, distal = skeleton.get_link_indices()
+        if not skeleton.links:
+            raise ValueError("The skeleton has no links to fit.")
+        self.link_labels = [link.label for link in skeleton.links]
+        self.proximal = proximal
+        self.distal = distal
+        self.n_markers = len(markers)
+        self.initial_positions = skeleton.get_marker_positions()
+        if isinstance(radii, dict):
+            radii = [radii[label] for label in self.link_labels]
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(self.link_labels),)).copy()
+        if np.any(self.radii < 0):
+            raise ValueError("Radii must be non-negative.")
+
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.max_distance = max_distance
+        self.huber_delta = huber_delta
+        self.joint_weight = joint_weight
+        self.min_correspondences = max(3, min_correspondences)
+        self.voxel_size = voxel_size
+        self.max_points = max_points
+        self.rng = np.random.default_rng(seed)
+
+    def subsample(self, cloud: np.ndarray) -> np.ndarray:
+        """Reduce a point cloud according to the voxel size and the maximum number of points.
+
+        :param cloud: Points of shape (M, 3). Non-finite points are dropped.
+        :return: The reduced cloud.
+        """
+        cloud = np.asarray(cloud, dtype=float).reshape(-1, 3)
+        cloud = cloud[np.all(np.isfinite(cloud), axis=1)]
+        if self.voxel_size:
+            _, inverse, counts = np.unique(np.floor(cloud / self.voxel_size).astype(np.int64), axis=0,
+                                           return_inverse=True, return_counts=True)
+            inverse = inverse.reshape(-1)
+            sums = np.zeros((counts.size, 3))
+            np.add.at(sums, inverse, cloud)
+            cloud = sums / counts[:, np.newaxis]
+        if self.max_points is not None and len(cloud) > self.max_points:
+            cloud = cloud[self.rng.choice(len(cloud), self.max_points, replace=False)]
+        return cloud
+
+    def _nodes(self, endpoints: np.ndarray) -> np.ndarray:
+        """Average the link endpoints into one position per marker."""
+        sums = np.zeros((self.n_markers, 3))
+        counts = np.zeros(self.n_markers)
+        np.add.at(sums, self.proximal, endpoints[:, 0])
+        np.add.at(sums, self.distal, endpoints[:, 1])
+        np.add.at(counts, self.proximal, 1.0)
+        np.add.at(counts, self.distal, 1.0)
+        return sums / counts[:, np.newaxis]
+
+    def _correspond(self, tree: cKDTree, cloud: np.ndarray, endpoints: np.ndarray):
+        """Match every cloud point near the skeleton to the closest capsule surface.
+
+        :return: Segment index, cloud point, closest surface point and distance of every accepted match.
+        """
+        start, end = endpoints[:, 0], endpoints[:, 1]
+        axis = end - start
+        reach = 0.5 * np.linalg.norm(axis, axis=1) + self.radii + self.max_distance
+        candidates = tree.query_ball_point(0.5 * (start + end), reach, return_sorted=False)
+        groups = [np.asarray(points, dtype=int) for points in candidates]
+        counts = np.array([group.size for group in groups], dtype=int)
+        segments = np.repeat(np.arange(len(counts)), counts)
+        points = np.concatenate(groups)
+
+        offset = cloud[points] - start[segments]
+        length_sq = np.maximum(np.einsum('ij,ij->i', axis, axis), _EPSILON)[segments]
+        along = np.clip(np.einsum('ij,ij->i', offset, axis[segments]) / length_sq, 0.0, 1.0)
+        radial = offset - along[:, np.newaxis] * axis[segments]
+        radial_norm = np.linalg.norm(radial, axis=1)
+        distances = np.abs(radial_norm - self.radii[segments])
+
+        # Keep the closest segment of every point
+        order = np.lexsort((distances, points))
+        first = np.ones(order.size, dtype=bool)
+        first[1:] = points[order][1:] != points[order][:-1]
+        keep = order[first]
+        keep = keep[distances[keep] <= self.max_distance]
+
+        direction = radial[keep] / np.maximum(radial_norm[keep], _EPSILON)[:, np.newaxis]
+        surface = cloud[points[keep]] - radial[keep] + self.radii[segments[keep], np.newaxis] * direction
+        return segments[keep], cloud[points[keep]], surface, distances[keep]
+
+    @instrumented
+    def fit(self, cloud: np.ndarray, initial_positions: Optional[np.ndarray] = None) -> PointCloudFit:
+        """Fit the segment poses to a point cloud.
+
+        :param cloud: Points of shape (M, 3).
+        :param initial_positions: Optional marker positions of shape (N, 3) to start from, e.g. the previous
+                                  frame's fit. Defaults to the skeleton pose.
+        :return: A PointCloudFit with the segment poses and the per-iteration report.
+        """
+        cloud = self.subsample(cloud)
+        positions = self.initial_positions if initial_positions is None else np.asarray(initial_positions, dtype=float)
+        endpoints = np.stack([positions[self.proximal], positions[self.distal]], axis=1)
+        n_links = len(self.link_labels)
+        rotations = np.tile(np.eye(3), (n_links, 1, 1))
+        translations = np.zeros((n_links, 3))
+        iterations: List[FitIteration] = []
+        converged = False
+        tree = cKDTree(cloud) if len(cloud) else None
+
+        for index in range(self.max_iterations if tree is not None else 0):
+            start_time = time.perf_counter()
+            segments, targets, sources, distances = self._correspond(tree, cloud, endpoints)
+            weights = np.where(distances <= self.huber_delta, 1.0, self.huber_delta / np.maximum(distances, _EPSILON))
+            total_weight = weights.sum()
+            rms = float(np.sqrt(np.sum(weights * distances ** 2) / total_weight)) if total_weight > 0 else float("nan")
+
+            # Pad the matches of every segment into one batch, followed by the two joint rows
+            counts = np.bincount(segments, minlength=n_links)
+            width = int(counts.max(initial=0)) + 2
+            order = np.argsort(segments, kind="stable")
+            rank = np.arange(order.size) - np.repeat(np.cumsum(counts) - counts, counts)
+            batch_sources = np.zeros((n_links, width, 3))
+            batch_targets = np.zeros((n_links, width, 3))
+            batch_weights = np.zeros((n_links, width))
+            batch_sources[segments[order], rank] = sources[order]
+            batch_targets[segments[order], rank] = targets[order]
+            batch_weights[segments[order], rank] = weights[order]
+            segment_weight = batch_weights.sum(axis=1)
+            batch_sources[:, -2:] = endpoints
+            batch_targets[:, -2:] = self._nodes(endpoints)[np.stack([self.proximal, self.distal], axis=1)]
+            batch_weights[:, -2:] = 0.5 * self.joint_weight * segment_weight[:, np.newaxis]
+
+            step_rotations, step_translations = fit_rigid_transforms(batch_sources, batch_targets, batch_weights)
+            solved = counts >= self.min_correspondences
+            step_rotations[~solved] = np.eye(3)
+            step_translations[~solved] = 0.0
+
+            updated = np.einsum('lij,lkj->lki', step_rotations, endpoints) + step_translations[:, np.newaxis]
+            update = float(np.max(np.linalg.norm(updated - endpoints, axis=-1)))
+            endpoints = updated
+            rotations = step_rotations @ rotations
+            translations = np.einsum('lij,lj->li', step_rotations, translations) + step_translations
+            iterations.append(FitIteration(index, time.perf_counter() - start_time, rms, int(segments.size), update))
+            if not solved.any():
+                # Nothing moved and nothing will: the cloud does not match the skeleton
+                break
+            if update < self.tolerance:
+                converged = True
+                break
+
+        return PointCloudFit(rotations, translations, endpoints, self._nodes(endpoints), self.link_labels,
+                             iterations, converged, len(cloud))
+
+    def __repr__(self) -> str:
+        """String representation of the PointCloudFitter, showing its links and iteration limit."""
+        return f"PointCloudFitter(Links: {len(self.link_labels)}, Max iterations: {self.max_iterations})"
@@ -0,0 +1,49 @@
+import numpy as np
+from typing import Optional, Tuple
+
+def fit_rigid_transforms(source: np.ndarray, target: np.ndarray, weights: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Fit the rigid transformations mapping batches of point sets onto each other (weighted Kabsch).
+
+    For every batch entry b, finds the rotation R and translation t minimizing
+    sum_i w_i |R source_i + t - target_i|^2. Points with zero weight are ignored, which is how
+    missing or padded points are handled. Entries without any weight get the identity.
+
+    :param source: Source points, shape (B, n, 3).
+    :param target: Target points, shape (B, n, 3). Points with zero weight may be NaN.
+    :param weights: Non-negative weights, shape (B, n). Defaults to one for every finite target point.
+    :return: Rotation matrices of shape (B, 3, 3) and translations of shape (B, 3).
+    """
+    source = np.asarray(source, dtype=float)
+    target = np.asarray(target, dtype=float)
+    if weights is None:
+        weights = np.all(np.isfinite(target), axis=-1).astype(float)
+    weights = np.where(np.all(np.isfinite(target), axis=-1), weights, 0.0)
+    target = np.where(weights[..., np.newaxis] > 0, target, 0.0)
+
+    total = weights.sum(axis=1)
+    safe_total = np.where(total > 0, total, 1.0)[:, np.newaxis]
+    source_center = np.einsum('bn,bni->bi', weights, source) / safe_total
+    target_center = np.einsum('bn,bni->bi', weights, target) / safe_total
+    covariance = np.einsum('bn,bni,bnj->bij', weights, source - source_center[:, np.newaxis], target - target_center[:, np.newaxis])
+
+    u, _, vt = np.linalg.svd(covariance)
+    # Flip the smallest singular direction when needed so the result is a proper rotation
+    v = np.transpose(vt, (0, 2, 1))
+    ut = np.transpose(u, (0, 2, 1))
+    sign = np.where(np.linalg.det(v @ ut) < 0, -1.0, 1.0)
+    v[:, :, 2] *= sign[:, np.newaxis]
+    rotations = v @ ut
+    rotations[total <= 0] = np.eye(3)
+
+    translations = target_center - np.einsum('bij,bj->bi', rotations, source_center)
+    return rotations, translations
+
+def transform_points(rotations: np.ndarray, translations: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Apply batches of rigid transformations to batches of points.
+
+    :param rotations: Rotation matrices, shape (B, 3, 3).
+    :param translations: Translations, shape (B, 3).
+    :param points: Points, shape (B, n, 3).
+    :return: Transformed points, shape (B, n, 3).
+    """
+    return np.einsum('bij,bnj->bni', rotations, points) + translations[:, np.newaxis, :]
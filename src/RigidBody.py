@@ -8,6 +8,7 @@ FILE_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(FILE_DIR)
 
 from Marker import Marker
+from Profiler import instrumented
 class RigidBody:
     def __init__(self, x: float, y: float, z: float, orientation=None, is_quaternion=False, label: str = None):
         """Initialize a RigidBody with position (x, y, z) and orientation.
@@ -51,6 +52,7 @@ class RigidBody:
         """
         return self.rotation.as_euler('xyz', degrees=degrees)
 
+    @instrumented
     def get_transformation_matrix(self):
         """Return the 4x4 transformation matrix that includes both the rotation and the translation.
 
@@ -69,6 +71,7 @@ class RigidBody:
         
         return transformation_matrix
 
+    @instrumented
     def get_inverse_transformation_matrix(self):
         """Return the inverse of the 4x4 transformation matrix. The inverse is calculated as following.
         
@@ -93,6 +96,7 @@ class RigidBody:
         
         return inverse_transformation_matrix
 
+    @instrumented
     def __mul__(self, other):
         """Multiply two RigidBody transformations.
 
@@ -128,6 +132,7 @@ class RigidBody:
         orientation_str = f"Orientation (quaternion): {self.as_quaternion()}"
         return f"RigidBody({label_str}, {position_str}, {orientation_str})"
     
+    @instrumented
     def update_position(self, x: float, y: float, z: float):
         """Update the position of the rigid body."""
         if isinstance(x, (float, int)) and isinstance(y, (float, int)) and isinstance(z, (float, int)):
@@ -135,6 +140,7 @@ class RigidBody:
         else:
             raise TypeError("Invalid input type for quaternion arguments")
     
+    @instrumented
     def update_orientation(self, orientation, is_quaternion=False):
         """Update the orientation of the rigid body."""
         for item in orientation:
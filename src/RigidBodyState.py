@@ -0,0 +1,113 @@
+import os
+import sys
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from typing import List, Optional, Sequence
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from RigidBody import RigidBody
+
+class RigidBodyState:
+    def __init__(self, positions: np.ndarray, orientations: Optional[np.ndarray] = None,
+                 linear_velocities: Optional[np.ndarray] = None, angular_velocities: Optional[np.ndarray] = None,
+                 masses=1.0, inertia=None) -> None:
+        """Initialize the dynamic state of K independent rigid bodies stored as arrays.
+
+        :param positions: Positions of the bodies, shape (K, 3).
+        :param orientations: Orientations as quaternions (x, y, z, w), shape (K, 4). Defaults to identity.
+        :param linear_velocities: Linear velocities in the global frame, shape (K, 3). Defaults to zero.
+        :param angular_velocities: Angular velocities in the global frame, shape (K, 3). Defaults to zero.
+        :param masses: Mass of every body, scalar or shape (K,). Default is 1.0.
+        :param inertia: Body-frame inertia, told apart by the number of dimensions: principal moments shared
+                        by all bodies, shape (3,); principal moments per body, shape (K, 3); or inertia
+                        tensors, shape (K, 3, 3). Defaults to the identity.
+        :raises ValueError: If the array shapes are inconsistent or a mass is not positive.
+        """
+        self.positions = np.array(positions, dtype=float).reshape(-1, 3)
+        n_bodies = self.positions.shape[0]
+        if orientations is None:
+            self.orientations = np.tile([0.0, 0.0, 0.0, 1.0], (n_bodies, 1))
+        else:
+            orientations = np.array(orientations, dtype=float).reshape(n_bodies, 4)
+            self.orientations = orientations / np.linalg.norm(orientations, axis=1, keepdims=True)
+        self.linear_velocities = np.zeros((n_bodies, 3)) if linear_velocities is None else np.array(linear_velocities, dtype=float).reshape(n_bodies, 3)
+        self.angular_velocities = np.zeros((n_bodies, 3)) if angular_velocities is None else np.array(angular_velocities, dtype=float).reshape(n_bodies, 3)
+
+        self.masses = np.broadcast_to(np.asarray(masses, dtype=float), (n_bodies,)).copy()
+        if np.any(self.masses <= 0):
+            raise ValueError("Masses must be positive.")
+
+        if inertia is None:
+            inertia = np.ones(3)
+        inertia = np.asarray(inertia, dtype=float)
+        # Decided by ndim alone: with K = 3, per-body moments and a single tensor have the same shape
+        if inertia.ndim == 1 and inertia.shape == (3,):
+            inertia = np.tile(np.diag(inertia), (n_bodies, 1, 1))
+        elif inertia.ndim == 2 and inertia.shape == (n_bodies, 3):
+            inertia = inertia[:, :, np.newaxis] * np.eye(3)
+        elif inertia.ndim != 3 or inertia.shape != (n_bodies, 3, 3):
+            raise ValueError(f"Inertia must have shape (3,), ({n_bodies}, 3) or ({n_bodies}, 3, 3).")
+        self.inertia = inertia.copy()
+        self.inverse_inertia = np.linalg.inv(self.inertia)
+
+    @classmethod
+    def from_rigid_bodies(cls, bodies: Sequence[RigidBody], masses=1.0, inertia=None) -> "RigidBodyState":
+        """Create a state from the poses of RigidBody instances, at rest.
+
+        :param bodies: RigidBody instances providing position and orientation.
+        :param masses: Mass of every body, scalar or shape (K,).
+        :param inertia: Body-frame inertia, see `__init__`.
+        :return: A new RigidBodyState instance.
+        """
+        positions = np.array([body.position for body in bodies], dtype=float)
+        orientations = np.array([body.as_quaternion() for body in bodies], dtype=float)
+        return cls(positions, orientations, masses=masses, inertia=inertia)
+
+    def to_rigid_bodies(self, labels: Optional[Sequence[str]] = None) -> List[RigidBody]:
+        """Convert the poses of the state into RigidBody instances.
+
+        :param labels: Optional labels for the bodies.
+        :return: A list of K RigidBody instances.
+        """
+        labels = labels if labels is not None else [None] * len(self)
+        return [RigidBody(*map(float, position), orientation=quaternion, is_quaternion=True, label=label)
+                for position, quaternion, label in zip(self.positions, self.orientations.tolist(), labels)]
+
+    def rotations(self) -> R:
+        """Return the orientations of all bodies as a single batched Rotation."""
+        return R.from_quat(self.orientations)
+
+    def world_inertia(self, inverse: bool = False) -> np.ndarray:
+        """Return the inertia tensors, or their inverses, expressed in the global frame.
+
+        :param inverse: If True, return the inverse inertia tensors.
+        :return: Numpy array of shape (K, 3, 3).
+        """
+        rotation_matrices = self.rotations().as_matrix()
+        body_tensor = self.inverse_inertia if inverse else self.inertia
+        return rotation_matrices @ body_tensor @ np.transpose(rotation_matrices, (0, 2, 1))
+
+    def copy(self) -> "RigidBodyState":
+        """Return a deep copy of the state."""
+        state = RigidBodyState.__new__(RigidBodyState)
+        state.positions = self.positions.copy()
+        state.orientations = self.orientations.copy()
+        state.linear_velocities = self.linear_velocities.copy()
+        state.angular_velocities = self.angular_velocities.copy()
+        state.masses = self.masses.copy()
+        state.inertia = self.inertia.copy()
+        state.inverse_inertia = self.inverse_inertia.copy()
+        return state
+
+    def __len__(self) -> int:
+        """Return the number of bodies in the state."""
+        return self.positions.shape[0]
+
+    def __repr__(self) -> str:
+        """String representation of the RigidBodyState.
+
+        :return: String representation of the state.
+        """
+        return f"RigidBodyState(Bodies: {len(self)}, Total mass: {np.sum(self.masses):.2f})"
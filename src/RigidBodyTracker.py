@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+from typing import Dict, List, Tuple, Union
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from RigidBody import RigidBody
+from Registration import fit_rigid_transforms
+from Profiler import instrumented
+
+def _rotation_exp(rotation_vectors: np.ndarray) -> np.ndarray:
+    """Convert rotation vectors of shape (B, 3) to rotation matrices with Rodrigues' formula."""
+    angle = np.linalg.norm(rotation_vectors, axis=1)
+    small = angle < 1e-12
+    axis = rotation_vectors / np.where(small, 1.0, angle)[:, np.newaxis]
+    skew = np.zeros((len(angle), 3, 3))
+    skew[:, 0, 1], skew[:, 0, 2], skew[:, 1, 2] = -axis[:, 2], axis[:, 1], -axis[:, 0]
+    skew -= np.transpose(skew, (0, 2, 1))
+    sin = np.sin(angle)[:, np.newaxis, np.newaxis]
+    cos = np.cos(angle)[:, np.newaxis, np.newaxis]
+    return np.eye(3) + sin * skew + (1.0 - cos) * (skew @ skew)
+
+def _rotation_log(rotations: np.ndarray) -> np.ndarray:
+    """Convert rotation matrices of shape (B, 3, 3) to rotation vectors, accurate for angles below pi."""
+    cos = np.clip((np.trace(rotations, axis1=1, axis2=2) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos)
+    skew = np.stack([rotations[:, 2, 1] - rotations[:, 1, 2],
+                     rotations[:, 0, 2] - rotations[:, 2, 0],
+                     rotations[:, 1, 0] - rotations[:, 0, 1]], axis=1)
+    sin = np.sin(angle)
+    scale = np.where(sin > 1e-9, angle / (2.0 * np.where(sin > 1e-9, sin, 1.0)), 0.5)
+    return scale[:, np.newaxis] * skew
+
+class TrackingFrame:
+    def __init__(self, positions: np.ndarray, rotations: np.ndarray, visible: np.ndarray,
+                 residuals: np.ndarray, low_confidence: np.ndarray, elapsed: float) -> None:
+        """Initialize the result of tracking one frame.
+
+        :param positions: Estimated body positions, shape (B, 3).
+        :param rotations: Estimated body orientations as rotation matrices, shape (B, 3, 3).
+        :param visible: Number of visible markers per body, shape (B,).
+        :param residuals: RMS distance between the fitted template and the visible markers, shape (B,).
+        :param low_confidence: True where the pose was predicted or poorly fitted, shape (B,).
+        :param elapsed: Time spent processing the frame, in seconds.
+        """
+        self.positions = positions
+        self.rotations = rotations
+        self.visible = visible
+        self.residuals = residuals
+        self.low_confidence = low_confidence
+        self.elapsed = elapsed
+
+    def orientations(self) -> np.ndarray:
+        """Return the estimated orientations as quaternions (x, y, z, w), shape (B, 4)."""
+        return R.from_matrix(self.rotations).as_quat()
+
+    def __repr__(self) -> str:
+        """String representation of the TrackingFrame, showing its bodies and timing."""
+        return f"TrackingFrame(Bodies: {len(self.positions)}, Low confidence: {int(np.sum(self.low_confidence))}, Time: {self.elapsed * 1e6:.1f}us)"
+
+class RigidBodyTracker:
+    def __init__(self, templates: Dict[str, np.ndarray], dt: float, min_markers: int = 3,
+                 max_residual: float = 0.005, timing_window: int = 1000) -> None:
+        """Initialize a tracker for marker clusters attached to rigid bodies.
+
+        Every frame, the pose of each body is predicted with a constant-velocity model and then
+        solved from the visible subset of its markers. All bodies are solved together with one
+        batched weighted Kabsch fit.
+
+        :param templates: Marker positions of every body in its own frame, keyed by body label, each of shape (n, 3).
+        :param dt: Sampling interval in seconds.
+        :param min_markers: Number of visible markers needed for a full pose fit (at least 3).
+        :param max_residual: RMS fit residual above which a frame is flagged as low confidence.
+        :param timing_window: Number of recent frames kept for the per-frame cost report.
+        :raises ValueError: If a template has fewer than three markers or min_markers is below 3.
+        """
+        if min_markers < 3:
+            raise ValueError("At least three markers are needed to solve a pose.")
+        self.labels: List[str] = list(templates)
+        self.marker_counts = np.array([len(templates[label]) for label in self.labels], dtype=int)
+        if np.any(self.marker_counts < 3):
+            raise ValueError("Every template needs at least three markers.")
+        n_bodies, n_markers = len(self.labels), int(self.marker_counts.max(initial=0))
+        self.templates = np.zeros((n_bodies, n_markers, 3))
+        self.template_mask = np.zeros((n_bodies, n_markers), dtype=bool)
+        for index, label in enumerate(self.labels):
+            self.templates[index, :self.marker_counts[index]] = np.asarray(templates[label], dtype=float)
+            self.template_mask[index, :self.marker_counts[index]] = True
+
+        self.dt = float(dt)
+        self.min_markers = min_markers
+        self.max_residual = max_residual
+        self.positions = np.zeros((n_bodies, 3))
+        self.rotations = np.tile(np.eye(3), (n_bodies, 1, 1))
+        self.linear_velocities = np.zeros((n_bodies, 3))
+        self.angular_velocities = np.zeros((n_bodies, 3))
+        self.initialized = np.zeros(n_bodies, dtype=bool)
+        self.timing_window = timing_window
+        self.frame_times: List[float] = []
+
+    def _stack(self, observations: Union[np.ndarray, Dict[str, np.ndarray]]) -> np.ndarray:
+        """Arrange the observations into a padded array of shape (B, M, 3), NaN where missing."""
+        if isinstance(observations, dict):
+            stacked = np.full(self.templates.shape, np.nan)
+            for index, label in enumerate(self.labels):
+                if label in observations:
+                    stacked[index, :self.marker_counts[index]] = observations[label]
+            return stacked
+        observations = np.asarray(observations, dtype=float)
+        if observations.shape != self.templates.shape:
+            raise ValueError(f"Observations must have shape {self.templates.shape}.")
+        return observations
+
+    def predict(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Predict the next pose of every body with the constant-velocity model.
+
+        :return: Predicted positions of shape (B, 3) and rotation matrices of shape (B, 3, 3).
+        """
+        positions = self.positions + self.dt * self.linear_velocities
+        rotations = _rotation_exp(self.dt * self.angular_velocities) @ self.rotations
+        return positions, rotations
+
+    @instrumented
+    def update(self, observations: Union[np.ndarray, Dict[str, np.ndarray]]) -> TrackingFrame:
+        """Process one frame of marker observations.
+
+        Bodies with at least `min_markers` visible markers get a full pose fit. With one or two
+        visible markers only the translation is corrected, keeping the predicted orientation; with
+        none the prediction is used as is. Both cases are flagged as low confidence.
+
+        :param observations: Marker positions per body, either a dict of (n, 3) arrays keyed by body label
+                             or an array of shape (B, M, 3) padded like the templates. Occluded markers are NaN.
+        :return: The TrackingFrame with the estimated poses.
+        """
+        start = time.perf_counter()
+        observed = self._stack(observations)
+        visible_mask = np.all(np.isfinite(observed), axis=-1) & self.template_mask
+        visible = visible_mask.sum(axis=1)
+        predicted_positions, predicted_rotations = self.predict()
+
+        # Full fit from the visible subset of markers
+        fitted_rotations, fitted_positions = fit_rigid_transforms(self.templates, observed, visible_mask.astype(float))
+        solved = visible >= self.min_markers
+
+        # Translation-only correction when too few markers are visible
+        partial = ~solved & (visible > 0) & self.initialized
+        predicted_markers = np.einsum('bij,bnj->bni', predicted_rotations, self.templates)
+        offsets = np.where(visible_mask[..., np.newaxis], observed - predicted_markers, 0.0)
+        partial_positions = offsets.sum(axis=1) / np.maximum(visible, 1)[:, np.newaxis]
+
+        rotations = np.where(solved[:, np.newaxis, np.newaxis], fitted_rotations, predicted_rotations)
+        positions = np.where(solved[:, np.newaxis], fitted_positions,
+                             np.where(partial[:, np.newaxis], partial_positions, predicted_positions))
+
+        fitted_markers = np.einsum('bij,bnj->bni', rotations, self.templates) + positions[:, np.newaxis]
+        errors = np.where(visible_mask, np.linalg.norm(np.where(visible_mask[..., np.newaxis], fitted_markers - observed, 0.0), axis=-1), 0.0)
+        residuals = np.sqrt((errors ** 2).sum(axis=1) / np.maximum(visible, 1))
+        low_confidence = ~solved | (residuals > self.max_residual)
+
+        # Velocities are only re-estimated from consecutive solved frames; otherwise the model coasts
+        measured = solved & self.initialized
+        self.linear_velocities[measured] = (positions[measured] - self.positions[measured]) / self.dt
+        delta = rotations[measured] @ np.transpose(self.rotations[measured], (0, 2, 1))
+        self.angular_velocities[measured] = _rotation_log(delta) / self.dt
+
+        tracked = solved | self.initialized
+        self.positions[tracked] = positions[tracked]
+        self.rotations[tracked] = rotations[tracked]
+        self.initialized |= solved
+
+        elapsed = time.perf_counter() - start
+        self.frame_times.append(elapsed)
+        if len(self.frame_times) > self.timing_window:
+            del self.frame_times[:-self.timing_window]
+        return TrackingFrame(self.positions.copy(), self.rotations.copy(), visible,
+                             residuals, low_confidence | ~self.initialized, elapsed)
+
+    def track(self, trajectory: np.ndarray) -> List[TrackingFrame]:
+        """Process a sequence of frames.
+
+        :param trajectory: Observations of shape (T, B, M, 3), padded like the templates.
+        :return: One TrackingFrame per frame.
+        """
+        return [self.update(frame) for frame in np.asarray(trajectory, dtype=float)]
+
+    def rigid_bodies(self) -> Dict[str, RigidBody]:
+        """Return the current pose estimate of every body as a RigidBody.
+
+        :return: Dictionary mapping body labels to RigidBody instances.
+        """
+        quaternions = R.from_matrix(self.rotations).as_quat().tolist()
+        return {label: RigidBody(*map(float, position), orientation=quaternion, is_quaternion=True, label=label)
+                for label, position, quaternion in zip(self.labels, self.positions, quaternions)}
+
+    def timing(self) -> Dict[str, float]:
+        """Report the per-frame processing cost over the recent frames.
+
+        :return: Dictionary with the number of frames, the mean, maximum and last frame time in seconds,
+                 and the sustainable frame rate in Hz.
+        """
+        if not self.frame_times:
+            return {"frames": 0, "mean": 0.0, "max": 0.0, "last": 0.0, "rate": 0.0}
+        times = np.array(self.frame_times)
+        return {"frames": len(times), "mean": float(times.mean()), "max": float(times.max()),
+                "last": float(times[-1]), "rate": float(1.0 / times.mean())}
+
+    def __repr__(self) -> str:
+        """String representation of the RigidBodyTracker, showing its bodies and how many are initialized."""
+        return f"RigidBodyTracker(Bodies: {len(self.labels)}, Initialized: {int(np.sum(self.initialized))})"
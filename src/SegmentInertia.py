@@ -0,0 +1,69 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Anthropometric segment parameters for adult males (de Leva, 1996).
+# Each entry is (mass fraction of body mass, center of mass location as a fraction of the
+# segment length measured from the proximal endpoint, radii of gyration about the
+# sagittal, frontal and longitudinal axes as fractions of the segment length).
+ANTHROPOMETRIC_TABLE: Dict[str, Tuple[float, float, Tuple[float, float, float]]] = {
+    "head": (0.0694, 0.5002, (0.303, 0.315, 0.261)),
+    "trunk": (0.4346, 0.5138, (0.328, 0.306, 0.169)),
+    "upper_arm": (0.0271, 0.5772, (0.285, 0.269, 0.158)),
+    "forearm": (0.0162, 0.4574, (0.276, 0.265, 0.121)),
+    "hand": (0.0061, 0.7900, (0.628, 0.513, 0.401)),
+    "thigh": (0.1416, 0.4095, (0.329, 0.329, 0.149)),
+    "shank": (0.0433, 0.4459, (0.255, 0.249, 0.103)),
+    "foot": (0.0137, 0.4415, (0.257, 0.245, 0.124)),
+}
+
+class SegmentInertia:
+    def __init__(self, mass_fraction: float, com_fraction: float, radii_of_gyration, label: Optional[str] = None) -> None:
+        """Initialize the inertial parameters of a body segment.
+
+        :param mass_fraction: Segment mass as a fraction of the total body mass.
+        :param com_fraction: Center of mass location as a fraction of the segment length, measured from the proximal marker.
+        :param radii_of_gyration: Radii of gyration (sagittal, frontal, longitudinal) as fractions of the segment length.
+        :param label: Optional label for the segment.
+        :raises ValueError: If a fraction is negative or the radii of gyration do not have three entries.
+        """
+        radii = np.asarray(radii_of_gyration, dtype=float)
+        if radii.shape != (3,):
+            raise ValueError("radii_of_gyration must contain three values.")
+        if mass_fraction < 0 or np.any(radii < 0):
+            raise ValueError("Mass fraction and radii of gyration must be non-negative.")
+        self.mass_fraction = float(mass_fraction)
+        self.com_fraction = float(com_fraction)
+        self.radii_of_gyration = radii
+        self.label = label
+
+    @classmethod
+    def from_table(cls, name: str) -> "SegmentInertia":
+        """Create the segment parameters from the anthropometric table.
+
+        :param name: Segment name, one of the keys of `ANTHROPOMETRIC_TABLE`.
+        :return: A new SegmentInertia instance.
+        :raises KeyError: If the segment name is not in the table.
+        """
+        if name not in ANTHROPOMETRIC_TABLE:
+            raise KeyError(f"Unknown segment '{name}'. Available segments: {sorted(ANTHROPOMETRIC_TABLE)}")
+        mass_fraction, com_fraction, radii = ANTHROPOMETRIC_TABLE[name]
+        return cls(mass_fraction, com_fraction, radii, label=name)
+
+    def transverse_radius(self) -> float:
+        """Return the transverse radius of gyration used by the axisymmetric segment model.
+
+        :return: Mean of the sagittal and frontal radii of gyration.
+        """
+        return float(np.mean(self.radii_of_gyration[:2]))
+
+    def longitudinal_radius(self) -> float:
+        """Return the radius of gyration about the longitudinal axis of the segment."""
+        return float(self.radii_of_gyration[2])
+
+    def __repr__(self) -> str:
+        """String representation of the SegmentInertia.
+
+        :return: String representation of the segment parameters.
+        """
+        label_str = f"Label: {self.label}" if self.label else "No Label"
+        return f"SegmentInertia({label_str}, Mass fraction: {self.mass_fraction:.4f}, COM fraction: {self.com_fraction:.4f})"
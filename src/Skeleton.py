@@ -1,6 +1,7 @@
 import os
 import sys
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -10,49 +11,83 @@ sys.path.append(FILE_DIR)
 from RigidBody import RigidBody
 from Link import Link
 from Marker import Marker
+from Profiler import instrumented
+from SkeletonSnapshot import SkeletonSnapshot
+
+def _parent_indices(proximal: Sequence[int], distal: Sequence[int]) -> np.ndarray:
+    """Find the first link ending at the first marker of every link, in linear time."""
+    ending_at: Dict[int, List[int]] = {}
+    for index, marker_index in enumerate(distal):
+        links = ending_at.setdefault(int(marker_index), [])
+        if len(links) < 2:
+            links.append(index)
+    parents = np.full(len(proximal), -1, dtype=int)
+    for index, marker_index in enumerate(proximal):
+        for candidate in ending_at.get(int(marker_index), ()):
+            if candidate != index:
+                parents[index] = candidate
+                break
+    return parents
 
 class Skeleton:
     def __init__(self, label: Optional[str] = None, rigid_body: Optional[RigidBody] = None) -> None:
         """Initialize a Skeleton with an optional label and root rigid body.
         
+        Skeleton, Link, Marker and RigidBody objects are mutable and not thread-safe. Writers must
+        hold `lock`; concurrent readers should work on a `snapshot` instead of the live objects.
+        
         :param label: Optional label or identifier for the skeleton.
         :param rigid_body: Optional RigidBody defining the root transformation of the skeleton.
         """
         self.links: List[Link] = []  # Use a list to store links
         self.rigid_body = rigid_body if rigid_body else RigidBody(0, 0, 0)  # Default to origin
         self.label = label
+        self.lock = threading.RLock()  # Guards in-place mutation of the links and their markers
+
+    def __getstate__(self) -> dict:
+        """Return the state for pickling and copying, without the lock, which cannot be pickled."""
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
 
+    def __setstate__(self, state: dict) -> None:
+        """Restore the state and give the copy its own lock."""
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    @instrumented
     def add_link(self, new_link: Link) -> None:
         """Add a new link to the skeleton, connecting it to the last link if they share a marker.
         
         :param new_link: The Link object to add to the skeleton.
         :raises ValueError: If the link cannot be connected in the skeleton.
         """
-        if not self.links:
-            # If there are no links, add the new link as the first link
-            self.links.append(new_link)
-            return
+        with self.lock:
+            if not self.links:
+                # If there are no links, add the new link as the first link
+                self.links.append(new_link)
+                return
         
-        # Check the last link for a connection
-        last_link = self.links[-1]
-        
-        # Try to connect the new link to the last link
-        if last_link.marker2 == new_link.marker1:
-            self.links.append(new_link)
-        elif last_link.marker2 == new_link.marker2:
-            new_link.marker1, new_link.marker2 = new_link.marker2, new_link.marker1
-            self.links.append(new_link)
-        else:
-            # Check existing links for a connection to the new link
-            for existing_link in self.links:
-                if existing_link.marker2 == new_link.marker1:
-                    self.links.append(new_link)
-                    return
-                elif existing_link.marker2 == new_link.marker2:
-                    new_link.marker1, new_link.marker2 = new_link.marker2, new_link.marker1
-                    self.links.append(new_link)
-                    return
-            raise ValueError("New link cannot connect to any existing link in the skeleton.")
+            # Check the last link for a connection
+            last_link = self.links[-1]
+        
+            # Try to connect the new link to the last link
+            if last_link.marker2 == new_link.marker1:
+                self.links.append(new_link)
+            elif last_link.marker2 == new_link.marker2:
+                new_link.marker1, new_link.marker2 = new_link.marker2, new_link.marker1
+                self.links.append(new_link)
+            else:
+                # Check existing links for a connection to the new link
+                for existing_link in self.links:
+                    if existing_link.marker2 == new_link.marker1:
+                        self.links.append(new_link)
+                        return
+                    elif existing_link.marker2 == new_link.marker2:
+                        new_link.marker1, new_link.marker2 = new_link.marker2, new_link.marker1
+                        self.links.append(new_link)
+                        return
+                raise ValueError("New link cannot connect to any existing link in the skeleton.")
 
     def is_continuous(self) -> bool:
         """Check if the skeleton forms a continuous chain of links.
@@ -64,12 +99,14 @@ class Skeleton:
                 return False
         return True
 
+    @instrumented
     def apply_rigid_body_transform(self) -> None:
         """Apply the RigidBody transformation to all markers in the skeleton."""
-        transformation_matrix = self.rigid_body.get_transformation_matrix()
-        for link in self.links:
-            link.marker1.apply_transformation(transformation_matrix)
-            link.marker2.apply_transformation(transformation_matrix)
+        with self.lock:
+            transformation_matrix = self.rigid_body.get_transformation_matrix()
+            for link in self.links:
+                link.marker1.apply_transformation(transformation_matrix)
+                link.marker2.apply_transformation(transformation_matrix)
 
     def plot(self, ax: plt.Axes) -> None:
         """Visualize the skeleton as a 3D plot, showing markers and links."""
@@ -81,6 +118,7 @@ class Skeleton:
         for link in self.links:
             link.plot(ax)
 
+    @instrumented
     def total_length(self) -> float:
         """Calculate the total length of all links in the skeleton.
         
@@ -97,6 +135,7 @@ class Skeleton:
         markers.update(link.marker2 for link in self.links)
         return list(markers)
 
+    @instrumented
     def link_angles(self) -> List[float]:
         """Calculate the angles between consecutive links in the skeleton.
         
@@ -116,6 +155,49 @@ class Skeleton:
         label_str = f"Label: {self.label}" if self.label else "No Label"
         return f"Skeleton({label_str}, Total Length: {self.total_length():.2f}, Links: {len(self.links)})"
 
+    @instrumented
+    def get_link_indices(self) -> Tuple[List[Marker], np.ndarray, np.ndarray]:
+        """Index the unique markers of the skeleton in order of first appearance along the links.
+        
+        :return: The ordered list of unique markers, and for each link the index of its first and second marker in that list.
+        """
+        markers: List[Marker] = []
+        indices = {}
+        for link in self.links:
+            for marker in (link.marker1, link.marker2):
+                if id(marker) not in indices:
+                    indices[id(marker)] = len(markers)
+                    markers.append(marker)
+        proximal = np.array([indices[id(link.marker1)] for link in self.links], dtype=int)
+        distal = np.array([indices[id(link.marker2)] for link in self.links], dtype=int)
+        return markers, proximal, distal
+
+    def get_parent_indices(self) -> np.ndarray:
+        """Find the parent of every link, i.e. the link whose second marker is this link's first marker.
+        
+        :return: Numpy array of shape (L,) with the index of the parent link, or -1 for root links.
+        """
+        _, proximal, distal = self.get_link_indices()
+        return _parent_indices(proximal, distal)
+
+    def get_marker_positions(self) -> np.ndarray:
+        """Stack the current positions of the indexed markers into a single array.
+        
+        :return: Numpy array of shape (N, 3), ordered as in `get_link_indices`.
+        """
+        with self.lock:
+            markers, _, _ = self.get_link_indices()
+            if not markers:
+                return np.zeros((0, 3))
+            return np.array([marker.get_position() for marker in markers], dtype=float)
+
+    def snapshot(self) -> "SkeletonSnapshot":
+        """Capture an immutable copy of the current pose, safe to share between threads.
+        
+        :return: A SkeletonSnapshot of the marker positions and the root transformation.
+        """
+        return SkeletonSnapshot.from_skeleton(self)
+
     def get_all_links(self) -> List[Link]:
         """Retrieve all links in the skeleton in sequence.
         
@@ -0,0 +1,252 @@
+import os
+import sys
+import shutil
+import subprocess
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Iterator, List, Optional
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.image import imsave
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Profiler import instrumented
+
+_AXIS_COLORS = ['r', 'g', 'b']
+
+def _render_range(animation: "SkeletonAnimation", directory: str, pattern: str, start: int, stop: int) -> List[str]:
+    """Render a range of frames to image files in a worker process."""
+    return animation.save_frames(directory, pattern, start, stop)
+
+class SkeletonAnimation:
+    def __init__(self, topology, trajectory: np.ndarray, body_transforms: Optional[np.ndarray] = None,
+                 width: int = 640, height: int = 480, dpi: int = 100, marker_color: str = 'r',
+                 line_color: str = 'k', marker_size: float = 20.0, axis_length: float = 0.2,
+                 show_labels: bool = False, elevation: float = 20.0, azimuth: float = -60.0) -> None:
+        """Initialize an offscreen renderer for a skeleton animation.
+
+        The figure and its artists are created once, on the first rendered frame: one scatter for
+        all markers, one Line3DCollection for all links and, when body transforms are given, one
+        Line3DCollection for the root axes. Each frame only updates their data before an Agg draw,
+        instead of creating new artists like `Skeleton.plot`. Axis limits are fixed from the whole
+        trajectory so the view does not jump between frames.
+
+        :param topology: A Skeleton, SkeletonSnapshot, SkeletonTemplate or SkeletonInstance giving the links.
+        :param trajectory: Marker positions of shape (T, N, 3), in the marker order of the topology. NaN markers are hidden.
+        :param body_transforms: Optional 4x4 transformations of the root rigid body, shape (T, 4, 4), drawn as axes.
+        :param width: Width of the frames in pixels.
+        :param height: Height of the frames in pixels.
+        :param dpi: Resolution of the figure.
+        :param marker_color: Color of the markers.
+        :param line_color: Color of the links.
+        :param marker_size: Size of the markers.
+        :param axis_length: Length of the drawn root axes.
+        :param show_labels: If True, the marker labels are drawn next to the markers.
+        :param elevation: Elevation angle of the camera in degrees.
+        :param azimuth: Azimuth angle of the camera in degrees.
+        :raises ValueError: If the trajectory or the transforms do not match the topology.
+        """
+        topology = topology.snapshot() if hasattr(topology, "snapshot") else topology
+        self.proximal = np.asarray(topology.proximal, dtype=int)
+        self.distal = np.asarray(topology.distal, dtype=int)
+        self.marker_labels = list(getattr(topology, "marker_labels", ()))
+        self.trajectory = np.asarray(trajectory, dtype=float)
+        n_markers = int(max(self.proximal.max(initial=-1), self.distal.max(initial=-1))) + 1
+        if self.trajectory.ndim != 3 or self.trajectory.shape[1:] != (n_markers, 3):
+            raise ValueError(f"Trajectory must have shape (T, {n_markers}, 3).")
+        self.body_transforms = None
+        if body_transforms is not None:
+            self.body_transforms = np.asarray(body_transforms, dtype=float)
+            if self.body_transforms.shape != (len(self.trajectory), 4, 4):
+                raise ValueError("There must be one 4x4 body transformation per frame.")
+
+        self.width = int(width)
+        self.height = int(height)
+        self.dpi = dpi
+        self.marker_color = marker_color
+        self.line_color = line_color
+        self.marker_size = marker_size
+        self.axis_length = axis_length
+        self.show_labels = show_labels
+        self.elevation = elevation
+        self.azimuth = azimuth
+        self._figure = None
+
+    def __getstate__(self) -> dict:
+        """Return the picklable state, without the figure, which worker processes rebuild lazily."""
+        state = self.__dict__.copy()
+        for name in ("_figure", "_canvas", "_axes", "_markers", "_links", "_axes_lines", "_labels"):
+            state.pop(name, None)
+        state["_figure"] = None
+        return state
+
+    def _limits(self) -> np.ndarray:
+        """Return cubic axis limits enclosing the whole trajectory, shape (3, 2)."""
+        points = self.trajectory.reshape(-1, 3)
+        if self.body_transforms is not None:
+            points = np.vstack([points, self.body_transforms[:, :3, 3]])
+        points = points[np.all(np.isfinite(points), axis=1)]
+        if not len(points):
+            return np.array([[-1.0, 1.0]] * 3)
+        low, high = points.min(axis=0), points.max(axis=0)
+        center = 0.5 * (low + high)
+        half = 0.5 * max(float(np.max(high - low)), 1e-6) + self.axis_length
+        return np.stack([center - half, center + half], axis=1)
+
+    def _setup(self) -> None:
+        """Create the figure, the canvas and every artist once."""
+        self._figure = Figure(figsize=(self.width / self.dpi, self.height / self.dpi), dpi=self.dpi)
+        self._canvas = FigureCanvasAgg(self._figure)
+        self._axes = self._figure.add_subplot(projection='3d')
+        limits = self._limits()
+        self._axes.set_xlim(*limits[0])
+        self._axes.set_ylim(*limits[1])
+        self._axes.set_zlim(*limits[2])
+        self._axes.set_box_aspect((1, 1, 1))
+        self._axes.view_init(elev=self.elevation, azim=self.azimuth)
+        self._axes.set_xlabel('X')
+        self._axes.set_ylabel('Y')
+        self._axes.set_zlabel('Z')
+
+        empty = np.zeros((len(self.proximal), 2, 3))
+        self._links = Line3DCollection(empty, colors=self.line_color)
+        self._axes.add_collection3d(self._links)
+        self._markers = self._axes.scatter([], [], [], color=self.marker_color, s=self.marker_size, depthshade=False)
+        self._axes_lines = None
+        if self.body_transforms is not None:
+            self._axes_lines = Line3DCollection(np.zeros((3, 2, 3)), colors=_AXIS_COLORS)
+            self._axes.add_collection3d(self._axes_lines)
+        self._labels = []
+        if self.show_labels:
+            self._labels = [self._axes.text(0.0, 0.0, 0.0, label or "", fontsize=8) for label in self.marker_labels]
+
+    def _update(self, index: int) -> None:
+        """Move the existing artists to the pose of one frame."""
+        positions = self.trajectory[index]
+        self._links.set_segments(np.stack([positions[self.proximal], positions[self.distal]], axis=1))
+        self._markers._offsets3d = (positions[:, 0], positions[:, 1], positions[:, 2])
+        if self._axes_lines is not None:
+            transform = self.body_transforms[index]
+            origin = transform[:3, 3]
+            ends = origin + self.axis_length * transform[:3, :3].T
+            self._axes_lines.set_segments(np.stack([np.broadcast_to(origin, (3, 3)), ends], axis=1))
+        for text, position in zip(self._labels, positions):
+            visible = bool(np.all(np.isfinite(position)))
+            text.set_visible(visible)
+            if visible:
+                text.set_position_3d(position)
+
+    def __len__(self) -> int:
+        """Return the number of frames."""
+        return len(self.trajectory)
+
+    @instrumented
+    def render_frame(self, index: int) -> np.ndarray:
+        """Render one frame offscreen.
+
+        :param index: Index of the frame.
+        :return: RGB image of shape (height, width, 3) with dtype uint8.
+        """
+        if self._figure is None:
+            self._setup()
+        self._update(index)
+        self._canvas.draw()
+        return np.asarray(self._canvas.buffer_rgba())[..., :3].copy()
+
+    def frames(self, start: int = 0, stop: Optional[int] = None, step: int = 1) -> Iterator[np.ndarray]:
+        """Render a range of frames one after the other.
+
+        :param start: First frame.
+        :param stop: Frame after the last one. Defaults to the end of the animation.
+        :param step: Frame step.
+        :return: Iterator over RGB images of shape (height, width, 3).
+        """
+        for index in range(*slice(start, stop, step).indices(len(self))):
+            yield self.render_frame(index)
+
+    def save_frames(self, directory: str, pattern: str = "frame_{:05d}.png", start: int = 0,
+                    stop: Optional[int] = None) -> List[str]:
+        """Render a range of frames to image files.
+
+        :param directory: Output directory, created if needed.
+        :param pattern: File name pattern formatted with the frame index; its extension selects the format.
+        :param start: First frame.
+        :param stop: Frame after the last one. Defaults to the end of the animation.
+        :return: Paths of the written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for index in range(*slice(start, stop).indices(len(self))):
+            path = os.path.join(directory, pattern.format(index))
+            imsave(path, self.render_frame(index))
+            paths.append(path)
+        return paths
+
+    def save_frames_parallel(self, directory: str, pattern: str = "frame_{:05d}.png",
+                             processes: Optional[int] = None) -> List[str]:
+        """Render all frames to image files, splitting contiguous ranges of frames across processes.
+
+        Every process builds its own figure, so frames are rendered independently and written
+        under the same names as with `save_frames`.
+
+        :param directory: Output directory, created if needed.
+        :param pattern: File name pattern formatted with the frame index.
+        :param processes: Number of worker processes. Defaults to the number of CPUs.
+        :return: Paths of the written files, in frame order.
+        """
+        processes = max(1, min(processes or os.cpu_count() or 1, len(self)))
+        bounds = np.linspace(0, len(self), processes + 1).astype(int)
+        os.makedirs(directory, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_render_range, self, directory, pattern, int(start), int(stop))
+                       for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+            return [path for future in futures for path in future.result()]
+
+    def write_raw(self, stream: BinaryIO, start: int = 0, stop: Optional[int] = None) -> int:
+        """Stream frames as raw RGB24 bytes, e.g. into a video encoder pipe.
+
+        :param stream: Binary file-like object.
+        :param start: First frame.
+        :param stop: Frame after the last one. Defaults to the end of the animation.
+        :return: Number of frames written.
+        """
+        count = 0
+        for frame in self.frames(start, stop):
+            stream.write(frame.tobytes())
+            count += 1
+        return count
+
+    def write_video(self, path: str, fps: float = 30.0, codec: str = "libx264", ffmpeg: str = "ffmpeg") -> None:
+        """Encode all frames into a video file by piping raw frames to ffmpeg.
+
+        :param path: Output video file.
+        :param fps: Frame rate of the video.
+        :param codec: ffmpeg video codec.
+        :param ffmpeg: Name or path of the ffmpeg executable.
+        :raises RuntimeError: If ffmpeg is not available or fails.
+        """
+        executable = shutil.which(ffmpeg)
+        if executable is None:
+            raise RuntimeError(f"'{ffmpeg}' was not found; use save_frames or write_raw instead.")
+        command = [executable, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                   "-s", f"{self.width}x{self.height}", "-r", str(fps), "-i", "-",
+                   "-c:v", codec, "-pix_fmt", "yuv420p", path]
+        process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            self.write_raw(process.stdin)
+        finally:
+            process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {process.returncode}.")
+
+    def close(self) -> None:
+        """Release the figure. It is rebuilt if more frames are rendered."""
+        self._figure = None
+
+    def __repr__(self) -> str:
+        """String representation of the SkeletonAnimation, showing its frames and size."""
+        return f"SkeletonAnimation(Frames: {len(self)}, Links: {len(self.proximal)}, Size: {self.width}x{self.height})"
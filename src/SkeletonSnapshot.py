@@ -0,0 +1,78 @@
+import numpy as np
+from typing import Optional, Sequence
+
+def _read_only(values) -> np.ndarray:
+    """Return a copy of the values that cannot be modified in place."""
+    array = np.array(values)
+    array.flags.writeable = False
+    return array
+
+class SkeletonSnapshot:
+    def __init__(self, positions: np.ndarray, proximal: np.ndarray, distal: np.ndarray,
+                 marker_labels: Sequence[Optional[str]] = (), link_labels: Sequence[Optional[str]] = (),
+                 transformation_matrix: Optional[np.ndarray] = None, label: Optional[str] = None) -> None:
+        """Initialize an immutable pose of a skeleton.
+
+        All arrays are copied and made read-only, so a snapshot can be shared between threads
+        without locking while the live Skeleton keeps being updated.
+
+        :param positions: Marker positions, shape (N, 3).
+        :param proximal: Index of the first marker of every link, shape (L,).
+        :param distal: Index of the second marker of every link, shape (L,).
+        :param marker_labels: Labels of the markers.
+        :param link_labels: Labels of the links.
+        :param transformation_matrix: 4x4 root transformation of the skeleton. Defaults to identity.
+        :param label: Optional label of the skeleton.
+        """
+        object.__setattr__(self, "positions", _read_only(np.asarray(positions, dtype=float).reshape(-1, 3)))
+        object.__setattr__(self, "proximal", _read_only(np.asarray(proximal, dtype=int)))
+        object.__setattr__(self, "distal", _read_only(np.asarray(distal, dtype=int)))
+        object.__setattr__(self, "marker_labels", tuple(marker_labels))
+        object.__setattr__(self, "link_labels", tuple(link_labels))
+        object.__setattr__(self, "transformation_matrix", _read_only(np.eye(4) if transformation_matrix is None else transformation_matrix))
+        object.__setattr__(self, "label", label)
+
+    @classmethod
+    def from_skeleton(cls, skeleton) -> "SkeletonSnapshot":
+        """Capture the current pose of a Skeleton while holding its lock.
+
+        :param skeleton: The Skeleton to capture.
+        :return: A new SkeletonSnapshot instance.
+        """
+        with skeleton.lock:
+            markers, proximal, distal = skeleton.get_link_indices()
+            return cls(skeleton.get_marker_positions(), proximal, distal,
+                       marker_labels=[marker.label for marker in markers],
+                       link_labels=[link.label for link in skeleton.links],
+                       transformation_matrix=skeleton.rigid_body.get_transformation_matrix(),
+                       label=skeleton.label)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("SkeletonSnapshot is immutable.")
+
+    def link_vectors(self) -> np.ndarray:
+        """Return the vector from the first to the second marker of every link, shape (L, 3)."""
+        return self.positions[self.distal] - self.positions[self.proximal]
+
+    def link_lengths(self) -> np.ndarray:
+        """Return the length of every link, shape (L,)."""
+        return np.linalg.norm(self.link_vectors(), axis=1)
+
+    def transformed(self, transformation_matrix: Optional[np.ndarray] = None) -> "SkeletonSnapshot":
+        """Return a new snapshot with the markers moved by a transformation.
+
+        :param transformation_matrix: 4x4 transformation to apply. Defaults to the root transformation of the snapshot.
+        :return: A new SkeletonSnapshot with the transformed positions.
+        :raises ValueError: If the transformation matrix is not 4x4.
+        """
+        matrix = self.transformation_matrix if transformation_matrix is None else np.asarray(transformation_matrix, dtype=float)
+        if matrix.shape != (4, 4):
+            raise ValueError("Transformation matrix must be a 4x4 matrix.")
+        positions = self.positions @ matrix[:3, :3].T + matrix[:3, 3]
+        return SkeletonSnapshot(positions, self.proximal, self.distal, self.marker_labels, self.link_labels,
+                                self.transformation_matrix, self.label)
+
+    def __repr__(self) -> str:
+        """String representation of the SkeletonSnapshot, showing its label and size."""
+        label_str = f"Label: {self.label}" if self.label else "No Label"
+        return f"SkeletonSnapshot({label_str}, Markers: {len(self.positions)}, Links: {len(self.proximal)})"
@@ -0,0 +1,243 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Marker import Marker
+from Link import Link
+from RigidBody import RigidBody
+from Skeleton import Skeleton, _parent_indices
+from SkeletonSnapshot import SkeletonSnapshot
+
+try:
+    import yaml
+except ImportError:  # YAML definitions are optional
+    yaml = None
+
+# Compiled templates keyed by the hash of their definition
+_template_cache: Dict[str, "SkeletonTemplate"] = {}
+
+def _read_only(values, dtype) -> np.ndarray:
+    array = np.array(values, dtype=dtype)
+    array.flags.writeable = False
+    return array
+
+class SkeletonTemplate:
+    def __init__(self, definition: dict) -> None:
+        """Compile a skeleton definition into an immutable topology with index arrays.
+
+        The definition is a dictionary with an optional "label", a list of "markers", each with a
+        "label" and a rest "position", and a list of "links", each with an optional "label" and the
+        two marker labels in "markers". Links are validated once, following the same connection
+        rules as `Skeleton.add_link`. Use `from_definition` to get cached templates.
+
+        :param definition: The skeleton definition.
+        :raises ValueError: If the definition is malformed or a link cannot be connected.
+        """
+        try:
+            rest = {entry["label"]: np.asarray(entry["position"], dtype=float) for entry in definition["markers"]}
+            links = [(entry["markers"][0], entry["markers"][1], entry.get("label")) for entry in definition["links"]]
+        except (KeyError, IndexError, TypeError) as error:
+            raise ValueError(f"Malformed skeleton definition: {error}") from error
+        for first, second, _ in links:
+            for label in (first, second):
+                if label not in rest:
+                    raise ValueError(f"Link refers to unknown marker '{label}'.")
+            if first == second:
+                raise ValueError("A link must connect two distinct markers.")
+
+        # Connect the links exactly as Skeleton.add_link would, swapping endpoints when needed. The
+        # earliest link ending at either marker decides, which `first_ending` finds without a scan.
+        connected: List[Tuple[str, str, Optional[str]]] = []
+        first_ending: Dict[str, int] = {}
+        for first, second, link_label in links:
+            if connected:
+                last = connected[-1]
+                if last[1] == first:
+                    pass
+                elif last[1] == second:
+                    first, second = second, first
+                else:
+                    at_first = first_ending.get(first, len(connected))
+                    at_second = first_ending.get(second, len(connected))
+                    if at_first == at_second:
+                        raise ValueError(f"Link '{link_label}' cannot connect to any existing link in the skeleton.")
+                    if at_second < at_first:
+                        first, second = second, first
+            first_ending.setdefault(second, len(connected))
+            connected.append((first, second, link_label))
+
+        marker_index: Dict[str, int] = {}
+        for first, second, _ in connected:
+            for label in (first, second):
+                marker_index.setdefault(label, len(marker_index))
+        unused = [label for label in rest if label not in marker_index]
+        if unused:
+            raise ValueError(f"Markers {unused} are not used by any link.")
+        marker_labels = list(marker_index)
+
+        proximal = [marker_index[first] for first, _, _ in connected]
+        distal = [marker_index[second] for _, second, _ in connected]
+
+        self.label: Optional[str] = definition.get("label")
+        self.marker_labels: Tuple[str, ...] = tuple(marker_labels)
+        self.link_labels: Tuple[Optional[str], ...] = tuple(link_label for _, _, link_label in connected)
+        self.marker_index = MappingProxyType(marker_index)
+        self.link_index = MappingProxyType({label: index for index, label in enumerate(self.link_labels) if label is not None})
+        self.proximal = _read_only(proximal, int)
+        self.distal = _read_only(distal, int)
+        self.parents = _read_only(_parent_indices(proximal, distal), int)
+        self.rest_positions = _read_only([rest[label] for label in marker_labels], float).reshape(-1, 3)
+        self.definition_hash = definition_hash(definition)
+
+    @classmethod
+    def from_definition(cls, definition: dict) -> "SkeletonTemplate":
+        """Return the compiled template of a definition, compiling it only the first time.
+
+        :param definition: The skeleton definition, see `__init__`.
+        :return: The cached SkeletonTemplate.
+        """
+        key = definition_hash(definition)
+        template = _template_cache.get(key)
+        if template is None:
+            template = _template_cache[key] = cls(definition)
+        return template
+
+    @classmethod
+    def load(cls, path: str) -> "SkeletonTemplate":
+        """Load a skeleton definition from a JSON or YAML file into the cached template.
+
+        :param path: Path of a .json, .yaml or .yml file.
+        :return: The cached SkeletonTemplate.
+        :raises ImportError: If a YAML file is given and PyYAML is not installed.
+        """
+        with open(path, "r") as file:
+            if path.endswith((".yaml", ".yml")):
+                if yaml is None:
+                    raise ImportError("PyYAML is required to load YAML skeleton definitions.")
+                definition = yaml.safe_load(file)
+            else:
+                definition = json.load(file)
+        return cls.from_definition(definition)
+
+    @classmethod
+    def from_skeleton(cls, skeleton: Skeleton) -> "SkeletonTemplate":
+        """Compile the topology of an existing Skeleton, with its current marker positions as rest pose.
+
+        :param skeleton: The Skeleton to compile.
+        :return: The cached SkeletonTemplate.
+        :raises ValueError: If the markers of the skeleton do not have unique labels.
+        """
+        markers, _, _ = skeleton.get_link_indices()
+        labels = [marker.label for marker in markers]
+        if None in labels or len(set(labels)) != len(labels):
+            raise ValueError("All markers need unique labels to build a template.")
+        definition = {
+            "label": skeleton.label,
+            "markers": [{"label": marker.label, "position": marker.get_position().tolist()} for marker in markers],
+            "links": [{"label": link.label, "markers": [link.marker1.label, link.marker2.label]} for link in skeleton.links],
+        }
+        return cls.from_definition(definition)
+
+    def to_definition(self) -> dict:
+        """Return the definition of the template, with links in their connected orientation."""
+        return {
+            "label": self.label,
+            "markers": [{"label": label, "position": position.tolist()} for label, position in zip(self.marker_labels, self.rest_positions)],
+            "links": [{"label": label, "markers": [self.marker_labels[first], self.marker_labels[second]]}
+                      for label, first, second in zip(self.link_labels, self.proximal, self.distal)],
+        }
+
+    def save(self, path: str) -> None:
+        """Write the definition of the template to a JSON file.
+
+        :param path: Path of the output file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_definition(), file, indent=2)
+
+    def instantiate(self, positions: Optional[np.ndarray] = None) -> "SkeletonInstance":
+        """Create a subject of this topology. Only the position buffer is allocated.
+
+        :param positions: Marker positions of shape (N, 3). Defaults to a copy of the rest pose.
+        :return: A new SkeletonInstance.
+        """
+        return SkeletonInstance(self, positions)
+
+    def __len__(self) -> int:
+        """Return the number of links of the template."""
+        return self.proximal.shape[0]
+
+    def __repr__(self) -> str:
+        """String representation of the SkeletonTemplate, showing its label and size."""
+        label_str = f"Label: {self.label}" if self.label else "No Label"
+        return f"SkeletonTemplate({label_str}, Markers: {len(self.marker_labels)}, Links: {len(self)})"
+
+class SkeletonInstance:
+    def __init__(self, template: SkeletonTemplate, positions: Optional[np.ndarray] = None) -> None:
+        """Initialize a subject sharing the topology of a compiled template.
+
+        :param template: The SkeletonTemplate describing the topology.
+        :param positions: Marker positions of shape (N, 3). Defaults to a copy of the rest pose.
+        :raises ValueError: If the positions do not match the template markers.
+        """
+        self.template = template
+        if positions is None:
+            self.positions = template.rest_positions.copy()
+        else:
+            self.positions = np.array(positions, dtype=float)
+            if self.positions.shape != template.rest_positions.shape:
+                raise ValueError(f"Positions must have shape {template.rest_positions.shape}.")
+
+    def position_of(self, label: str) -> np.ndarray:
+        """Return a view of the position of the marker with the given label."""
+        return self.positions[self.template.marker_index[label]]
+
+    def link_vectors(self) -> np.ndarray:
+        """Return the vector from the first to the second marker of every link, shape (L, 3)."""
+        return self.positions[self.template.distal] - self.positions[self.template.proximal]
+
+    def link_lengths(self) -> np.ndarray:
+        """Return the length of every link, shape (L,)."""
+        return np.linalg.norm(self.link_vectors(), axis=1)
+
+    def snapshot(self) -> SkeletonSnapshot:
+        """Return an immutable snapshot of the current positions."""
+        return SkeletonSnapshot(self.positions, self.template.proximal, self.template.distal,
+                                self.template.marker_labels, self.template.link_labels, label=self.template.label)
+
+    def to_skeleton(self, rigid_body: Optional[RigidBody] = None) -> Skeleton:
+        """Materialize Marker, Link and Skeleton objects for this subject.
+
+        The topology was validated when the template was compiled, so the links are not re-checked.
+
+        :param rigid_body: Optional root RigidBody of the skeleton.
+        :return: A new Skeleton.
+        """
+        markers = [Marker(*map(float, position), label=label) for label, position in zip(self.template.marker_labels, self.positions)]
+        skeleton = Skeleton(label=self.template.label, rigid_body=rigid_body)
+        skeleton.links = [Link(markers[first], markers[second], label=label)
+                          for label, first, second in zip(self.template.link_labels, self.template.proximal, self.template.distal)]
+        return skeleton
+
+    def __repr__(self) -> str:
+        """String representation of the SkeletonInstance, showing its template and markers."""
+        return f"SkeletonInstance(Template: {self.template.label}, Markers: {len(self.positions)})"
+
+def definition_hash(definition: dict) -> str:
+    """Return a stable hash of a skeleton definition, used as the template cache key.
+
+    :param definition: The skeleton definition.
+    :return: Hexadecimal SHA-256 digest of the canonical JSON encoding.
+    """
+    return hashlib.sha256(json.dumps(definition, sort_keys=True).encode("utf-8")).hexdigest()
+
+def clear_template_cache() -> None:
+    """Forget all compiled templates."""
+    _template_cache.clear()
@@ -0,0 +1,172 @@
+import os
+import sys
+import numpy as np
+from typing import List, Optional, Sequence
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(FILE_DIR)
+
+from Marker import Marker
+
+class Gaps:
+    def __init__(self, markers: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> None:
+        """Initialize a set of gaps, each a run of consecutive missing frames of one marker.
+
+        :param markers: Marker index of every gap, shape (G,).
+        :param starts: First missing frame of every gap, shape (G,).
+        :param stops: Frame after the last missing frame of every gap, shape (G,).
+        """
+        self.markers = np.asarray(markers, dtype=int)
+        self.starts = np.asarray(starts, dtype=int)
+        self.stops = np.asarray(stops, dtype=int)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Return the number of missing frames of every gap."""
+        return self.stops - self.starts
+
+    def select(self, keep: np.ndarray) -> "Gaps":
+        """Return the gaps selected by a boolean mask or index array."""
+        return Gaps(self.markers[keep], self.starts[keep], self.stops[keep])
+
+    def frames(self):
+        """Expand the gaps into their individual missing samples.
+
+        :return: Gap index, marker index and frame of every missing sample, each of shape (sum of lengths,).
+        """
+        lengths = self.lengths
+        gap = np.repeat(np.arange(len(self)), lengths)
+        frame = self.starts[gap] + np.arange(gap.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return gap, self.markers[gap], frame
+
+    def __len__(self) -> int:
+        """Return the number of gaps."""
+        return self.markers.shape[0]
+
+    def __repr__(self) -> str:
+        """String representation of the Gaps, showing their count and lengths."""
+        longest = int(self.lengths.max(initial=0))
+        return f"Gaps(Count: {len(self)}, Missing frames: {int(self.lengths.sum())}, Longest: {longest})"
+
+def detect_gaps(mask: np.ndarray) -> Gaps:
+    """Find every run of missing frames of every marker at once.
+
+    :param mask: Observation mask of shape (T, N), True where the marker is visible.
+    :return: The Gaps, ordered by marker and then by start frame.
+    """
+    missing = ~np.asarray(mask, dtype=bool)
+    edges = np.diff(np.pad(missing.T.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    markers, starts = np.nonzero(edges == 1)
+    _, stops = np.nonzero(edges == -1)
+    return Gaps(markers, starts, stops)
+
+class Trajectory:
+    def __init__(self, positions: np.ndarray, labels: Optional[Sequence[str]] = None,
+                 rate: Optional[float] = None, mask: Optional[np.ndarray] = None) -> None:
+        """Initialize marker trajectories with missing data.
+
+        Missing samples are stored as NaN, so the observation mask is always derived from the
+        positions. Unlike Marker, which only holds finite coordinates, a Trajectory can represent
+        occlusions directly.
+
+        :param positions: Marker positions of shape (T, N, 3). Occluded samples are NaN.
+        :param labels: Labels of the N markers.
+        :param rate: Sampling rate in Hz.
+        :param mask: Optional mask of shape (T, N), False where samples must be treated as missing.
+        :raises ValueError: If the shapes do not match.
+        """
+        self.positions = np.array(positions, dtype=float)
+        if self.positions.ndim != 3 or self.positions.shape[2] != 3:
+            raise ValueError("Positions must have shape (T, N, 3).")
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != self.positions.shape[:2]:
+                raise ValueError(f"Mask must have shape {self.positions.shape[:2]}.")
+            self.positions[~mask] = np.nan
+        self.labels: List[Optional[str]] = list(labels) if labels is not None else [None] * self.positions.shape[1]
+        if len(self.labels) != self.positions.shape[1]:
+            raise ValueError("There must be one label per marker.")
+        self.rate = rate
+
+    @classmethod
+    def from_markers(cls, frames: Sequence[Sequence[Optional[Marker]]], labels: Optional[Sequence[str]] = None,
+                     rate: Optional[float] = None) -> "Trajectory":
+        """Build a trajectory from per-frame lists of Markers, with None for occluded markers.
+
+        :param frames: For every frame, one Marker or None per marker slot.
+        :param labels: Labels of the markers. Defaults to the labels of the first visible Marker of every slot.
+        :param rate: Sampling rate in Hz.
+        :return: A new Trajectory instance.
+        """
+        n_markers = max((len(frame) for frame in frames), default=0)
+        positions = np.full((len(frames), n_markers, 3), np.nan)
+        found: List[Optional[str]] = [None] * n_markers
+        for t, frame in enumerate(frames):
+            for index, marker in enumerate(frame):
+                if marker is not None:
+                    positions[t, index] = marker.get_position()
+                    found[index] = found[index] or marker.label
+        return cls(positions, labels if labels is not None else found, rate)
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Return the observation mask of shape (T, N), True where the marker is visible."""
+        return np.all(np.isfinite(self.positions), axis=2)
+
+    @property
+    def n_frames(self) -> int:
+        """Return the number of frames."""
+        return self.positions.shape[0]
+
+    @property
+    def n_markers(self) -> int:
+        """Return the number of markers."""
+        return self.positions.shape[1]
+
+    def index(self, label: str) -> int:
+        """Return the index of the marker with the given label.
+
+        :raises ValueError: If no marker has this label.
+        """
+        return self.labels.index(label)
+
+    def marker(self, label: str) -> np.ndarray:
+        """Return a view of the positions of one marker, shape (T, 3)."""
+        return self.positions[:, self.index(label)]
+
+    def gaps(self, min_length: int = 1, max_length: Optional[int] = None) -> Gaps:
+        """Detect the gaps of all markers.
+
+        :param min_length: Shortest gap to report.
+        :param max_length: Longest gap to report. Defaults to no limit.
+        :return: The Gaps.
+        """
+        gaps = detect_gaps(self.mask)
+        lengths = gaps.lengths
+        keep = lengths >= min_length
+        if max_length is not None:
+            keep &= lengths <= max_length
+        return gaps.select(keep)
+
+    def coverage(self) -> np.ndarray:
+        """Return the fraction of visible frames of every marker, shape (N,)."""
+        return self.mask.mean(axis=0) if self.n_frames else np.zeros(self.n_markers)
+
+    def markers_at(self, frame: int) -> List[Optional[Marker]]:
+        """Return the markers of one frame as Marker objects, with None for occluded ones.
+
+        :param frame: Index of the frame.
+        :return: One Marker or None per marker slot.
+        """
+        visible = self.mask[frame]
+        return [Marker(*map(float, position), label=label) if seen else None
+                for position, label, seen in zip(self.positions[frame], self.labels, visible)]
+
+    def copy(self) -> "Trajectory":
+        """Return a deep copy of the trajectory."""
+        return Trajectory(self.positions.copy(), self.labels, self.rate)
+
+    def __repr__(self) -> str:
+        """String representation of the Trajectory, showing its size and missing samples."""
+        missing = int(np.sum(~self.mask))
+        return f"Trajectory(Frames: {self.n_frames}, Markers: {self.n_markers}, Missing samples: {missing})"
@@ -0,0 +1,122 @@
+import os
+import sys
+import copy
+import pickle
+import threading
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.RigidBody import RigidBody
+from src.Skeleton import Skeleton
+from src.BatchEvaluator import BatchEvaluator
+
+def make_arm():
+    shoulder = Marker(0.0, 0.0, 1.5, label="Shoulder")
+    elbow = Marker(0.3, 0.0, 1.2, label="Elbow")
+    hand = Marker(0.5, 0.0, 1.0, label="Hand")
+    skeleton = Skeleton(label="Arm", rigid_body=RigidBody(1.0, 0.0, 0.0))
+    skeleton.add_link(Link(shoulder, elbow, label="Upper Arm"))
+    skeleton.add_link(Link(elbow, hand, label="Forearm"))
+    return skeleton
+
+def test_snapshot_is_immutable_and_detached():
+    skeleton = make_arm()
+    snapshot = skeleton.snapshot()
+    with pytest.raises(ValueError):
+        snapshot.positions[0, 0] = 1.0
+    with pytest.raises(AttributeError):
+        snapshot.label = "Other"
+    skeleton.links[0].marker1.move_by(1.0, 0.0, 0.0)
+    assert np.allclose(snapshot.positions[0], [0.0, 0.0, 1.5])
+    assert np.allclose(snapshot.link_lengths(), [link.length() for link in make_arm().links])
+    assert np.allclose(snapshot.transformed().positions[0], [1.0, 0.0, 1.5])
+
+def test_transform_matches_per_frame_loop():
+    skeleton = make_arm()
+    rng = np.random.default_rng(0)
+    n_frames = 1000
+    matrices = np.tile(np.eye(4), (n_frames, 1, 1))
+    matrices[:, :3, :3] = R.random(n_frames, random_state=1).as_matrix()
+    matrices[:, :3, 3] = rng.normal(size=(n_frames, 3))
+    with BatchEvaluator(skeleton, max_workers=4, min_chunk_frames=100) as evaluator:
+        result = evaluator.transform(matrices)
+        lengths = evaluator.link_lengths(result)
+    positions = skeleton.get_marker_positions()
+    expected = np.einsum('tij,nj->tni', matrices[:, :3, :3], positions) + matrices[:, np.newaxis, :3, 3]
+    assert np.allclose(result, expected)
+    assert np.allclose(lengths, skeleton.snapshot().link_lengths())
+
+def test_map_preserves_frame_order():
+    skeleton = make_arm()
+    trajectory = np.arange(600 * 3 * 3, dtype=float).reshape(600, 3, 3)
+    with BatchEvaluator(skeleton, max_workers=3, min_chunk_frames=50) as evaluator:
+        result = evaluator.map(lambda chunk: chunk[:, 0, 0], trajectory)
+        subjects = evaluator.map_subjects(np.sum, [trajectory, 2 * trajectory])
+    assert np.array_equal(result, trajectory[:, 0, 0])
+    assert np.allclose(subjects, [trajectory.sum(), 2 * trajectory.sum()])
+
+def test_subjects_can_call_chunked_methods():
+    skeleton = make_arm()
+    trajectories = [np.random.default_rng(seed).random((100, 3, 3)) for seed in range(4)]
+    evaluator = BatchEvaluator(skeleton, max_workers=2, min_chunk_frames=10)
+    results = {}
+
+    def run():
+        results["lengths"] = evaluator.map_subjects(evaluator.link_lengths, trajectories)
+        results["sums"] = evaluator.map_subjects(lambda t: evaluator.map(lambda c: c.sum(axis=(1, 2)), t), trajectories)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout=10.0)
+    assert not worker.is_alive(), "nested chunked calls deadlocked"
+    evaluator.close()
+    for trajectory, lengths, sums in zip(trajectories, results["lengths"], results["sums"]):
+        assert np.allclose(lengths, np.linalg.norm(trajectory[:, 1:] - trajectory[:, :-1], axis=2))
+        assert np.allclose(sums, trajectory.sum(axis=(1, 2)))
+
+def test_concurrent_writers_and_snapshot_readers():
+    skeleton = make_arm()
+    errors = []
+
+    def writer():
+        for _ in range(200):
+            with skeleton.lock:
+                for marker in skeleton.get_all_markers():
+                    marker.move_by(0.001, 0.0, 0.0)
+
+    def reader():
+        for _ in range(200):
+            lengths = skeleton.snapshot().link_lengths()
+            if not np.allclose(lengths, [np.sqrt(0.18), np.sqrt(0.08)]):
+                errors.append(lengths)
+
+    threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+def test_trajectory_shape_mismatch():
+    with BatchEvaluator(make_arm(), max_workers=2) as evaluator:
+        with pytest.raises(ValueError):
+            evaluator.link_lengths(np.zeros((10, 4, 3)))
+
+def test_skeleton_pickle_and_deepcopy_round_trip():
+    skeleton = make_arm()
+    for clone in (pickle.loads(pickle.dumps(skeleton)), copy.deepcopy(skeleton)):
+        assert clone.label == "Arm"
+        assert [link.label for link in clone.links] == ["Upper Arm", "Forearm"]
+        assert clone.links[0].marker2 is clone.links[1].marker1
+        assert np.allclose(clone.get_marker_positions(), skeleton.get_marker_positions())
+        assert np.allclose(clone.rigid_body.position, skeleton.rigid_body.position)
+        assert clone.lock is not skeleton.lock
+        with clone.lock:
+            clone.add_link(Link(clone.links[1].marker2, Marker(0.6, 0.0, 0.9), label="Finger"))
+        assert len(skeleton.links) == 2
@@ -0,0 +1,104 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Calibration import calibrate
+
+HIP = np.array([0.1, 0.0, 0.9])
+KNEE = np.array([0.1, 0.0, 0.5])
+ANKLE = np.array([0.1, 0.0, 0.1])
+
+def range_of_motion_trial(n_frames=200, knee_hinge=False):
+    t = np.linspace(0, 2 * np.pi, n_frames)
+    pelvis_rotation = R.from_rotvec(0.1 * np.stack([np.sin(t), np.cos(t), np.sin(2 * t)], axis=1))
+    pelvis_translation = np.stack([0.2 * t, 0.05 * np.sin(t), np.zeros_like(t)], axis=1)
+    hip_rotation = pelvis_rotation * R.from_rotvec(0.6 * np.stack([np.sin(t), np.sin(2 * t), 0.5 * np.cos(3 * t)], axis=1))
+    knee_rotvec = np.outer(0.8 * (1 - np.cos(t)), [1.0, 0.0, 0.0])
+    if not knee_hinge:
+        knee_rotvec[:, 1:] = 0.3 * np.stack([np.sin(3 * t), np.cos(2 * t)], axis=1)
+    knee_rotation = hip_rotation * R.from_rotvec(knee_rotvec)
+
+    pelvis_markers = np.array([[0.0, 0.1, 1.0], [0.2, 0.1, 1.0], [0.1, -0.1, 1.05], [0.1, 0.0, 1.1]])
+    thigh_markers = np.array([[0.15, 0.05, 0.75], [0.05, 0.06, 0.65], [0.12, -0.05, 0.6]])
+    shank_markers = np.array([[0.15, 0.05, 0.35], [0.05, 0.06, 0.25], [0.12, -0.05, 0.2]])
+
+    hip_global = pelvis_rotation.apply(HIP) + pelvis_translation
+    knee_global = hip_rotation.apply(KNEE - HIP) + hip_global
+    pelvis = np.einsum('tij,nj->tni', pelvis_rotation.as_matrix(), pelvis_markers) + pelvis_translation[:, None]
+    thigh = np.einsum('tij,nj->tni', hip_rotation.as_matrix(), thigh_markers - HIP) + hip_global[:, None]
+    shank = np.einsum('tij,nj->tni', knee_rotation.as_matrix(), shank_markers - KNEE) + knee_global[:, None]
+    ankle = np.einsum('tij,j->ti', knee_rotation.as_matrix(), ANKLE - KNEE)[:, None] + knee_global[:, None]
+    trajectory = np.concatenate([pelvis, thigh, shank, ankle], axis=1)
+    labels = ["P1", "P2", "P3", "P4", "T1", "T2", "T3", "S1", "S2", "S3", "ANK"]
+    truth = {"hip": hip_global[0], "knee": knee_global[0], "knee_axis": hip_rotation[0].apply([1.0, 0.0, 0.0])}
+    return trajectory, labels, truth
+
+SEGMENTS = {"pelvis": ["P1", "P2", "P3", "P4"], "thigh": ["T1", "T2", "T3"], "shank": ["S1", "S2", "S3"]}
+JOINTS = [("pelvis", "thigh"), ("thigh", "shank")]
+
+def test_recovers_joint_centers_and_link_lengths():
+    trajectory, labels, truth = range_of_motion_trial()
+    result = calibrate(trajectory, labels, SEGMENTS, JOINTS, segment_ends={"shank": "ANK"})
+    assert np.allclose(result.joint_centers["pelvis-thigh"], truth["hip"], atol=1e-6)
+    assert np.allclose(result.joint_centers["thigh-shank"], truth["knee"], atol=1e-6)
+    assert np.isclose(result.link_lengths["thigh"], 0.4, atol=1e-6)
+    assert np.isclose(result.link_lengths["shank"], 0.4, atol=1e-6)
+    assert result.joint_residuals["pelvis-thigh"] < 1e-6
+
+def test_hinge_axis_passes_through_the_joint():
+    trajectory, labels, truth = range_of_motion_trial(knee_hinge=True)
+    result = calibrate(trajectory, labels, SEGMENTS, JOINTS, hinges=[("thigh", "shank")])
+    axis = result.joint_axes["thigh-shank"]
+    assert np.isclose(abs(np.dot(axis, truth["knee_axis"])), 1.0, atol=1e-6)
+    offset = result.joint_centers["thigh-shank"] - truth["knee"]
+    assert np.allclose(np.cross(offset, axis), 0.0, atol=1e-6)
+
+def test_outputs_ready_skeleton_and_marker_offsets():
+    trajectory, labels, truth = range_of_motion_trial()
+    result = calibrate(trajectory, labels, SEGMENTS, JOINTS, segment_ends={"shank": "ANK"})
+    skeleton = result.skeleton
+    assert [link.label for link in skeleton.links] == ["pelvis", "thigh", "shank"]
+    assert skeleton.is_continuous()
+    assert np.allclose(skeleton.links[1].marker1.get_position(), truth["hip"], atol=1e-6)
+    assert np.allclose(result.segment_bodies["thigh"].position, truth["hip"], atol=1e-6)
+    offset = result.marker_offsets["thigh"]["T1"]
+    assert np.allclose(offset, trajectory[0, 4] - truth["hip"], atol=1e-6)
+
+def test_occluded_frames_are_skipped():
+    trajectory, labels, truth = range_of_motion_trial()
+    trajectory[50:60, 4] = np.nan
+    trajectory[100:120, 8:10] = np.nan
+    result = calibrate(trajectory, labels, SEGMENTS, JOINTS)
+    assert np.allclose(result.joint_centers["pelvis-thigh"], truth["hip"], atol=1e-6)
+
+def test_root_with_several_children_hangs_from_a_leaf():
+    trajectory, labels, truth = range_of_motion_trial()
+    segments = dict(SEGMENTS, other=["T1", "T2", "T3"])
+    result = calibrate(trajectory, labels, segments, [("pelvis", "thigh"), ("pelvis", "other"), ("thigh", "shank")])
+    assert result.skeleton.links[0].label == "pelvis:P1"
+    assert len(result.skeleton.links) == 4
+
+def test_invalid_definitions():
+    trajectory, labels, truth = range_of_motion_trial()
+    with pytest.raises(ValueError):
+        calibrate(trajectory, labels, {"pelvis": ["P1", "P2"]}, [])
+    with pytest.raises(ValueError):
+        calibrate(trajectory, labels, SEGMENTS, [("pelvis", "thigh")])
+
+def test_static_trial_is_rejected():
+    trajectory, labels, _ = range_of_motion_trial()
+    static = np.repeat(trajectory[:1], 50, axis=0)
+    with pytest.raises(ValueError, match="did not move enough"):
+        calibrate(static, labels, SEGMENTS, JOINTS)
+    with pytest.raises(ValueError, match="did not move enough"):
+        calibrate(static, labels, SEGMENTS, JOINTS, hinges=[("thigh", "shank")])
+
+def test_pure_hinge_motion_asks_for_a_hinge_fit():
+    trajectory, labels, _ = range_of_motion_trial(knee_hinge=True)
+    with pytest.raises(ValueError, match="fit it as a hinge"):
+        calibrate(trajectory, labels, SEGMENTS, JOINTS)
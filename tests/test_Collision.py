@@ -0,0 +1,120 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.RigidBody import RigidBody
+from src.Collision import Sphere, Capsule, Box, CollisionWorld, closest_points_between_segments
+
+def test_sphere_sphere_contact():
+    world = CollisionWorld([Sphere(1.0), Sphere(1.0)])
+    world.update([[0, 0, 0], [1.5, 0, 0]])
+    contacts = world.query()
+    assert len(contacts) == 1
+    assert np.array_equal(contacts.pairs[0], [0, 1])
+    assert np.allclose(contacts.normals[0], [1, 0, 0])
+    assert np.isclose(contacts.depths[0], 0.5)
+    assert np.allclose(contacts.points[0], [0.75, 0, 0])
+
+def test_separated_shapes_have_no_contact():
+    world = CollisionWorld([Sphere(0.5), Capsule(0.5, [0, 0, -1], [0, 0, 1]), Box([0.5, 0.5, 0.5])])
+    world.update([[0, 0, 0], [3, 0, 0], [6, 0, 0]])
+    assert len(world.query()) == 0
+
+def test_crossing_capsules():
+    world = CollisionWorld([Capsule(0.2, [-1, 0, 0], [1, 0, 0]), Capsule(0.2, [-1, 0, 0], [1, 0, 0])])
+    world.update([[0, 0, 0], [0, 0, 0.3]], [[0, 0, 0, 1], R.from_euler('z', 90, degrees=True).as_quat()])
+    contacts = world.query()
+    assert len(contacts) == 1
+    assert np.allclose(contacts.normals[0], [0, 0, 1])
+    assert np.isclose(contacts.depths[0], 0.1)
+
+def test_capsule_from_link_attached_to_rigid_body():
+    link = Link(Marker(1.0, 0.0, 0.0), Marker(1.0, 0.0, 2.0))
+    body = RigidBody(1.0, 0.0, 1.0)
+    capsule = Capsule.from_link(link, 0.1, body)
+    assert np.allclose(capsule.start, [0, 0, -1])
+    assert np.allclose(capsule.end, [0, 0, 1])
+
+def test_sphere_box_contact_with_rotated_box():
+    world = CollisionWorld([Box([1.0, 1.0, 1.0]), Sphere(0.5)])
+    world.update([[0, 0, 0], [0, 0, 1.3]], [R.from_euler('z', 30, degrees=True).as_quat(), [0, 0, 0, 1]])
+    contacts = world.query()
+    assert len(contacts) == 1
+    assert np.allclose(contacts.normals[0], [0, 0, 1])
+    assert np.isclose(contacts.depths[0], 0.2)
+
+def test_sphere_inside_box():
+    world = CollisionWorld([Sphere(0.1), Box([1.0, 1.0, 1.0])])
+    world.update([[0.8, 0, 0], [0, 0, 0]])
+    contacts = world.query()
+    assert np.allclose(contacts.normals[0], [-1, 0, 0])
+    assert np.isclose(contacts.depths[0], 0.3)
+
+def test_capsule_grazing_box_edge():
+    # Nearly parallel to the top face and closest to its edge at x = -1, z = 1
+    world = CollisionWorld([Box([1.0, 1.0, 1.0]), Capsule(0.21, [-3, 0, 1.05], [3, 0, 1.5])])
+    world.update(np.zeros((2, 3)))
+    contacts = world.query()
+    distance = (2.0 * 0.45 + 0.05 * 6.0) / np.hypot(6.0, 0.45)
+    assert len(contacts) == 1
+    assert np.isclose(contacts.depths[0], 0.21 - distance, atol=1e-9)
+
+def test_capsule_box_depth_matches_sampled_segment():
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        start, end = rng.uniform(-2, 2, (2, 3))
+        world = CollisionWorld([Capsule(1.0, start, end), Box(rng.uniform(0.2, 1.0, 3))])
+        world.update([[0, 0, 0], rng.normal(scale=0.3, size=3)], [[0, 0, 0, 1], R.random(random_state=rng).as_quat()])
+        t = np.linspace(0.0, 1.0, 20001)[:, np.newaxis]
+        local = (world.segments[0, 0] + t * (world.segments[0, 1] - world.segments[0, 0]) - world.positions[1]) @ world.rotation_matrices[1]
+        distance = np.min(np.linalg.norm(local - np.clip(local, -world.half_extents[1], world.half_extents[1]), axis=1))
+        contacts = world.contacts(np.array([[0, 1]]))
+        if distance > 1e-3:
+            assert len(contacts) == (distance < 1.0)
+            assert np.allclose(contacts.depths, 1.0 - distance, atol=1e-4)
+
+def test_box_box_contact():
+    world = CollisionWorld([Box([1.0, 1.0, 1.0]), Box([0.5, 0.5, 0.5])])
+    world.update([[0, 0, 0], [0, 0, 1.4]])
+    contacts = world.query()
+    assert len(contacts) == 1
+    assert np.allclose(contacts.normals[0], [0, 0, 1])
+    assert np.isclose(contacts.depths[0], 0.1)
+
+def test_broad_phase_matches_brute_force_and_stays_sorted():
+    rng = np.random.default_rng(0)
+    n_shapes = 300
+    shapes = [Sphere(r) for r in rng.uniform(0.05, 0.3, n_shapes)]
+    world = CollisionWorld(shapes)
+    positions = rng.uniform(0, 5, (n_shapes, 3))
+    for _ in range(3):
+        positions += rng.normal(scale=0.05, size=positions.shape)
+        world.update(positions)
+        pairs = world.candidate_pairs()
+        overlap = np.all((world.aabb_min[:, None] <= world.aabb_max[None]) & (world.aabb_min[None] <= world.aabb_max[:, None]), axis=2)
+        expected = np.argwhere(np.triu(overlap, k=1))
+        assert np.array_equal(pairs, expected)
+
+def test_excluded_pairs():
+    world = CollisionWorld([Sphere(1.0), Sphere(1.0), Sphere(1.0)], exclude=[(1, 0)])
+    world.update(np.zeros((3, 3)))
+    assert world.candidate_pairs().tolist() == [[0, 2], [1, 2]]
+
+def test_closest_points_between_parallel_and_degenerate_segments():
+    p1 = np.array([[0, 0, 0], [0, 0, 0]], dtype=float)
+    q1 = np.array([[1, 0, 0], [0, 0, 0]], dtype=float)
+    p2 = np.array([[0.5, 1, 0], [2, -1, 0]], dtype=float)
+    q2 = np.array([[2, 1, 0], [2, 1, 0]], dtype=float)
+    closest_1, closest_2 = closest_points_between_segments(p1, q1, p2, q2)
+    assert np.allclose(np.linalg.norm(closest_2 - closest_1, axis=1), [1.0, 2.0])
+
+def test_invalid_shape():
+    with pytest.raises(TypeError):
+        CollisionWorld([Sphere(1.0), "box"])
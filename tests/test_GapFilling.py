@@ -0,0 +1,80 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Trajectory import Trajectory
+from src.GapFilling import GapFiller, SPLINE, RIGID, PCA, OBSERVED
+
+def rigid_cluster_trial(n_frames=400, rate=100.0):
+    """Four markers on a rotating and translating segment, plus two markers driven by the same motion."""
+    time = np.arange(n_frames) / rate
+    shape = np.array([[0.05, 0.0, 0.0], [-0.05, 0.02, 0.0], [0.0, -0.04, 0.03], [0.01, 0.03, -0.05]])
+    rotations = R.from_rotvec(np.outer(np.sin(2 * np.pi * 0.5 * time), [0.3, 0.8, 0.2]))
+    translation = np.stack([0.4 * np.sin(2 * np.pi * 0.3 * time), 0.1 * time, 1.0 + 0.05 * np.cos(2 * np.pi * time)], axis=1)
+    cluster = np.stack([rotations.apply(point) for point in shape], axis=1) + translation[:, np.newaxis]
+    others = np.stack([translation + [0.3, 0.0, 0.0], translation * [1.0, 2.0, 1.0] - [0.0, 0.0, 0.5]], axis=1)
+    labels = ["C1", "C2", "C3", "C4", "O1", "O2"]
+    return np.concatenate([cluster, others], axis=1), labels
+
+def test_spline_fill_is_accurate_for_short_gaps():
+    truth, labels = rigid_cluster_trial()
+    positions = truth.copy()
+    positions[50:56, 0] = np.nan
+    positions[200:204, 4] = np.nan
+    positions[300:340, 5] = np.nan
+    filler = GapFiller(Trajectory(positions, labels))
+    assert filler.fill_spline(max_gap=10) == 10
+    filled = filler.trajectory.positions
+    assert np.max(np.abs(filled[50:56, 0] - truth[50:56, 0])) < 1e-3
+    assert np.max(np.abs(filled[200:204, 4] - truth[200:204, 4])) < 1e-3
+    assert np.all(np.isnan(filled[300:340, 5]))
+    assert np.all(filler.source[50:56, 0] == SPLINE)
+
+def test_rigid_fill_recovers_cluster_markers():
+    truth, labels = rigid_cluster_trial()
+    positions = truth.copy()
+    positions[100:250, 2] = np.nan
+    positions[260:280, 0] = np.nan
+    positions[180:200, 3] = np.nan
+    filler = GapFiller(Trajectory(positions, labels), clusters={"segment": ["C1", "C2", "C3", "C4"]})
+    assert filler.fill_rigid() == 150
+    assert np.all(np.isnan(filler.trajectory.positions[180:200, [2, 3]]))
+    filled = np.isfinite(filler.trajectory.positions)
+    assert np.max(np.abs(filler.trajectory.positions[filled] - truth[filled])) < 1e-9
+    assert np.all(filler.source[250:, 2] == OBSERVED) and np.all(filler.source[260:280, 0] == RIGID)
+    with pytest.raises(ValueError):
+        GapFiller(Trajectory(positions, labels), clusters={"segment": ["C1", "C9", "C3"]})
+
+def test_pca_fill_uses_correlated_markers():
+    truth, labels = rigid_cluster_trial()
+    positions = truth.copy()
+    positions[150:220, 4] = np.nan
+    positions[160:170, 5] = np.nan
+    filler = GapFiller(Trajectory(positions, labels))
+    filled = filler.fill_pca(variance=0.999999)
+    assert filled == 80
+    assert np.max(np.abs(filler.trajectory.positions[150:220, 4] - truth[150:220, 4])) < 5e-3
+    assert np.all(filler.source[150:220, 4] == PCA)
+
+def test_fill_runs_all_methods_and_reports():
+    truth, labels = rigid_cluster_trial()
+    positions = truth.copy()
+    positions[20:24, 4] = np.nan
+    positions[100:250, 2] = np.nan
+    positions[150:220, 5] = np.nan
+    positions[:3, 1] = np.nan
+    trajectory = Trajectory(positions, labels)
+    filler = GapFiller(trajectory, clusters={"segment": ["C1", "C2", "C3", "C4"]})
+    result = filler.fill(max_spline_gap=5, variance=0.999999)
+    report = filler.report()
+    assert report["missing"] == 0
+    assert report["spline"] == 4 and report["rigid"] == 153 and report["pca"] == 70
+    assert report["observed"] == int(trajectory.mask.sum())
+    assert np.all(np.isfinite(result.positions))
+    assert np.all(np.isnan(trajectory.positions[100:250, 2]))
+    assert np.all(filler.source[trajectory.mask] == OBSERVED)
@@ -0,0 +1,87 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.RigidBody import RigidBody
+from src.RigidBodyState import RigidBodyState
+from src.Integrator import semi_implicit_euler_step, rk4_step, FixedTimestepScheduler
+
+def test_rk4_free_fall_is_exact():
+    state = RigidBodyState(np.zeros((3, 3)), linear_velocities=[[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+    for i in range(100):
+        rk4_step(state, 0.01, i * 0.01)
+    t = 1.0
+    expected = np.eye(3) * t + np.array([0, 0, -0.5 * 9.81 * t ** 2])
+    assert np.allclose(state.positions, expected, atol=1e-9)
+
+@pytest.mark.parametrize("step", [semi_implicit_euler_step, rk4_step])
+def test_spin_about_principal_axis(step):
+    state = RigidBodyState(np.zeros((1, 3)), angular_velocities=[[0, 0, np.pi]], inertia=[1.0, 2.0, 3.0])
+    for _ in range(100):
+        step(state, 0.01, gravity=np.zeros(3))
+    expected = R.from_euler('z', np.pi).as_quat()
+    assert np.isclose(abs(np.dot(state.orientations[0], expected)), 1.0, atol=1e-6)
+    assert np.allclose(state.angular_velocities, [[0, 0, np.pi]])
+
+@pytest.mark.parametrize("step", [semi_implicit_euler_step, rk4_step])
+def test_quaternions_stay_normalized_and_energy_is_bounded(step):
+    rng = np.random.default_rng(1)
+    inertia = np.array([1.0, 2.0, 3.0])
+    state = RigidBodyState(np.zeros((50, 3)), rng.normal(size=(50, 4)), angular_velocities=rng.normal(size=(50, 3)), inertia=inertia)
+
+    def energy():
+        omega_body = state.rotations().inv().apply(state.angular_velocities)
+        return 0.5 * np.sum(inertia * omega_body ** 2, axis=1)
+
+    initial = energy()
+    for _ in range(200):
+        step(state, 1e-3, gravity=np.zeros(3))
+    assert np.allclose(np.linalg.norm(state.orientations, axis=1), 1.0)
+    assert np.allclose(energy(), initial, rtol=1e-2)
+
+def test_force_function_and_rigid_body_round_trip():
+    bodies = [RigidBody(0.0, 0.0, 1.0, orientation=[0.1, 0.2, 0.3]), RigidBody(1.0, 2.0, 3.0)]
+    state = RigidBodyState.from_rigid_bodies(bodies, masses=[1.0, 2.0])
+    support = lambda s, t: (np.outer(s.masses, [0, 0, 9.81]), np.zeros((len(s), 3)))
+    semi_implicit_euler_step(state, 0.01, force_fn=support)
+    converted = state.to_rigid_bodies(labels=["a", "b"])
+    assert np.allclose(converted[0].position, bodies[0].position)
+    assert np.allclose(converted[1].as_quaternion(), bodies[1].as_quaternion())
+    assert converted[1].label == "b"
+
+def test_scheduler_consumes_fixed_steps():
+    state = RigidBodyState(np.zeros((2, 3)))
+    scheduler = FixedTimestepScheduler(0.01)
+    assert scheduler.advance(state, 0.025) == 2
+    assert scheduler.advance(state, 0.006) == 1
+    assert scheduler.steps == 3
+    assert np.isclose(scheduler.time, 0.03)
+    assert np.isclose(scheduler.alpha(), 0.1)
+
+def test_scheduler_drops_backlog_beyond_max_substeps():
+    scheduler = FixedTimestepScheduler(0.01, max_substeps=5)
+    assert scheduler.advance(RigidBodyState(np.zeros((1, 3))), 1.0) == 5
+    assert scheduler.accumulator == 0.0
+
+def test_invalid_mass():
+    with pytest.raises(ValueError):
+        RigidBodyState(np.zeros((2, 3)), masses=[1.0, 0.0])
+
+def test_inertia_shapes_with_three_bodies():
+    moments = [[1.0, 1.0, 1.0], [2.0, 2.0, 2.0], [3.0, 3.0, 3.0]]
+    state = RigidBodyState(np.zeros((3, 3)), inertia=moments)
+    assert np.allclose(state.inertia, np.array(moments)[:, :, np.newaxis] * np.eye(3))
+    assert np.allclose(state.inverse_inertia[2], np.eye(3) / 3.0)
+    shared = RigidBodyState(np.zeros((3, 3)), inertia=[1.0, 2.0, 3.0])
+    assert np.allclose(shared.inertia, np.diag([1.0, 2.0, 3.0]))
+    tensors = RigidBodyState(np.zeros((3, 3)), inertia=np.tile(2.0 * np.eye(3), (3, 1, 1)))
+    assert np.allclose(tensors.inertia, 2.0 * np.eye(3))
+    with pytest.raises(ValueError):
+        RigidBodyState(np.zeros((2, 3)), inertia=np.eye(3))
+    with pytest.raises(ValueError):
+        RigidBodyState(np.zeros((2, 3)), inertia=2.0)
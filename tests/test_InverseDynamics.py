@@ -0,0 +1,82 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.Skeleton import Skeleton
+from src.MassModel import MassModel
+from src.SegmentInertia import SegmentInertia
+from src.InverseDynamics import InverseDynamics, ExternalForce
+
+SEGMENT = SegmentInertia(0.1, 0.5, (0.3, 0.3, 0.1))
+
+def make_chain(points):
+    markers = [Marker(*point, label=f"M{i}") for i, point in enumerate(points)]
+    skeleton = Skeleton()
+    for i in range(len(markers) - 1):
+        skeleton.add_link(Link(markers[i], markers[i + 1], label=f"L{i}"))
+    return skeleton
+
+def make_solver(skeleton, positions, dt=0.01):
+    segments = {link.label: SEGMENT for link in skeleton.links}
+    model = MassModel(skeleton, 50.0, segments)
+    model.set_trajectory(positions, dt=dt)
+    return InverseDynamics.from_skeleton(skeleton, model)
+
+def test_hanging_chain_carries_its_weight():
+    skeleton = make_chain([(0, 0, 2), (0, 0, 1.5), (0, 0, 1), (0, 0, 0.5)])
+    positions = np.repeat(skeleton.get_marker_positions()[np.newaxis], 4, axis=0)
+    forces, moments = make_solver(skeleton, positions).solve()
+    assert np.allclose(forces[:, 0], [0, 0, 3 * 5.0 * 9.81])
+    assert np.allclose(forces[:, 2], [0, 0, 5.0 * 9.81])
+    assert np.allclose(moments, 0.0)
+
+def test_horizontal_link_moment():
+    skeleton = make_chain([(0, 0, 0), (1, 0, 0)])
+    positions = skeleton.get_marker_positions()[np.newaxis]
+    forces, moments = make_solver(skeleton, positions).solve()
+    assert np.allclose(forces[0, 0], [0, 0, 5.0 * 9.81])
+    assert np.allclose(moments[0, 0], [0, -5.0 * 9.81 * 0.5, 0])
+
+def test_free_fall_needs_no_joint_loads():
+    skeleton = make_chain([(0, 0, 2), (1, 0, 2), (1, 1, 2)])
+    dt = 0.01
+    t = np.arange(10) * dt
+    drop = np.zeros((10, 1, 3))
+    drop[:, 0, 2] = -0.5 * 9.81 * t ** 2
+    positions = skeleton.get_marker_positions()[np.newaxis] + drop
+    forces, moments = make_solver(skeleton, positions, dt).solve()
+    assert np.allclose(forces, 0.0, atol=1e-8)
+    assert np.allclose(moments, 0.0, atol=1e-8)
+
+def test_ground_reaction_balances_standing_chain():
+    skeleton = make_chain([(0, 0, 1), (0, 0, 0.5), (0, 0, 0)])
+    positions = skeleton.get_marker_positions()[np.newaxis]
+    ground = ExternalForce("L1", force=[0, 0, 2 * 5.0 * 9.81], point=[0, 0, 0])
+    forces, moments = make_solver(skeleton, positions).solve([ground])
+    assert np.allclose(forces[0, 0], 0.0)
+    assert np.allclose(forces[0, 1], [0, 0, -5.0 * 9.81])
+    assert np.allclose(moments, 0.0)
+
+def test_parent_indices_of_branching_skeleton():
+    neck = Marker(0, 0, 1.6)
+    skeleton = Skeleton()
+    skeleton.add_link(Link(Marker(0, 0, 1.8), neck))
+    skeleton.add_link(Link(neck, Marker(-0.5, 0, 1.5)))
+    skeleton.add_link(Link(neck, Marker(0.5, 0, 1.5)))
+    assert list(skeleton.get_parent_indices()) == [-1, 0, 0]
+
+def test_parent_indices_of_long_chain():
+    skeleton = make_chain([(float(i), 0, 0) for i in range(3001)])
+    assert np.array_equal(skeleton.get_parent_indices(), np.arange(-1, 2999))
+
+def test_cyclic_parents_rejected():
+    skeleton = make_chain([(0, 0, 0), (1, 0, 0), (2, 0, 0)])
+    model = MassModel(skeleton, 50.0)
+    with pytest.raises(ValueError):
+        InverseDynamics(model, [1, 0])
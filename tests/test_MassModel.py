@@ -0,0 +1,73 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.Skeleton import Skeleton
+from src.MassModel import MassModel
+from src.SegmentInertia import SegmentInertia
+
+def make_leg():
+    hip = Marker(0.0, 0.0, 1.0, label="Hip")
+    knee = Marker(0.0, 0.0, 0.5, label="Knee")
+    ankle = Marker(0.0, 0.0, 0.1, label="Ankle")
+    skeleton = Skeleton(label="Leg")
+    skeleton.add_link(Link(hip, knee, label="Thigh"))
+    skeleton.add_link(Link(knee, ankle, label="Shank"))
+    return skeleton
+
+def test_link_masses_from_table():
+    model = MassModel(make_leg(), 80.0, {"Thigh": "thigh", "Shank": "shank"})
+    assert np.allclose(model.link_masses(), [0.1416 * 80.0, 0.0433 * 80.0])
+
+def test_segment_com_and_whole_body_com():
+    skeleton = make_leg()
+    model = MassModel(skeleton, 80.0, {"Thigh": "thigh", "Shank": "shank"})
+    model.set_trajectory(skeleton.get_marker_positions())
+    com = model.segment_com()
+    assert com.shape == (1, 2, 3)
+    assert np.allclose(com[0, 0], skeleton.links[0].point_along(0.4095))
+    masses = model.link_masses()
+    expected = (masses[0] * com[0, 0] + masses[1] * com[0, 1]) / masses.sum()
+    assert np.allclose(model.whole_body_com()[0], expected)
+
+def test_incremental_segment_update_matches_full_recompute():
+    skeleton = make_leg()
+    positions = skeleton.get_marker_positions() + np.random.default_rng(0).normal(size=(20, 3, 3)) * 0.01
+    model = MassModel(skeleton, 80.0, {"Thigh": "thigh", "Shank": "shank"})
+    model.set_trajectory(positions, dt=0.01)
+    model.whole_body_com()
+    model.set_segment("Shank", SegmentInertia(0.05, 0.3, (0.3, 0.3, 0.1)))
+    reference = MassModel(skeleton, 80.0, {"Thigh": "thigh", "Shank": SegmentInertia(0.05, 0.3, (0.3, 0.3, 0.1))})
+    reference.set_trajectory(positions, dt=0.01)
+    assert np.allclose(model.whole_body_com(), reference.whole_body_com())
+    assert np.allclose(model.angular_momentum(), reference.angular_momentum())
+
+def test_inertia_tensor_of_vertical_segment():
+    skeleton = make_leg()
+    model = MassModel(skeleton, 80.0, {"Thigh": SegmentInertia(0.1, 0.5, (0.3, 0.3, 0.1))})
+    model.set_trajectory(skeleton.get_marker_positions())
+    tensor = model.inertia_tensors()[0, 0]
+    mass_length = 8.0 * 0.5 ** 2
+    assert np.allclose(tensor, np.diag([mass_length * 0.09, mass_length * 0.09, mass_length * 0.01]))
+
+def test_static_pose_has_no_angular_momentum():
+    skeleton = make_leg()
+    model = MassModel(skeleton, 80.0, {"Thigh": "thigh", "Shank": "shank"})
+    model.set_trajectory(np.repeat(skeleton.get_marker_positions()[np.newaxis], 5, axis=0))
+    assert np.allclose(model.angular_momentum(), 0.0)
+
+def test_unknown_link_label():
+    model = MassModel(make_leg(), 80.0)
+    with pytest.raises(ValueError):
+        model.set_segment("Forearm", "forearm")
+
+def test_query_without_trajectory():
+    model = MassModel(make_leg(), 80.0, {"Thigh": "thigh"})
+    with pytest.raises(RuntimeError):
+        model.whole_body_com()
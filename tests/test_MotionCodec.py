@@ -0,0 +1,81 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.MotionCodec import MotionCodec, EncodedMotion
+
+def make_trajectory(n_frames=1000, n_markers=12, seed=0):
+    rng = np.random.default_rng(seed)
+    time = np.arange(n_frames)[:, np.newaxis, np.newaxis] / 200.0
+    phase = rng.uniform(0, 2 * np.pi, size=(1, n_markers, 3))
+    offset = rng.uniform(-1.0, 1.0, size=(1, n_markers, 3))
+    trajectory = offset + 0.3 * np.sin(2 * np.pi * 1.5 * time + phase)
+    trajectory[100:140, 3] = np.nan
+    trajectory[:5, 7] = np.nan
+    return trajectory
+
+def make_quaternions(n_frames=600, n_bodies=5, seed=1):
+    rng = np.random.default_rng(seed)
+    rates = rng.normal(scale=2.0, size=(n_bodies, 3))
+    time = np.arange(n_frames) / 120.0
+    rotations = R.from_rotvec((time[:, np.newaxis, np.newaxis] * rates).reshape(-1, 3))
+    start = R.random(n_bodies, random_state=seed)
+    return (rotations * R.from_quat(np.tile(start.as_quat(), (n_frames, 1)))).as_quat().reshape(n_frames, n_bodies, 4)
+
+@pytest.mark.parametrize("order", [0, 1, 2])
+def test_positions_respect_error_bound(order):
+    trajectory = make_trajectory()
+    encoded = MotionCodec(max_error=1e-4, order=order, chunk_frames=128).encode_positions(trajectory)
+    decoded = encoded.decode()
+    assert np.array_equal(np.isnan(decoded), np.isnan(trajectory))
+    assert np.nanmax(np.abs(decoded - trajectory)) <= encoded.error_bound * (1 + 1e-9)
+    assert encoded.compression_ratio() > 3.0
+
+def test_lossless_positions_are_bit_exact():
+    trajectory = make_trajectory()
+    encoded = MotionCodec(max_error=None).encode_positions(trajectory)
+    decoded = encoded.decode()
+    assert encoded.error_bound == 0.0
+    assert np.array_equal(decoded.view(np.uint64), trajectory.view(np.uint64))
+
+def test_random_access_and_serialization():
+    trajectory = make_trajectory(n_frames=777)
+    encoded = MotionCodec(max_error=5e-4, chunk_frames=100).encode_positions(trajectory)
+    restored = EncodedMotion.from_bytes(encoded.to_bytes())
+    full = encoded.decode()
+    assert len(restored) == 777
+    assert np.array_equal(restored.decode(250, 420), full[250:420], equal_nan=True)
+    assert np.array_equal(restored.decode(-7), full[-7:], equal_nan=True)
+    assert restored.decode(300, 300).shape == (0, 12, 3)
+    with pytest.raises(ValueError):
+        EncodedMotion.from_bytes(b"nope" + bytes(20))
+
+def test_quaternions_respect_error_bound():
+    quaternions = make_quaternions()
+    quaternions[10, 2] = np.nan
+    encoded = MotionCodec(quaternion_bits=12, chunk_frames=64).encode_quaternions(quaternions)
+    decoded = EncodedMotion.from_bytes(encoded.to_bytes()).decode()
+    assert np.all(np.isnan(decoded[10, 2]))
+    valid = np.all(np.isfinite(quaternions), axis=2)
+    sign = np.sign(np.sum(decoded * quaternions, axis=2, keepdims=True))
+    error = np.abs(decoded * sign - quaternions)[valid]
+    largest = np.argmax(np.abs(quaternions[valid]), axis=1)
+    stored = np.ones_like(error, dtype=bool)
+    stored[np.arange(len(largest)), largest] = False
+    assert error[stored].max() <= encoded.error_bound * (1 + 1e-9)
+    assert error.max() <= 3 * encoded.error_bound
+    assert np.allclose(np.linalg.norm(decoded[valid], axis=1), 1.0)
+    assert encoded.compression_ratio() > 4.0
+
+def test_invalid_inputs():
+    with pytest.raises(ValueError):
+        MotionCodec(order=3)
+    with pytest.raises(ValueError):
+        MotionCodec().encode_positions(np.zeros((10, 4)))
+    with pytest.raises(ValueError):
+        MotionCodec(max_error=1e-12).encode_positions(np.full((2, 1, 3), 1e6))
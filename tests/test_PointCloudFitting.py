@@ -0,0 +1,99 @@
+import os
+import sys
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.Skeleton import Skeleton
+from src.PointCloudFitting import PointCloudFitter
+
+RADIUS = 0.04
+
+def make_arm():
+    shoulder = Marker(0.0, 0.0, 1.5, label="Shoulder")
+    elbow = Marker(0.3, 0.0, 1.2, label="Elbow")
+    hand = Marker(0.5, 0.1, 1.0, label="Hand")
+    skeleton = Skeleton(label="Arm")
+    skeleton.add_link(Link(shoulder, elbow, label="Upper Arm"))
+    skeleton.add_link(Link(elbow, hand, label="Forearm"))
+    return skeleton
+
+def sample_capsules(positions, proximal, distal, n_per_link, rng):
+    """Sample points on the surfaces of the capsules around the links."""
+    points = []
+    for first, second in zip(proximal, distal):
+        start, end = positions[first], positions[second]
+        axis = end - start
+        along = rng.uniform(-0.15, 1.15, n_per_link)
+        near = start + along[:, np.newaxis] * axis + rng.normal(scale=0.05, size=(n_per_link, 3))
+        projection = start + np.clip(np.einsum('ij,j->i', near - start, axis) / axis.dot(axis), 0, 1)[:, np.newaxis] * axis
+        radial = near - projection
+        points.append(projection + RADIUS * radial / np.linalg.norm(radial, axis=1, keepdims=True))
+    return np.concatenate(points)
+
+def moved_pose(skeleton):
+    """Rotate the whole arm slightly and bend the elbow further."""
+    positions = skeleton.get_marker_positions()
+    rotation = R.from_euler('xyz', [0.05, -0.08, 0.1])
+    moved = rotation.apply(positions - positions[0]) + positions[0] + [0.02, -0.01, 0.015]
+    bend = R.from_rotvec([0.0, 0.15, 0.0])
+    moved[2] = bend.apply(moved[2] - moved[1]) + moved[1]
+    return moved
+
+def test_fit_recovers_moved_pose():
+    skeleton = make_arm()
+    markers, proximal, distal = skeleton.get_link_indices()
+    truth = moved_pose(skeleton)
+    rng = np.random.default_rng(0)
+    cloud = sample_capsules(truth, proximal, distal, 800, rng)
+    outliers = rng.uniform(-1.0, 3.0, size=(100, 3))
+    fitter = PointCloudFitter(skeleton, RADIUS, max_iterations=100, tolerance=1e-5, max_distance=0.08)
+    result = fitter.fit(np.concatenate([cloud, outliers]))
+
+    assert result.converged
+    assert result.rms < 1e-3
+    assert np.max(np.linalg.norm(result.marker_positions - truth, axis=1)) < 0.01
+    assert result.iterations[0].rms > result.iterations[-1].rms
+    assert result.timing()["iterations"] == len(result.iterations)
+    assert all(iteration.elapsed > 0 for iteration in result.iterations)
+
+    bodies = result.rigid_bodies()
+    assert set(bodies) == {"Upper Arm", "Forearm"}
+    assert np.allclose(bodies["Forearm"].position, result.endpoints[1, 0])
+    result.apply_to(skeleton)
+    assert np.allclose(skeleton.get_marker_positions(), result.marker_positions)
+
+def test_subsampling_controls():
+    skeleton = make_arm()
+    _, proximal, distal = skeleton.get_link_indices()
+    cloud = sample_capsules(skeleton.get_marker_positions(), proximal, distal, 2000, np.random.default_rng(1))
+    assert len(PointCloudFitter(skeleton, RADIUS, max_points=500).subsample(cloud)) == 500
+    voxelized = PointCloudFitter(skeleton, RADIUS, voxel_size=0.02).subsample(cloud)
+    assert len(voxelized) < len(cloud)
+    with_nan = np.vstack([cloud, [np.nan, 0.0, 0.0]])
+    assert len(PointCloudFitter(skeleton, RADIUS).subsample(with_nan)) == len(cloud)
+
+    fit = PointCloudFitter(skeleton, {"Upper Arm": RADIUS, "Forearm": RADIUS}, max_points=300).fit(cloud)
+    assert fit.n_points == 300
+    assert np.max(np.linalg.norm(fit.marker_positions - skeleton.get_marker_positions(), axis=1)) < 0.01
+
+def test_segments_without_points_stay_in_place():
+    skeleton = make_arm()
+    _, proximal, distal = skeleton.get_link_indices()
+    positions = skeleton.get_marker_positions()
+    cloud = sample_capsules(positions, proximal[:1], distal[:1], 500, np.random.default_rng(2))
+    fit = PointCloudFitter(skeleton, RADIUS).fit(cloud)
+    assert np.allclose(fit.rotations[1], np.eye(3))
+    assert np.allclose(fit.translations[1], 0.0)
+    assert len(PointCloudFitter(skeleton, RADIUS).fit(np.empty((0, 3))).iterations) == 0
+
+def test_fit_without_correspondences_is_not_converged():
+    fit = PointCloudFitter(make_arm(), RADIUS).fit([[10.0, 10.0, 10.0], [11.0, 11.0, 11.0]])
+    assert not fit.converged
+    assert np.isnan(fit.rms)
+    assert len(fit.iterations) == 1
+    assert fit.iterations[0].correspondences == 0
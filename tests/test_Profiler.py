@@ -0,0 +1,82 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src import Profiler
+from src.Marker import Marker
+from src.RigidBody import RigidBody
+from src.Skeleton import Skeleton
+
+@pytest.fixture(autouse=True)
+def clean_profiler():
+    Profiler.disable()
+    Profiler.reset()
+    yield
+    Profiler.disable()
+    Profiler.reset()
+
+def test_disabled_profiler_leaves_methods_untouched():
+    original = Marker.__dict__["move_by"]
+    Marker(0.0, 0.0, 0.0).move_by(1.0, 1.0, 1.0)
+    assert Profiler.report().entries == {}
+    Profiler.enable()
+    assert Marker.__dict__["move_by"] is not original
+    Profiler.disable()
+    assert Marker.__dict__["move_by"] is original
+
+def test_context_manager_counts_calls():
+    marker = Marker(1.0, 2.0, 3.0)
+    with Profiler.profile() as session:
+        for _ in range(5):
+            marker.apply_transformation(np.eye(4))
+        RigidBody(1.0, 0.0, 0.0) * RigidBody(0.0, 1.0, 0.0)
+    assert not Profiler.is_enabled()
+    entries = session.report.entries
+    assert entries["Marker.apply_transformation"].calls == 5
+    assert entries["RigidBody.__mul__"].calls == 1
+    assert entries["Marker.apply_transformation"].total_time > 0
+
+def test_exporter_receives_metrics():
+    received = []
+    exporter = lambda report: received.append(report.as_metrics(prefix="test"))
+    Profiler.add_exporter(exporter)
+    try:
+        with Profiler.profile():
+            Marker(0.0, 0.0, 0.0).distance_to(Marker(3.0, 4.0, 0.0))
+    finally:
+        Profiler.remove_exporter(exporter)
+    assert received[0]["test.Marker.distance_to.calls"] == 1
+
+def test_report_is_a_snapshot():
+    Profiler.enable()
+    Marker(0.0, 0.0, 0.0).set_position(1.0, 1.0, 1.0)
+    snapshot = Profiler.report()
+    Marker(0.0, 0.0, 0.0).set_position(1.0, 1.0, 1.0)
+    assert snapshot.entries["Marker.set_position"].calls == 1
+    assert "Marker.set_position" in str(Profiler.report())
+
+def test_registered_operations():
+    assert {"Marker.apply_transformation", "RigidBody.__mul__", "Skeleton.add_link"} <= set(Profiler.operations())
+
+def test_allocation_tracking_is_opt_in():
+    with Profiler.profile() as session:
+        Marker(0.0, 0.0, 0.0).move_by(1.0, 1.0, 1.0)
+    assert session.report.entries["Marker.move_by"].allocated_blocks == 0
+    assert not Profiler.is_tracking_allocations()
+    Profiler.enable()
+    with Profiler.profile(track_allocations=True):
+        assert Profiler.is_tracking_allocations()
+        Marker(0.0, 0.0, 0.0).move_by(1.0, 1.0, 1.0)
+    assert Profiler.is_enabled() and not Profiler.is_tracking_allocations()
+
+def test_package_and_file_imports_share_state():
+    assert Profiler is sys.modules["Profiler"]
+    original = Marker.__dict__["move_by"]
+    Profiler.enable()
+    assert Marker.__dict__["move_by"] is not original
+    Marker(0.0, 0.0, 0.0).move_by(1.0, 0.0, 0.0)
+    assert Profiler.report().entries["Marker.move_by"].calls == 1
@@ -0,0 +1,82 @@
+import os
+import sys
+import pytest
+import numpy as np
+from scipy.spatial.transform import Rotation as R
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Registration import fit_rigid_transforms, transform_points
+from src.RigidBodyTracker import RigidBodyTracker
+
+TEMPLATE = np.array([[0.05, 0.0, 0.0], [0.0, 0.08, 0.0], [0.0, 0.0, 0.04], [-0.03, -0.03, 0.02]])
+
+def moving_body(n_frames, dt):
+    t = np.arange(n_frames) * dt
+    positions = np.stack([0.5 * t, np.zeros_like(t), 1.0 + 0.1 * t], axis=1)
+    rotations = R.from_rotvec(np.outer(t, [0.0, 0.0, 2.0])).as_matrix()
+    markers = np.einsum('tij,nj->tni', rotations, TEMPLATE) + positions[:, np.newaxis]
+    return positions, rotations, markers
+
+def test_fit_rigid_transforms_recovers_pose_with_missing_points():
+    rotations = R.random(5, random_state=0).as_matrix()
+    translations = np.random.default_rng(0).normal(size=(5, 3))
+    source = np.broadcast_to(TEMPLATE, (5, 4, 3))
+    target = transform_points(rotations, translations, source).copy()
+    target[0, 1] = np.nan
+    fitted_rotations, fitted_translations = fit_rigid_transforms(source, target)
+    assert np.allclose(fitted_rotations, rotations)
+    assert np.allclose(fitted_translations, translations)
+
+def test_tracks_all_visible_markers():
+    dt = 0.001
+    positions, rotations, markers = moving_body(20, dt)
+    tracker = RigidBodyTracker({"wand": TEMPLATE}, dt)
+    frames = tracker.track(markers[:, np.newaxis])
+    assert np.allclose(frames[-1].positions[0], positions[-1])
+    assert not frames[-1].low_confidence[0]
+    assert np.allclose(tracker.linear_velocities[0], [0.5, 0.0, 0.1])
+    assert np.allclose(tracker.angular_velocities[0], [0.0, 0.0, 2.0])
+
+def test_occlusion_uses_prediction_and_flags_low_confidence():
+    dt = 0.001
+    positions, rotations, markers = moving_body(30, dt)
+    tracker = RigidBodyTracker({"wand": TEMPLATE}, dt)
+    tracker.track(markers[:20, np.newaxis])
+
+    partially_occluded = markers[20].copy()
+    partially_occluded[1:] = np.nan
+    frame = tracker.update({"wand": partially_occluded})
+    assert frame.low_confidence[0] and frame.visible[0] == 1
+    assert np.allclose(frame.positions[0], positions[20], atol=1e-6)
+
+    frame = tracker.update({})
+    assert frame.low_confidence[0] and frame.visible[0] == 0
+    assert np.allclose(frame.positions[0], positions[21], atol=1e-6)
+
+    occluded = markers[22].copy()
+    occluded[0] = np.nan
+    frame = tracker.update({"wand": occluded})
+    assert not frame.low_confidence[0]
+    assert np.allclose(frame.positions[0], positions[22])
+
+def test_rigid_bodies_and_timing():
+    tracker = RigidBodyTracker({"a": TEMPLATE, "b": TEMPLATE[:3]}, 0.01)
+    observed = {"a": TEMPLATE + [1.0, 0.0, 0.0], "b": TEMPLATE[:3]}
+    frame = tracker.update(observed)
+    bodies = tracker.rigid_bodies()
+    assert np.allclose(bodies["a"].position, [1.0, 0.0, 0.0])
+    assert np.allclose(bodies["b"].as_quaternion(), [0, 0, 0, 1])
+    assert tracker.timing()["frames"] == 1
+    assert frame.elapsed > 0
+
+def test_uninitialized_body_is_low_confidence():
+    tracker = RigidBodyTracker({"a": TEMPLATE}, 0.01)
+    frame = tracker.update({"a": np.full((4, 3), np.nan)})
+    assert frame.low_confidence[0]
+    assert not tracker.initialized[0]
+
+def test_template_needs_three_markers():
+    with pytest.raises(ValueError):
+        RigidBodyTracker({"a": TEMPLATE[:2]}, 0.01)
@@ -0,0 +1,75 @@
+import os
+import io
+import sys
+import shutil
+import pytest
+import numpy as np
+from matplotlib.image import imread
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.Skeleton import Skeleton
+from src.SkeletonAnimation import SkeletonAnimation
+
+WIDTH, HEIGHT = 160, 120
+
+def make_animation(n_frames=6, **kwargs):
+    shoulder = Marker(0.0, 0.0, 1.5, label="Shoulder")
+    elbow = Marker(0.3, 0.0, 1.2, label="Elbow")
+    hand = Marker(0.5, 0.0, 1.0, label="Hand")
+    skeleton = Skeleton(label="Arm")
+    skeleton.add_link(Link(shoulder, elbow, label="Upper Arm"))
+    skeleton.add_link(Link(elbow, hand, label="Forearm"))
+    angles = np.linspace(0.0, 1.0, n_frames)
+    trajectory = np.repeat(skeleton.get_marker_positions()[np.newaxis], n_frames, axis=0)
+    trajectory[:, 2, 0] = 0.3 + 0.3 * np.cos(angles)
+    trajectory[:, 2, 1] = 0.3 * np.sin(angles)
+    return SkeletonAnimation(skeleton, trajectory, width=WIDTH, height=HEIGHT, **kwargs)
+
+def test_artists_are_created_once():
+    transforms = np.tile(np.eye(4), (6, 1, 1))
+    animation = make_animation(body_transforms=transforms, show_labels=True)
+    first = animation.render_frame(0)
+    axes = animation._axes
+    n_artists = len(axes.collections) + len(axes.texts)
+    last = animation.render_frame(5)
+    assert first.shape == (HEIGHT, WIDTH, 3) and first.dtype == np.uint8
+    assert not np.array_equal(first, last)
+    assert len(axes.collections) + len(axes.texts) == n_artists
+    assert animation._axes is axes
+    assert np.array_equal(animation.render_frame(0), first)
+
+def test_hidden_markers_and_shape_checks():
+    animation = make_animation()
+    animation.trajectory[1, 2] = np.nan
+    assert animation.render_frame(1).shape == (HEIGHT, WIDTH, 3)
+    with pytest.raises(ValueError):
+        SkeletonAnimation(animation, np.zeros((4, 2, 3)))
+    with pytest.raises(ValueError):
+        make_animation(body_transforms=np.zeros((2, 4, 4)))
+
+def test_raw_stream_and_image_files(tmp_path):
+    animation = make_animation()
+    stream = io.BytesIO()
+    assert animation.write_raw(stream, 1, 4) == 3
+    assert len(stream.getvalue()) == 3 * HEIGHT * WIDTH * 3
+    paths = animation.save_frames(str(tmp_path), start=2)
+    assert [os.path.basename(path) for path in paths] == [f"frame_{index:05d}.png" for index in range(2, 6)]
+    assert imread(paths[0]).shape[:2] == (HEIGHT, WIDTH)
+
+def test_parallel_rendering_matches_serial(tmp_path):
+    animation = make_animation()
+    serial = animation.save_frames(str(tmp_path / "serial"))
+    parallel = animation.save_frames_parallel(str(tmp_path / "parallel"), processes=2)
+    assert [os.path.basename(path) for path in parallel] == [os.path.basename(path) for path in serial]
+    for first, second in zip(serial, parallel):
+        assert np.array_equal(imread(first), imread(second))
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_video_output(tmp_path):
+    path = str(tmp_path / "arm.mp4")
+    make_animation().write_video(path, fps=10)
+    assert os.path.getsize(path) > 0
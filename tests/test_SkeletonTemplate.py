@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import pytest
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Link import Link
+from src.Skeleton import Skeleton
+from src.SkeletonTemplate import SkeletonTemplate, clear_template_cache
+
+ARM = {
+    "label": "Arm",
+    "markers": [
+        {"label": "Shoulder", "position": [0.0, 0.0, 1.5]},
+        {"label": "Elbow", "position": [0.3, 0.0, 1.2]},
+        {"label": "Hand", "position": [0.5, 0.0, 1.0]},
+        {"label": "Thumb", "position": [0.55, 0.05, 1.0]},
+    ],
+    "links": [
+        {"label": "Upper Arm", "markers": ["Shoulder", "Elbow"]},
+        {"label": "Forearm", "markers": ["Elbow", "Hand"]},
+        {"label": "Thumb", "markers": ["Thumb", "Hand"]},
+    ],
+}
+
+def make_skeleton():
+    markers = {entry["label"]: Marker(*entry["position"], label=entry["label"]) for entry in ARM["markers"]}
+    skeleton = Skeleton(label="Arm")
+    for entry in ARM["links"]:
+        skeleton.add_link(Link(*(markers[label] for label in entry["markers"]), label=entry["label"]))
+    return skeleton
+
+def test_template_matches_skeleton_topology():
+    clear_template_cache()
+    template = SkeletonTemplate.from_definition(ARM)
+    skeleton = make_skeleton()
+    markers, proximal, distal = skeleton.get_link_indices()
+    assert template.marker_labels == tuple(marker.label for marker in markers)
+    assert np.array_equal(template.proximal, proximal)
+    assert np.array_equal(template.distal, distal)
+    assert np.array_equal(template.parents, skeleton.get_parent_indices())
+    assert template.link_index["Forearm"] == 1
+    with pytest.raises(ValueError):
+        template.proximal[0] = 2
+    with pytest.raises(TypeError):
+        template.marker_index["Other"] = 0
+
+def test_templates_are_cached_by_definition():
+    clear_template_cache()
+    template = SkeletonTemplate.from_definition(ARM)
+    reordered = json.loads(json.dumps(ARM, sort_keys=True))
+    assert SkeletonTemplate.from_definition(reordered) is template
+    compiled = SkeletonTemplate.from_skeleton(make_skeleton())
+    assert SkeletonTemplate.from_skeleton(make_skeleton()) is compiled
+    assert SkeletonTemplate.from_definition(compiled.to_definition()) is compiled
+    assert SkeletonTemplate.from_definition(template.to_definition()).marker_labels == template.marker_labels
+    changed = json.loads(json.dumps(ARM))
+    changed["markers"][0]["position"] = [0.0, 0.0, 1.6]
+    assert SkeletonTemplate.from_definition(changed) is not template
+
+def test_instances_only_own_their_positions():
+    template = SkeletonTemplate.from_definition(ARM)
+    first, second = template.instantiate(), template.instantiate()
+    first.position_of("Hand")[:] = [1.0, 1.0, 1.0]
+    assert first.template is second.template
+    assert np.allclose(second.position_of("Hand"), [0.5, 0.0, 1.0])
+    assert np.allclose(template.rest_positions, second.positions)
+    assert np.allclose(second.link_lengths(), [link.length() for link in make_skeleton().links])
+    with pytest.raises(ValueError):
+        template.instantiate(np.zeros((2, 3)))
+
+def test_to_skeleton_and_snapshot():
+    template = SkeletonTemplate.from_definition(ARM)
+    instance = template.instantiate()
+    skeleton = instance.to_skeleton()
+    assert [link.label for link in skeleton.links] == ["Upper Arm", "Forearm", "Thumb"]
+    assert skeleton.links[2].marker1 is skeleton.links[1].marker2
+    assert np.isclose(skeleton.total_length(), make_skeleton().total_length())
+    assert np.allclose(instance.snapshot().link_lengths(), instance.link_lengths())
+
+def test_load_and_save_round_trip(tmp_path):
+    path = str(tmp_path / "arm.json")
+    with open(path, "w") as file:
+        json.dump(ARM, file)
+    template = SkeletonTemplate.load(path)
+    assert template is SkeletonTemplate.from_definition(ARM)
+    saved = str(tmp_path / "saved.json")
+    template.save(saved)
+    reloaded = SkeletonTemplate.load(saved)
+    assert reloaded.marker_labels == template.marker_labels
+    assert np.array_equal(reloaded.proximal, template.proximal)
+    assert np.array_equal(reloaded.distal, template.distal)
+
+def test_invalid_definitions():
+    disconnected = json.loads(json.dumps(ARM))
+    disconnected["markers"].append({"label": "Foot", "position": [0.0, 0.0, 0.0]})
+    disconnected["markers"].append({"label": "Toe", "position": [0.1, 0.0, 0.0]})
+    disconnected["links"].append({"label": "Foot", "markers": ["Foot", "Toe"]})
+    with pytest.raises(ValueError):
+        SkeletonTemplate.from_definition(disconnected)
+    unknown = {"markers": [], "links": [{"markers": ["A", "B"]}]}
+    with pytest.raises(ValueError):
+        SkeletonTemplate.from_definition(unknown)
+    with pytest.raises(ValueError):
+        SkeletonTemplate.from_definition({"links": []})
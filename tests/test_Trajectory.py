@@ -0,0 +1,46 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+WORKSPACE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(WORKSPACE_PATH)
+
+from src.Marker import Marker
+from src.Trajectory import Trajectory, detect_gaps
+
+def test_detect_gaps_finds_every_run():
+    mask = np.ones((10, 3), dtype=bool)
+    mask[0:2, 0] = False
+    mask[5:7, 0] = False
+    mask[9, 0] = False
+    mask[3:8, 2] = False
+    gaps = detect_gaps(mask)
+    assert gaps.markers.tolist() == [0, 0, 0, 2]
+    assert gaps.starts.tolist() == [0, 5, 9, 3]
+    assert gaps.stops.tolist() == [2, 7, 10, 8]
+    gap, markers, frames = gaps.frames()
+    assert np.array_equal(mask[frames, markers], np.zeros(frames.size, dtype=bool))
+    assert frames.size == np.sum(~mask)
+    assert len(detect_gaps(np.ones((4, 2), dtype=bool))) == 0
+
+def test_trajectory_mask_and_markers():
+    positions = np.arange(24, dtype=float).reshape(4, 2, 3)
+    mask = np.array([[True, True], [True, False], [False, False], [True, True]])
+    trajectory = Trajectory(positions, labels=["A", "B"], rate=100.0, mask=mask)
+    assert np.array_equal(trajectory.mask, mask)
+    assert np.allclose(trajectory.coverage(), [0.75, 0.5])
+    assert len(trajectory.gaps(min_length=2)) == 1
+    markers = trajectory.markers_at(1)
+    assert markers[1] is None
+    assert markers[0].label == "A" and np.allclose(markers[0].get_position(), positions[1, 0])
+
+    rebuilt = Trajectory.from_markers([trajectory.markers_at(t) for t in range(4)])
+    assert rebuilt.labels == ["A", "B"]
+    assert np.array_equal(rebuilt.positions, trajectory.positions, equal_nan=True)
+    with pytest.raises(ValueError):
+        Trajectory(np.zeros((4, 2)))
+    with pytest.raises(ValueError):
+        Trajectory(positions, labels=["A"])
+    with pytest.raises(ValueError):
+        Marker(np.nan, 0.0, 0.0)